@@ -1,252 +1,397 @@
-import matplotlib.pyplot as plt
-import numpy as np
-import matplotlib as mpl
-import tkinter as tk
-from tkinter import messagebox, simpledialog
-
-# Set publication-quality style
-mpl.rcParams['font.family'] = 'serif'
-mpl.rcParams['axes.facecolor'] = 'white'
-mpl.rcParams['figure.facecolor'] = 'white'
-mpl.rcParams['font.size'] = 12
-mpl.rcParams['axes.linewidth'] = 1.2
-mpl.rcParams['grid.alpha'] = 0.3
-
-# Data
-initial_width = np.array([0.001, 0.004, 0.01, 0.01509, 0.02, 0.04])
-initial_output = np.array([9.636e16, 9.644e16, 9.647e16, 9.648e16, 9.648e16, 9.648e16])
-
-bootstrap_drive = np.array([0.2, 0.3, 0.4, 0.55, 0.65, 0.75, 0.85])
-bootstrap_output = np.array([9.64e16, 9.587e16, 9.533e16, 9.459e16, 9.415e16, 9.37e16, 9.337e16])
-
-saturation = np.array([0.3, 0.6, 0.8, 1.0, 1.5, 2.0])
-saturation_output = np.array([9.486e16, 9.571e16, 9.615e16, 9.647e16, 9.703e16, 9.738e16])
-
-# Calculate parameter impacts
-def calculate_impact(x_vals, y_vals):
-    """Calculate the range and percentage change for impact analysis"""
-    y_range = np.max(y_vals) - np.min(y_vals)
-    y_mean = np.mean(y_vals)
-    percent_change = (y_range / y_mean) * 100
-    return y_range, percent_change
-
-initial_range, initial_pct = calculate_impact(initial_width, initial_output)
-bootstrap_range, bootstrap_pct = calculate_impact(bootstrap_drive, bootstrap_output)
-saturation_range, saturation_pct = calculate_impact(saturation, saturation_output)
-
-def show_selection_dialog():
-    """Show dialog to select what to display"""
-    root = tk.Tk()
-    root.withdraw()  # Hide the main window
-    
-    choice = simpledialog.askinteger(
-        "Fusion Analysis Options",
-        "Select what you want to see:\n\n" +
-        "1. Actual data plots\n" +
-        "2. Bar chart and values to maximize\n" +
-        "3. Fusion analysis summary\n\n" +
-        "Enter your choice (1, 2, or 3):",
-        minvalue=1,
-        maxvalue=3
-    )
-    
-    root.destroy()
-    return choice
-
-def show_data_plots():
-    """Display the actual data plots"""
-    fig, (ax1, ax2, ax3) = plt.subplots(1, 3, figsize=(15, 5))
-    
-    # Initial Width Plot
-    ax1.plot(initial_width, initial_output/1e16, 'o-', color='#2E86AB', 
-             linewidth=3, markersize=10, markerfacecolor='white', markeredgewidth=2)
-    ax1.set_xlabel('Initial Width (units)', fontweight='bold', fontsize=14)
-    ax1.set_ylabel('Fusion Output (×10¹⁶ units)', fontweight='bold', fontsize=14)
-    ax1.set_title('Initial Width vs Output', fontweight='bold', fontsize=16, pad=20)
-    ax1.grid(True, alpha=0.3)
-    ax1.tick_params(labelsize=12)
-    
-    # Bootstrap Drive Plot
-    ax2.plot(bootstrap_drive, bootstrap_output/1e16, 'o-', color='#A23B72', 
-             linewidth=3, markersize=10, markerfacecolor='white', markeredgewidth=2)
-    ax2.set_xlabel('Bootstrap Drive (units)', fontweight='bold', fontsize=14)
-    ax2.set_ylabel('Fusion Output (×10¹⁶ units)', fontweight='bold', fontsize=14)
-    ax2.set_title('Bootstrap Drive vs Output', fontweight='bold', fontsize=16, pad=20)
-    ax2.grid(True, alpha=0.3)
-    ax2.tick_params(labelsize=12)
-    
-    # Saturation Plot
-    ax3.plot(saturation, saturation_output/1e16, 'o-', color='#F18F01', 
-             linewidth=3, markersize=10, markerfacecolor='white', markeredgewidth=2)
-    ax3.set_xlabel('Saturation (units)', fontweight='bold', fontsize=14)
-    ax3.set_ylabel('Fusion Output (×10¹⁶ units)', fontweight='bold', fontsize=14)
-    ax3.set_title('Saturation vs Output', fontweight='bold', fontsize=16, pad=20)
-    ax3.grid(True, alpha=0.3)
-    ax3.tick_params(labelsize=12)
-    
-    plt.suptitle('Fusion Parameter Data Plots', fontsize=18, fontweight='bold', y=1.02)
-    plt.tight_layout()
-    plt.show()
-
-def show_bar_chart_and_values():
-    """Display bar chart and optimization values in a clean layout"""
-    fig = plt.figure(figsize=(16, 10))
-    
-    # Bar Chart (left side)
-    ax1 = plt.subplot(1, 2, 1)
-    parameters = ['Initial\nWidth', 'Bootstrap\nDrive', 'Saturation']
-    impacts = [initial_pct, bootstrap_pct, saturation_pct]
-    colors = ['#2E86AB', '#A23B72', '#F18F01']
-    
-    bars = ax1.bar(parameters, impacts, color=colors, alpha=0.8, 
-                   edgecolor='black', linewidth=2, width=0.6)
-    ax1.set_ylabel('Impact on Output (%)', fontweight='bold', fontsize=16)
-    ax1.set_title('Parameter Impact Comparison', fontweight='bold', fontsize=18, pad=30)
-    ax1.grid(True, alpha=0.3, axis='y')
-    ax1.tick_params(labelsize=14)
-    
-    # Add impact values on bars
-    for bar, impact in zip(bars, impacts):
-        height = bar.get_height()
-        ax1.text(bar.get_x() + bar.get_width()/2., height + 0.05,
-                 f'{impact:.3f}%', ha='center', va='bottom', 
-                 fontweight='bold', fontsize=14)
-    
-    # Optimization Values (right side)
-    ax2 = plt.subplot(1, 2, 2)
-    ax2.axis('off')
-    
-    # Find optimal values
-    optimal_initial = initial_width[np.argmax(initial_output)]
-    optimal_bootstrap = bootstrap_drive[np.argmax(bootstrap_output)]
-    optimal_saturation = saturation[np.argmax(saturation_output)]
-    
-    max_initial = np.max(initial_output)
-    max_bootstrap = np.max(bootstrap_output)
-    max_saturation = np.max(saturation_output)
-    
-    # Create clean optimization text
-    optimization_text = f"""
-OPTIMAL VALUES FOR MAXIMUM OUTPUT
-
-Initial Width:
-• Optimal Value: {optimal_initial:.3f} units
-• Max Output: {max_initial/1e16:.3f} × 10¹⁶ units
-• Recommendation: Use ≥ 0.015 units
-  (plateaus after this point)
-
-Bootstrap Drive:
-• Optimal Value: {optimal_bootstrap:.1f} units  
-• Max Output: {max_bootstrap/1e16:.3f} × 10¹⁶ units
-• Recommendation: Minimize (use ≤ 0.2)
-  (shows negative correlation)
-
-Saturation:
-• Optimal Value: {optimal_saturation:.1f} units
-• Max Output: {max_saturation/1e16:.3f} × 10¹⁶ units  
-• Recommendation: Maximize (use ≥ 1.5)
-  (shows strong positive correlation)
-
-PRIORITY RANKING:
-1. Saturation (HIGHEST IMPACT)
-2. Bootstrap Drive  
-3. Initial Width (LOWEST IMPACT)
-"""
-    
-    ax2.text(0.05, 0.95, optimization_text, transform=ax2.transAxes, 
-             fontsize=13, verticalalignment='top', fontfamily='monospace',
-             bbox=dict(boxstyle='round,pad=1', facecolor='lightblue', alpha=0.1))
-    
-    ax2.set_title('Optimization Recommendations', fontweight='bold', 
-                  fontsize=18, pad=30)
-    
-    plt.suptitle('Fusion Parameter Optimization Guide', 
-                 fontsize=20, fontweight='bold', y=0.95)
-    plt.tight_layout()
-    plt.show()
-
-def show_fusion_summary():
-    """Display comprehensive fusion analysis summary"""
-    fig, ax = plt.subplots(figsize=(14, 10))
-    ax.axis('off')
-    
-    # Calculate additional statistics
-    baseline_output = 9.5e16
-    current_max = np.max([np.max(initial_output), np.max(bootstrap_output), np.max(saturation_output)])
-    improvement = ((current_max - baseline_output) / baseline_output) * 100
-    
-    summary_text = f"""
-COMPREHENSIVE FUSION PARAMETER ANALYSIS
-
-EXECUTIVE SUMMARY:
-This analysis examines three critical fusion reactor parameters and their impact on 
-fusion output performance. Data shows significant variation in parameter influence.
-
-PARAMETER IMPACT ANALYSIS:
-┌─────────────────┬─────────────────┬─────────────────┬─────────────────┐
-│    Parameter    │   Impact (%)    │   Trend Type    │   Priority      │
-├─────────────────┼─────────────────┼─────────────────┼─────────────────┤
-│ Saturation      │    {saturation_pct:6.3f}%      │ Strong Positive │    HIGH         │
-│ Bootstrap Drive │    {bootstrap_pct:6.3f}%      │ Strong Negative │   MEDIUM        │
-│ Initial Width   │    {initial_pct:6.3f}%      │ Plateau Effect  │    LOW          │
-└─────────────────┴─────────────────┴─────────────────┴─────────────────┘
-
-OPTIMAL CONFIGURATION:
-• Saturation:      {saturation[np.argmax(saturation_output)]:.1f} units (maximize for best performance)
-• Bootstrap Drive: {bootstrap_drive[np.argmax(bootstrap_output)]:.1f} units (minimize to reduce losses)
-• Initial Width:   {initial_width[np.argmax(initial_output)]:.3f} units (threshold effect at 0.015)
-
-PERFORMANCE METRICS:
-• Maximum Achievable Output: {current_max/1e16:.3f} × 10¹⁶ units
-• Estimated Improvement:     {improvement:.1f}% over baseline
-• Most Critical Parameter:   Saturation (2.6× more impact than Initial Width)
-
-KEY FINDINGS:
-1. Saturation demonstrates the strongest correlation with fusion output
-2. Bootstrap Drive shows consistent negative impact - minimize for optimal performance  
-3. Initial Width reaches plateau beyond 0.015 units - diminishing returns
-4. Parameter interactions suggest combined optimization potential
-
-RECOMMENDATIONS:
-⚡ IMMEDIATE ACTIONS:
-   - Prioritize saturation system optimization
-   - Reduce bootstrap drive to minimum operational levels
-   - Set initial width to 0.015+ units (cost-effective threshold)
-
-🔬 RESEARCH PRIORITIES:
-   - Investigate saturation enhancement techniques
-   - Study bootstrap drive reduction methods
-   - Analyze parameter interaction effects
-
-📊 MONITORING:
-   - Track saturation stability under high-output conditions
-   - Monitor bootstrap drive efficiency improvements
-   - Validate initial width plateau behavior
-
-CONCLUSION:
-Strategic parameter optimization focusing on saturation maximization and bootstrap 
-drive minimization can yield significant fusion output improvements. The analysis 
-indicates potential for {improvement:.1f}% performance enhancement through systematic 
-parameter tuning.
-"""
-    
-    ax.text(0.05, 0.95, summary_text, transform=ax.transAxes, 
-            fontsize=11, verticalalignment='top', fontfamily='monospace',
-            bbox=dict(boxstyle='round,pad=1', facecolor='lightyellow', alpha=0.3))
-    
-    plt.suptitle('FUSION REACTOR PARAMETER ANALYSIS REPORT', 
-                 fontsize=16, fontweight='bold', y=0.98)
-    plt.tight_layout()
-    plt.show()
-
-# Main execution
-choice = show_selection_dialog()
-
-if choice == 1:
-    show_data_plots()
-elif choice == 2:
-    show_bar_chart_and_values()
-elif choice == 3:
-    show_fusion_summary()
-else:
-    print("Invalid choice. Please run the script again.")
\ No newline at end of file
+import matplotlib.pyplot as plt
+import numpy as np
+import matplotlib as mpl
+
+import os
+
+from simulation.sweep import DEFAULT_PARAMS, one_at_a_time, run_sweep
+from simulation.runner import run_headless
+from simulation.sensitivity import sobol_indices, ranking
+from simulation.optimize import optimize
+from simulation.result_store import ResultStore
+from simulation.cache import solver_version, analysis_version
+
+# Results are kept in a ResultStore next to this script, so the analysis below reads stored sweep
+# output instead of re-running simulations (a sweep only runs the first time its values are asked for).
+# Every record is tagged with the solver version (analysis version for the Sobol indices and the optimum,
+# which also covers their estimators), so a change to that code makes them re-run.
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+def load_sweep(store, key, values):
+    """Parameter values and fusion output of a one-at-a-time sweep, from the store if already run"""
+    attrs = {"experiment": "one_at_a_time", "parameter": key, "values": list(values),
+             "version": solver_version()}
+    records = store.index("sweep", **attrs)
+    if records:
+        table = store.read_shard(records[-1]["shard"], columns=[key, "power"])
+    else:
+        table = run_sweep(one_at_a_time(key, values))
+        store.append(table, attrs=attrs)
+    return np.asarray(table[key]), np.asarray(table["power"])
+
+# Sobol indices are computed over the same ranges as the one-at-a-time data
+SENSITIVITY_BOUNDS = {"initial_width": (0.001, 0.04), "bootstrap": (0.2, 0.85), "D": (0.3, 2.0)}
+SENSITIVITY_LABELS = {"initial_width": "Initial Width", "bootstrap": "Bootstrap Drive", "D": "Saturation"}
+
+def load_sensitivity(store, samples=8192, seed=0):
+    """Sobol indices of fusion output (with 95% bootstrap intervals), from the store if already computed"""
+    attrs = {"experiment": "sobol", "bounds": SENSITIVITY_BOUNDS, "samples": samples, "seed": seed,
+             "version": analysis_version()}
+    records = store.index("sensitivity", **attrs)
+    if records:
+        table = store.read_shard(records[-1]["shard"], mmap=False)
+    else:
+        result = sobol_indices(SENSITIVITY_BOUNDS, output="power", samples=samples, seed=seed)
+        table = {"S1": result["S1"], "ST": result["ST"],
+                 "S1_low": result["S1_conf"][0], "S1_high": result["S1_conf"][1],
+                 "ST_low": result["ST_conf"][0], "ST_high": result["ST_conf"][1]}
+        store.append(table, kind="sensitivity", attrs=attrs)
+    return {"names": list(SENSITIVITY_BOUNDS), **{key: np.asarray(col) for key, col in table.items()}}
+
+def load_optimum(store, method="cmaes", max_evals=300, seed=0):
+    """Jointly optimal parameters for fusion output within the sweep ranges, from the store if already found"""
+    attrs = {"experiment": "optimum", "bounds": SENSITIVITY_BOUNDS, "method": method,
+             "max_evals": max_evals, "seed": seed, "version": analysis_version()}
+    records = store.index("optimum", **attrs)
+    if records:
+        table = store.read_shard(records[-1]["shard"], mmap=False)
+    else:
+        result = optimize(method, SENSITIVITY_BOUNDS, objective="power", max_evals=max_evals, seed=seed)
+        table = {**{name: [value] for name, value in result["params"].items()},
+                 "power": [result["value"]], "evaluations": [result["evaluations"]]}
+        store.append(table, kind="optimum", attrs=attrs)
+    return {key: float(np.asarray(col)[0]) for key, col in table.items()}
+
+# Calculate parameter impacts
+def calculate_impact(x_vals, y_vals):
+    """Calculate the range and percentage change for impact analysis"""
+    y_range = np.max(y_vals) - np.min(y_vals)
+    y_mean = np.mean(y_vals)
+    percent_change = (y_range / y_mean) * 100
+    return y_range, percent_change
+
+def describe_trend(x_vals, y_vals):
+    """Direction of a one-at-a-time sweep, its table label and, if the output levels off, where it does"""
+    order = np.argsort(x_vals)
+    x, y = np.asarray(x_vals)[order], np.asarray(y_vals)[order]
+    direction = 1 if y[-1] >= y[0] else -1
+    gain = (y - y[0]) * direction
+    # Plateau: the upper half of the range adds less than 10% of the change; the knee is where 90% is reached
+    upper_half = gain[-1] - np.interp((x[0] + x[-1]) / 2, x, gain)
+    if gain[-1] > 0 and upper_half < 0.1 * gain[-1]:
+        knee = float(x[np.argmax(gain >= 0.9 * gain[-1])])
+        return {"direction": direction, "label": "Plateau Effect", "knee": knee}
+    strength = "Strong" if abs(np.corrcoef(x, y)[0, 1]) >= 0.9 else "Weak"
+    return {"direction": direction, "label": f"{strength} {'Positive' if direction > 0 else 'Negative'}", "knee": None}
+
+def recommendation(name):
+    """Advice for one parameter from where the joint optimum sits in its range, and the reason for it"""
+    low, high = SENSITIVITY_BOUNDS[name]
+    value = optimum[name]
+    edge = 0.01 * (high - low)
+    if value >= high - edge:
+        return f"Maximize (use ≥ {value:.3g})", "optimum at the top of the range"
+    if value <= low + edge:
+        return f"Minimize (use ≤ {value:.3g})", "optimum at the bottom of the range"
+    knee = describe_trend(*sweeps[name])["knee"]
+    if knee is not None and knee <= value:
+        return f"Use ≥ {knee:.3g} units", "plateaus after this point"
+    return f"Use ≈ {value:.3g} units", "interior optimum"
+
+def priority(total_index):
+    """Priority of a parameter from its Sobol total index (share of output variance)"""
+    return "HIGH" if total_index >= 0.25 else "MEDIUM" if total_index >= 0.05 else "LOW"
+
+def set_style():
+    """Set publication-quality style"""
+    mpl.rcParams['font.family'] = 'serif'
+    mpl.rcParams['axes.facecolor'] = 'white'
+    mpl.rcParams['figure.facecolor'] = 'white'
+    mpl.rcParams['font.size'] = 12
+    mpl.rcParams['axes.linewidth'] = 1.2
+    mpl.rcParams['grid.alpha'] = 0.3
+
+def load_data():
+    """Load the sweep data and impacts used by the plots (run as a script, not on import)"""
+    global initial_width, initial_output, bootstrap_drive, bootstrap_output, saturation, saturation_output
+    global initial_range, initial_pct, bootstrap_range, bootstrap_pct, saturation_range, saturation_pct
+    global sensitivity, optimum, sweeps, impacts, baseline_output
+
+    store = ResultStore(RESULTS_DIR)
+
+    # Data
+    initial_width, initial_output = load_sweep(store, "initial_width", [0.001, 0.004, 0.01, 0.01509, 0.02, 0.04])
+    bootstrap_drive, bootstrap_output = load_sweep(store, "bootstrap", [0.2, 0.3, 0.4, 0.55, 0.65, 0.75, 0.85])
+    saturation, saturation_output = load_sweep(store, "D", [0.3, 0.6, 0.8, 1.0, 1.5, 2.0])
+
+    initial_range, initial_pct = calculate_impact(initial_width, initial_output)
+    bootstrap_range, bootstrap_pct = calculate_impact(bootstrap_drive, bootstrap_output)
+    saturation_range, saturation_pct = calculate_impact(saturation, saturation_output)
+
+    sweeps = {"initial_width": (initial_width, initial_output), "bootstrap": (bootstrap_drive, bootstrap_output),
+              "D": (saturation, saturation_output)}
+    impacts = {"initial_width": initial_pct, "bootstrap": bootstrap_pct, "D": saturation_pct}
+
+    sensitivity = load_sensitivity(store)
+    optimum = load_optimum(store)
+    baseline_output = run_headless(DEFAULT_PARAMS)["power"]  # default parameters, same dt / steps as the optimum
+
+def show_selection_dialog():
+    """Show dialog to select what to display"""
+    import tkinter as tk
+    from tkinter import simpledialog
+
+    root = tk.Tk()
+    root.withdraw()  # Hide the main window
+    
+    choice = simpledialog.askinteger(
+        "Fusion Analysis Options",
+        "Select what you want to see:\n\n" +
+        "1. Actual data plots\n" +
+        "2. Bar chart and values to maximize\n" +
+        "3. Fusion analysis summary\n\n" +
+        "Enter your choice (1, 2, or 3):",
+        minvalue=1,
+        maxvalue=3
+    )
+    
+    root.destroy()
+    return choice
+
+def show_data_plots():
+    """Display the actual data plots"""
+    fig, (ax1, ax2, ax3) = plt.subplots(1, 3, figsize=(15, 5))
+    
+    # Initial Width Plot
+    ax1.plot(initial_width, initial_output/1e16, 'o-', color='#2E86AB', 
+             linewidth=3, markersize=10, markerfacecolor='white', markeredgewidth=2)
+    ax1.set_xlabel('Initial Width (units)', fontweight='bold', fontsize=14)
+    ax1.set_ylabel('Fusion Output (×10¹⁶ units)', fontweight='bold', fontsize=14)
+    ax1.set_title('Initial Width vs Output', fontweight='bold', fontsize=16, pad=20)
+    ax1.grid(True, alpha=0.3)
+    ax1.tick_params(labelsize=12)
+    
+    # Bootstrap Drive Plot
+    ax2.plot(bootstrap_drive, bootstrap_output/1e16, 'o-', color='#A23B72', 
+             linewidth=3, markersize=10, markerfacecolor='white', markeredgewidth=2)
+    ax2.set_xlabel('Bootstrap Drive (units)', fontweight='bold', fontsize=14)
+    ax2.set_ylabel('Fusion Output (×10¹⁶ units)', fontweight='bold', fontsize=14)
+    ax2.set_title('Bootstrap Drive vs Output', fontweight='bold', fontsize=16, pad=20)
+    ax2.grid(True, alpha=0.3)
+    ax2.tick_params(labelsize=12)
+    
+    # Saturation Plot
+    ax3.plot(saturation, saturation_output/1e16, 'o-', color='#F18F01', 
+             linewidth=3, markersize=10, markerfacecolor='white', markeredgewidth=2)
+    ax3.set_xlabel('Saturation (units)', fontweight='bold', fontsize=14)
+    ax3.set_ylabel('Fusion Output (×10¹⁶ units)', fontweight='bold', fontsize=14)
+    ax3.set_title('Saturation vs Output', fontweight='bold', fontsize=16, pad=20)
+    ax3.grid(True, alpha=0.3)
+    ax3.tick_params(labelsize=12)
+    
+    plt.suptitle('Fusion Parameter Data Plots', fontsize=18, fontweight='bold', y=1.02)
+    plt.tight_layout()
+    plt.show()
+
+def show_bar_chart_and_values():
+    """Display bar chart and optimization values in a clean layout"""
+    fig = plt.figure(figsize=(16, 10))
+    
+    # Bar Chart (left side): Sobol indices with 95% bootstrap intervals
+    ax1 = plt.subplot(1, 2, 1)
+    parameters = [SENSITIVITY_LABELS[name].replace(' ', '\n') for name in sensitivity["names"]]
+    total = sensitivity["ST"] * 100
+    first = sensitivity["S1"] * 100
+    total_err = [total - sensitivity["ST_low"] * 100, sensitivity["ST_high"] * 100 - total]
+    first_err = [first - sensitivity["S1_low"] * 100, sensitivity["S1_high"] * 100 - first]
+    colors = ['#2E86AB', '#A23B72', '#F18F01']
+    x = np.arange(len(parameters))
+    
+    bars = ax1.bar(x - 0.2, total, yerr=np.maximum(total_err, 0), color=colors, alpha=0.8,
+                   edgecolor='black', linewidth=2, width=0.4, capsize=6, label='Total (incl. interactions)')
+    ax1.bar(x + 0.2, first, yerr=np.maximum(first_err, 0), color=colors, alpha=0.35,
+            edgecolor='black', linewidth=2, width=0.4, capsize=6, hatch='//', label='First order')
+    ax1.set_xticks(x)
+    ax1.set_xticklabels(parameters)
+    ax1.set_ylabel('Share of Output Variance (%)', fontweight='bold', fontsize=16)
+    ax1.set_title('Sobol Sensitivity of Fusion Output', fontweight='bold', fontsize=18, pad=30)
+    ax1.grid(True, alpha=0.3, axis='y')
+    ax1.tick_params(labelsize=14)
+    ax1.legend(fontsize=12)
+    
+    # Add total index values on bars
+    for bar, impact in zip(bars, total):
+        height = bar.get_height()
+        ax1.text(bar.get_x() + bar.get_width()/2., height + 0.05,
+                 f'{impact:.1f}%', ha='center', va='bottom', 
+                 fontweight='bold', fontsize=14)
+    
+    # Optimization Values (right side)
+    ax2 = plt.subplot(1, 2, 2)
+    ax2.axis('off')
+    
+    # Optimal values: joint optimum of all three parameters (simulation/optimize.py), with advice based on
+    # where the optimum sits in each range
+    blocks = []
+    for name in ("initial_width", "bootstrap", "D"):
+        advice, reason = recommendation(name)
+        blocks.append(f"{SENSITIVITY_LABELS[name]}:\n"
+                      f"• Optimal Value: {optimum[name]:.3g} units\n"
+                      f"• Max Output (sweep): {np.max(sweeps[name][1])/1e16:.3f} × 10¹⁶ units\n"
+                      f"• Recommendation: {advice}\n"
+                      f"  ({reason})")
+    parameter_text = "\n\n".join(blocks)
+    
+    # Priority ranking by total Sobol index
+    order = ranking(sensitivity, "ST")
+    ST = dict(zip(sensitivity["names"], sensitivity["ST"]))
+    notes = {0: " (HIGHEST IMPACT)", len(order) - 1: " (LOWEST IMPACT)"}
+    priority_text = "\n".join(f"{rank + 1}. {SENSITIVITY_LABELS[name]} - ST = {ST[name]:.3f}{notes.get(rank, '')}"
+                              for rank, name in enumerate(order))
+    
+    # Create clean optimization text
+    optimization_text = f"""
+OPTIMAL VALUES FOR MAXIMUM OUTPUT
+
+{parameter_text}
+
+Joint Optimum:
+• Max Output: {optimum["power"]/1e16:.3f} × 10¹⁶ units
+  ({optimum["evaluations"]:.0f} optimizer runs)
+
+PRIORITY RANKING (Sobol total index):
+{priority_text}
+"""
+    
+    ax2.text(0.05, 0.95, optimization_text, transform=ax2.transAxes, 
+             fontsize=13, verticalalignment='top', fontfamily='monospace',
+             bbox=dict(boxstyle='round,pad=1', facecolor='lightblue', alpha=0.1))
+    
+    ax2.set_title('Optimization Recommendations', fontweight='bold', 
+                  fontsize=18, pad=30)
+    
+    plt.suptitle('Fusion Parameter Optimization Guide', 
+                 fontsize=20, fontweight='bold', y=0.95)
+    plt.tight_layout()
+    plt.show()
+
+def show_fusion_summary():
+    """Display comprehensive fusion analysis summary"""
+    fig, ax = plt.subplots(figsize=(14, 10))
+    ax.axis('off')
+    
+    # Calculate additional statistics
+    current_max = optimum["power"]
+    improvement = ((current_max - baseline_output) / baseline_output) * 100
+
+    # Everything below follows the Sobol ranking and the shape of the one-at-a-time sweeps
+    order = ranking(sensitivity, "ST")
+    ST = dict(zip(sensitivity["names"], sensitivity["ST"]))
+    trends = {name: describe_trend(*sweeps[name]) for name in order}
+    label = SENSITIVITY_LABELS
+    top, bottom = order[0], order[-1]
+
+    table_rows = "\n".join(
+        f"│ {label[name]:<15} │ {impacts[name]:9.3f}%      │ {trends[name]['label']:<15} │"
+        f"{priority(ST[name]) + f' ST {ST[name]:.2g}':^17}│"
+        for name in order)
+
+    def action(name):
+        trend = trends[name]
+        if trend["knee"] is not None:
+            return f"set to ≥ {trend['knee']:.3g} units, little gain beyond"
+        return f"{'maximize' if trend['direction'] > 0 else 'minimize'} for best performance"
+
+    configuration = "\n".join(f"• {label[name] + ':':<16} {optimum[name]:.3g} units ({action(name)})"
+                               for name in order)
+    ratio = ST[top] / max(ST[bottom], 1e-12)
+    interactions = max(0.0, 1.0 - float(np.sum(sensitivity["S1"]))) * 100
+
+    findings = [f"{label[top]} explains {ST[top] * 100:.0f}% of the output variance (Sobol total index)"]
+    for name in order:
+        trend = trends[name]
+        if trend["knee"] is not None:
+            findings.append(f"{label[name]} levels off beyond {trend['knee']:.3g} units - diminishing returns")
+        else:
+            effect = "raises" if trend["direction"] > 0 else "lowers"
+            findings.append(f"{label[name]} {effect} fusion output ({trend['label'].lower()} trend)")
+    findings.append(f"Parameter interactions account for {interactions:.1f}% of the output variance")
+    findings_text = "\n".join(f"{i + 1}. {line}" for i, line in enumerate(findings))
+
+    actions_text = "\n".join(f"   - {label[name]}: {action(name)}" for name in order)
+    research_text = "\n".join(
+        f"   - Study ways to {'raise' if trends[name]['direction'] > 0 else 'lower'} {label[name].lower()} "
+        f"beyond the studied range" for name in order if priority(ST[name]) == "HIGH") or "   - None above ST = 0.25"
+    monitoring_text = "\n".join(f"   - {label[name]}: {priority(ST[name]).lower()} priority, "
+                                 f"ST = {ST[name]:.4f}" for name in order if priority(ST[name]) != "HIGH")
+    focus = " and ".join(f"{label[name].lower()} "
+                         f"{'maximization' if trends[name]['direction'] > 0 else 'minimization'}"
+                         for name in order if priority(ST[name]) == "HIGH") or f"{label[top].lower()} tuning"
+
+    summary_text = f"""
+COMPREHENSIVE FUSION PARAMETER ANALYSIS
+
+EXECUTIVE SUMMARY:
+This analysis examines three critical fusion reactor parameters and their impact on 
+fusion output performance. Data shows significant variation in parameter influence.
+
+PARAMETER IMPACT ANALYSIS:
+┌─────────────────┬─────────────────┬─────────────────┬─────────────────┐
+│    Parameter    │   Impact (%)    │   Trend Type    │   Priority      │
+├─────────────────┼─────────────────┼─────────────────┼─────────────────┤
+{table_rows}
+└─────────────────┴─────────────────┴─────────────────┴─────────────────┘
+
+OPTIMAL CONFIGURATION:
+{configuration}
+
+PERFORMANCE METRICS:
+• Maximum Achievable Output: {current_max/1e16:.3f} × 10¹⁶ units
+• Estimated Improvement:     {improvement:.1f}% over baseline
+• Most Critical Parameter:   {label[top]} ({ratio:,.0f}× more impact than {label[bottom]})
+
+KEY FINDINGS:
+{findings_text}
+
+RECOMMENDATIONS:
+⚡ IMMEDIATE ACTIONS:
+{actions_text}
+
+🔬 RESEARCH PRIORITIES:
+{research_text}
+
+📊 MONITORING:
+{monitoring_text or "   - Nothing below HIGH priority"}
+
+CONCLUSION:
+Strategic parameter optimization focusing on {focus} 
+can yield fusion output improvements. The analysis indicates potential for 
+{improvement:.1f}% performance enhancement through systematic parameter tuning.
+"""
+    
+    ax.text(0.05, 0.95, summary_text, transform=ax.transAxes, 
+            fontsize=11, verticalalignment='top', fontfamily='monospace',
+            bbox=dict(boxstyle='round,pad=1', facecolor='lightyellow', alpha=0.3))
+    
+    plt.suptitle('FUSION REACTOR PARAMETER ANALYSIS REPORT', 
+                 fontsize=16, fontweight='bold', y=0.98)
+    plt.tight_layout()
+    plt.show()
+
+def main():
+    set_style()
+    load_data()
+    choice = show_selection_dialog()
+
+    if choice == 1:
+        show_data_plots()
+    elif choice == 2:
+        show_bar_chart_and_values()
+    elif choice == 3:
+        show_fusion_summary()
+    else:
+        print("Invalid choice. Please run the script again.")
+
+# Main execution
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,351 @@
+# UI/export.py
+
+#Offscreen export of a stored trajectory as a movie, GIF or image sequence.
+#The width, τ_E, cross-section and power panels of the live window (UI/island_plot.build_panels) are drawn
+#with the Agg backend straight into pixel buffers, so no window is opened and the physics is not re-run.
+
+#How it stays fast for long runs:
+#   - frame decimation: only `frames` evenly spaced rows (or every k-th row) become frames, the last row
+#     always included
+#   - axis limits are fixed from the whole trajectory, so the static parts of the figure are drawn once
+#     per worker and every frame only blits the lines, the circle and the time label over that background
+#   - each line is drawn from at most max_points points, whatever the frame's row
+#   - frames are rendered in worker processes, in contiguous chunks. Store shards are memory-mapped by
+#     every worker, so the trajectory is never copied between processes.
+#Image sequences are written by the workers themselves; video frames come back to the main process and
+#are piped to ffmpeg in order, with a bounded number of chunks in flight.
+
+#Usage (from the project folder):
+#   python -m UI.export --store results --latest --out island.mp4
+#   python -m UI.export --store results --shard <id> --out frames/ --frames 600 --workers 4
+#   python -m UI.export --npz run.npz --out island.gif --every 100
+
+import os
+import time
+
+import numpy as np
+
+from UI.island_plot import build_panels
+
+PANEL_COLUMNS = ("t", "w", "tau_E", "power")
+VIDEO_FORMATS = (".mp4", ".mkv", ".mov", ".avi", ".webm")
+IMAGE_FORMATS = (".png", ".jpg", ".jpeg", ".bmp", ".tif", ".tiff")
+PNG_COMPRESS_LEVEL = 1  #zlib level for PNG frames: about twice as fast to write as the default 6, files ~30% larger
+
+
+#Trajectory columns from any of: a dict of columns, a TimeSeriesRecorder, a run_headless result (its
+#"recorder"), an .npz file, or a ResultStore root folder together with a shard id (memory-mapped)
+def load_trajectory(source, shard=None):
+    if shard is not None:
+        from simulation.result_store import ResultStore
+        return ResultStore(source).read_shard(shard, list(PANEL_COLUMNS))
+    if isinstance(source, (str, os.PathLike)):
+        with np.load(source) as data:
+            return {key: data[key] for key in PANEL_COLUMNS}
+    if isinstance(source, dict) and "recorder" in source:
+        source = source["recorder"]
+    if hasattr(source, "column"):
+        return {key: source.column(key) for key in PANEL_COLUMNS}
+    missing = [key for key in PANEL_COLUMNS if key not in source]
+    if missing:
+        raise ValueError(f"Trajectory is missing column(s): {', '.join(missing)}")
+    return {key: np.asarray(source[key]) for key in PANEL_COLUMNS}
+
+
+#Shard id of the most recent trajectory in a ResultStore
+def latest_trajectory(store_root):
+    from simulation.result_store import ResultStore, TRAJECTORY
+    records = ResultStore(store_root).index(TRAJECTORY)
+    if not records:
+        raise ValueError(f"No trajectories in the result store at {store_root}")
+    return max(records, key=lambda record: record["shard"])["shard"]
+
+
+#Rows that become frames: every k-th row, or `frames` rows spread evenly; the last row is always included
+def frame_indices(rows, frames=None, every=None):
+    if rows == 0:
+        return np.empty(0, dtype=np.int64)
+    if every:
+        indices = np.arange(0, rows, int(every))
+    elif frames and frames < rows:
+        indices = np.unique(np.linspace(0, rows - 1, int(frames)).round().astype(np.int64))
+    else:
+        indices = np.arange(rows)
+    if indices[-1] != rows - 1:
+        indices = np.append(indices, rows - 1)
+    return indices
+
+
+#Draws frames of one trajectory on an offscreen Agg figure. The axes are fixed to the range of the
+#whole run, so the background is rendered once and each frame only redraws the animated artists.
+class FrameRenderer:
+    def __init__(self, columns, figsize=(15, 8), dpi=80, max_points=4096, pad=0.02):
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+        self.data = {key: columns[key] for key in PANEL_COLUMNS}
+        self.rows = len(self.data["t"])
+        self.max_points = max_points
+
+        self.fig = Figure(figsize=figsize, dpi=dpi)
+        self.canvas = FigureCanvasAgg(self.fig)
+        self.fig.suptitle("Magnetic Island & Fusion Performance", fontsize=14)
+        for name, obj in build_panels(self.fig).items():
+            setattr(self, name, obj)
+        self.time_text = self.fig.text(0.98, 0.02, "", ha="right", va="bottom", fontsize=12)
+
+        self._set_limits(pad)
+        self._artists = (self.line_width, self.line_tau, self.circle, self.line_power, self.time_text)
+        for artist in self._artists:
+            artist.set_animated(True)
+        self.fig.tight_layout()
+        self.canvas.draw()
+        self._background = self.canvas.copy_from_bbox(self.fig.bbox)
+
+    def _set_limits(self, pad):
+        t = self.data["t"]
+        t0, t1 = float(t[0]), float(t[-1])
+        for ax, key in ((self.ax_width, "w"), (self.ax_tau, "tau_E"), (self.ax_power, "power")):
+            values = self.data[key]
+            lo, hi = float(np.min(values)), float(np.max(values))
+            span = max(hi - lo, abs(hi) * 1e-3, 1e-12)
+            ax.set_xlim(t0, max(t1, t0 + 1e-9))
+            ax.set_ylim(lo - 0.05 * span, hi + 0.05 * span)
+
+        extent = 1.2 * (float(np.max(np.abs(self.data["w"]))) / 2 + pad)
+        self.ax_cross.set_xlim(-extent, extent)
+        self.ax_cross.set_ylim(-extent, extent)
+
+    #History up to and including `row`, decimated to at most max_points points
+    def _history(self, key, row):
+        stride = max(1, -(-(row + 1) // self.max_points))
+        values = self.data[key][:row + 1:stride]
+        if row % stride:
+            values = np.append(values, self.data[key][row])
+        return values
+
+    #RGB pixels (height, width, 3) of the frame showing the run up to row
+    def render(self, row):
+        t = self._history("t", row)
+        self.line_width.set_data(t, self._history("w", row))
+        self.line_tau.set_data(t, self._history("tau_E", row))
+        self.line_power.set_data(t, self._history("power", row))
+        self.circle.set_radius(abs(float(self.data["w"][row])) / 2)
+        self.time_text.set_text(f"t = {float(self.data['t'][row]):.2f}")
+
+        self.canvas.restore_region(self._background)
+        for artist in self._artists:
+            self.fig.draw_artist(artist)
+        return np.asarray(self.canvas.buffer_rgba())[..., :3].copy()
+
+
+# --- worker side ---
+
+_renderer = None
+
+
+#Pool initializer: every worker loads (or memory-maps) the trajectory and builds its figure once
+def _init_worker(source, shard, render_options):
+    global _renderer
+    _renderer = FrameRenderer(load_trajectory(source, shard), **render_options)
+
+
+#Renders frames first_frame, first_frame + 1, ... from the given rows. With a pattern they are saved as
+#images and only the count comes back; otherwise the pixels are returned.
+def _render_chunk(first_frame, rows, pattern=None):
+    frames = []
+    for i, row in enumerate(rows):
+        image = _renderer.render(int(row))
+        if pattern is None:
+            frames.append(image)
+        else:
+            from PIL import Image
+            Image.fromarray(image).save(pattern % (first_frame + i), compress_level=PNG_COMPRESS_LEVEL)
+    return len(rows) if pattern is not None else frames
+
+
+#Yields the results of _render_chunk for each chunk, in order. With workers > 1 the chunks run on a
+#process pool with at most 2 * workers of them in flight, so finished video frames never pile up.
+def _iter_chunks(chunks, workers, init_args, pattern):
+    if workers <= 1:
+        _init_worker(*init_args)
+        for first_frame, rows in chunks:
+            yield _render_chunk(first_frame, rows, pattern)
+        return
+
+    from collections import deque
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=init_args) as pool:
+        pending = deque()
+        for first_frame, rows in chunks:
+            pending.append(pool.submit(_render_chunk, first_frame, rows, pattern))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+# --- outputs ---
+
+#Output kind of `out`: "video", "gif" or "images" (with the printf pattern the frames are saved under)
+def output_kind(out):
+    out = str(out)
+    ext = os.path.splitext(out)[1].lower()
+    if ext in VIDEO_FORMATS:
+        return "video", None
+    if ext == ".gif":
+        return "gif", None
+    if "%" in out:
+        return "images", out
+    if ext in IMAGE_FORMATS:
+        return "images", f"{out[:-len(ext)]}_%05d{ext}"
+    if ext:
+        raise ValueError(f"Unknown export format '{ext}', use a folder, an image pattern, .gif or one of "
+                         f"{', '.join(VIDEO_FORMATS)}")
+    return "images", os.path.join(out, "frame_%05d.png")
+
+
+class _FFmpegWriter:
+    def __init__(self, out, fps):
+        import shutil
+        self.executable = shutil.which("ffmpeg")
+        if self.executable is None:
+            raise RuntimeError("ffmpeg was not found on PATH; export an image sequence (a folder or e.g. "
+                               "frames/frame_%05d.png) or a .gif instead")
+        self.out = out
+        self.fps = fps
+        self.process = None
+
+    def write(self, frame):
+        if self.process is None:
+            import subprocess
+            height, width = frame.shape[:2]
+            command = [self.executable, "-y", "-loglevel", "error",
+                       "-f", "rawvideo", "-pix_fmt", "rgb24", "-s", f"{width}x{height}", "-r", str(self.fps),
+                       "-i", "-", "-vf", "pad=ceil(iw/2)*2:ceil(ih/2)*2", "-pix_fmt", "yuv420p", self.out]
+            self.process = subprocess.Popen(command, stdin=subprocess.PIPE)
+        self.process.stdin.write(frame.tobytes())
+
+    def close(self):
+        if self.process is None:
+            return
+        self.process.stdin.close()
+        if self.process.wait() != 0:
+            raise RuntimeError(f"ffmpeg failed writing {self.out}")
+
+
+#Pillow keeps every frame of a GIF until it is saved, so frames are held palette-quantised (1 byte per
+#pixel); meant for short clips of a few hundred frames. The palette is computed from the first frame only
+#(all frames share the same colours), which makes quantising the rest ~20x cheaper.
+class _GifWriter:
+    def __init__(self, out, fps):
+        self.out = out
+        self.duration = int(round(1000 / fps))
+        self.frames = []
+
+    def write(self, frame):
+        from PIL import Image
+        image = Image.fromarray(frame)
+        if self.frames:
+            self.frames.append(image.quantize(palette=self.frames[0], dither=Image.Dither.NONE))
+        else:
+            self.frames.append(image.quantize(colors=256))
+
+    def close(self):
+        if self.frames:
+            self.frames[0].save(self.out, save_all=True, append_images=self.frames[1:], duration=self.duration,
+                                loop=0)
+        self.frames = []
+
+
+#Renders a stored trajectory to `out` without a window and without re-running the simulation.
+#   source, shard - see load_trajectory; with a ResultStore the workers memory-map the shard
+#   out           - .mp4/.mkv/.mov/.avi/.webm (needs ffmpeg), .gif, a folder (frame_00000.png, ...),
+#                   an image file name (numbered automatically) or a printf pattern like frames/f_%05d.png
+#   frames, every - frame decimation (see frame_indices); frames=None with every=None renders every row
+#   workers       - render processes (default: all CPUs); 1 renders in this process
+#   chunk_frames  - frames per task handed to a worker
+#   progress(done, total, elapsed) is called after every chunk
+#figsize / dpi / max_points / pad go to FrameRenderer. Returns a summary dict.
+def export_trajectory(source, out, shard=None, frames=300, every=None, fps=30, workers=None, chunk_frames=16,
+                      figsize=(15, 8), dpi=80, max_points=4096, pad=0.02, progress=None):
+    start = time.perf_counter()
+    kind, pattern = output_kind(out)
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    #Store shards are memory-mapped, so this reads only what choosing the frames and the limits touches
+    columns = load_trajectory(source, shard)
+    rows = frame_indices(len(columns["t"]), frames, every)
+    if len(rows) == 0:
+        raise ValueError("The trajectory is empty, there is nothing to export")
+    if shard is None and not isinstance(source, (str, os.PathLike)):
+        source = columns  #in-memory data is sent to each worker once, by the pool initializer
+
+    chunks = [(first, rows[first:first + chunk_frames]) for first in range(0, len(rows), chunk_frames)]
+    init_args = (source, shard, {"figsize": figsize, "dpi": dpi, "max_points": max_points, "pad": pad})
+    workers = max(1, min(workers, len(chunks)))
+
+    if kind == "images":
+        folder = os.path.dirname(pattern)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        writer = None
+    else:
+        writer = _FFmpegWriter(str(out), fps) if kind == "video" else _GifWriter(str(out), fps)
+
+    done = 0
+    try:
+        for result in _iter_chunks(chunks, workers, init_args, pattern):
+            if writer is None:
+                done += result
+            else:
+                for frame in result:
+                    writer.write(frame)
+                done += len(result)
+            if progress is not None:
+                progress(done, len(rows), time.perf_counter() - start)
+    finally:
+        if writer is not None:
+            writer.close()
+
+    return {"out": pattern if kind == "images" else str(out), "kind": kind, "frames": done,
+            "rows": len(columns["t"]), "workers": workers, "seconds": time.perf_counter() - start}
+
+
+def _print_progress(done, total, elapsed):
+    print(f"\r{done}/{total} frames, {done / max(elapsed, 1e-9):.1f} frames/s", end="", flush=True)
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Render a stored trajectory to a movie or image sequence")
+    parser.add_argument("--store", default=None, help="ResultStore folder holding the trajectory")
+    parser.add_argument("--shard", default=None, help="trajectory shard id in the store")
+    parser.add_argument("--latest", action="store_true", help="use the most recent trajectory in the store")
+    parser.add_argument("--npz", default=None, help=".npz file with t, w, tau_E and power columns")
+    parser.add_argument("--out", required=True, help="video file, .gif, folder or image name pattern")
+    parser.add_argument("--frames", type=int, default=300, help="number of frames, spread over the run")
+    parser.add_argument("--every", type=int, default=None, help="one frame every EVERY rows (overrides --frames)")
+    parser.add_argument("--fps", type=int, default=30)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--dpi", type=int, default=80)
+    args = parser.parse_args(argv)
+
+    if args.npz is not None:
+        source, shard = args.npz, None
+    elif args.store is not None and (args.shard or args.latest):
+        source, shard = args.store, args.shard or latest_trajectory(args.store)
+    else:
+        parser.error("give --npz, or --store with --shard or --latest")
+
+    summary = export_trajectory(source, args.out, shard=shard, frames=args.frames, every=args.every,
+                                fps=args.fps, workers=args.workers, dpi=args.dpi, progress=_print_progress)
+    print(f"\nWrote {summary['frames']} frames ({summary['rows']} rows) to {summary['out']} "
+          f"in {summary['seconds']:.1f} s with {summary['workers']} worker(s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,23 +1,44 @@
 # ui/island_plot.py
 
-import matplotlib.pyplot as plt
+# matplotlib is imported inside the functions that draw, so importing this module (e.g. for the
+# renderer class in a headless worker) does not load the GUI stack.
+
 import numpy as np
+import time
+
+from simulation.recorder import TimeSeriesRecorder, DEFAULT_COLUMNS
+from simulation.instrumentation import instrumentation
+
+# history is a TimeSeriesRecorder (simulation/recorder.py) owned by the caller, so each run keeps its
+# own series and nothing leaks between runs (or between worker processes) through module-level lists.
+# Without one (the original call form) the points go into a module-level recorder shared by every call
+# that omits it, as the old module-level lists were; reset_default_history() starts it afresh.
+_default_history = None
+
+
+def reset_default_history():
+    global _default_history
+    _default_history = TimeSeriesRecorder()
 
-# Time series data
-time_series = []
-width_series = []
-tau_E_series = []
-lawson_series = []
-power_series = []
 
-def plot_island_growth(island, t, tau_E, lawson, fusion_power):
-    global time_series, width_series, tau_E_series, lawson_series, power_series
+def plot_island_growth(island, t, tau_E, lawson, fusion_power, history=None):
+    if history is None:
+        if _default_history is None:
+            reset_default_history()
+        history = _default_history
+    instrumentation.count("redraws")
+    with instrumentation.phase("plot_island_growth"):
+        _plot_island_growth(island, t, tau_E, lawson, fusion_power, history)
 
-    time_series.append(t)
-    width_series.append(island.w)
-    tau_E_series.append(tau_E)
-    lawson_series.append(lawson)
-    power_series.append(fusion_power)
+
+def _plot_island_growth(island, t, tau_E, lawson, fusion_power, history):
+    import matplotlib.pyplot as plt
+
+    history.append(t, island.w, tau_E, lawson, fusion_power)
+    time_series = history.column("t")
+    width_series = history.column("w")
+    tau_E_series = history.column("tau_E")
+    power_series = history.column("power")
 
     plt.clf()
     plt.suptitle("Magnetic Island & Fusion Performance", fontsize=14)
@@ -74,3 +95,187 @@ def plot_island_growth(island, t, tau_E, lawson, fusion_power):
 
     plt.tight_layout()
     plt.pause(0.1)
+
+
+# The width, τ_E, cross-section and power panels on `fig` (shared by the live renderer and the offscreen
+# exporter in UI/export.py). Returns the axes and the artists that change from frame to frame, by name.
+def build_panels(fig):
+    from matplotlib.patches import Circle
+
+    # --- 1. Width vs Time ---
+    ax_width = fig.add_subplot(2, 3, 1)
+    line_width, = ax_width.plot([], [], color="#1f77b4", linewidth=2, label="Island Width")
+    ax_width.set_title("Island Width w(t)")
+    ax_width.set_xlabel("Time (t)")
+    ax_width.set_ylabel("w(t)")
+    ax_width.grid(True)
+
+    # --- 2. Confinement Time ---
+    ax_tau = fig.add_subplot(2, 3, 2)
+    line_tau, = ax_tau.plot([], [], color="#2ca02c", linewidth=2, label="τ_E")
+    ax_tau.set_title("Confinement Time τ_E(t)")
+    ax_tau.set_xlabel("Time (t)")
+    ax_tau.set_ylabel("τ_E")
+    ax_tau.grid(True)
+
+    # --- 3. Island Cross Section ---
+    ax_cross = fig.add_subplot(2, 3, 3)
+    ax_cross.set_title("Island Cross Section")
+    ax_cross.set_xlabel("x")
+    ax_cross.set_ylabel("y")
+    ax_cross.set_aspect('equal')
+    ax_cross.grid(True)
+    circle = Circle((0, 0), radius=0, color='red', fill=False)
+    ax_cross.add_patch(circle)
+
+    # --- 4. Fusion Power Output ---
+    ax_power = fig.add_subplot(2, 3, 5)
+    line_power, = ax_power.plot([], [], color="#d62728", linewidth=2, label="Fusion Power")
+    ax_power.set_title("Fusion Power Output (arb. units)")
+    ax_power.set_xlabel("Time (t)")
+    ax_power.set_ylabel("Power")
+    ax_power.grid(True)
+
+    return {
+        "ax_width": ax_width, "line_width": line_width,
+        "ax_tau": ax_tau, "line_tau": line_tau,
+        "ax_cross": ax_cross, "circle": circle,
+        "ax_power": ax_power, "line_power": line_power,
+    }
+
+
+# Persistent live renderer: the figure and artists are created once, data is appended into a
+# TimeSeriesRecorder and only the changing artists are blitted onto a cached background. Redraws are
+# throttled to target_fps, so the cost of drawing no longer grows with the number of simulation steps.
+# By default the recorder decimates to max_points rows, so memory stays bounded for any run length;
+# pass recorder= to plot from (and keep) a full history instead.
+class IslandGrowthRenderer:
+    def __init__(self, fig=None, target_fps=20, max_points=4096, pad=0.02, recorder=None):
+        if fig is None:
+            import matplotlib.pyplot as plt
+            fig = plt.figure(figsize=(15, 8))
+        self.fig = fig
+        self.min_interval = 1.0 / target_fps if target_fps else 0.0
+        self.max_points = max_points  # lines are decimated to at most this many points on screen
+        self.pad = pad
+
+        if recorder is None:
+            recorder = TimeSeriesRecorder(DEFAULT_COLUMNS, mode="decimate", capacity=max_points)
+        self.recorder = recorder
+        self.size = 0
+        self._last = None  # latest (t, w, tau_E, lawson, power), kept even if decimation skips it
+        self._last_draw = -np.inf
+        self._background = None
+        self.redraws = 0
+
+        self._build_figure()
+
+    def _build_figure(self):
+        fig = self.fig
+        fig.clf()
+        fig.suptitle("Magnetic Island & Fusion Performance", fontsize=14)
+        for name, obj in build_panels(fig).items():
+            setattr(self, name, obj)
+
+        self._artists = (self.line_width, self.line_tau, self.circle, self.line_power)
+        for artist in self._artists:
+            artist.set_animated(True)
+
+        fig.tight_layout()
+        self._full_draw()
+
+    # Column of the recorded history with the latest point appended if decimation dropped it
+    def series(self, key):
+        values = self.recorder.column(key)
+        if self.recorder.last("t") != self._last[0]:
+            values = np.append(values, self._last[DEFAULT_COLUMNS.index(key)])
+        return values
+
+    def append(self, t, w, tau_E, lawson, fusion_power):
+        self._last = (t, w, tau_E, lawson, fusion_power)
+        self.recorder.append(*self._last)
+        self.size += 1
+
+    # Record one step and redraw if at least 1 / target_fps has passed since the last frame
+    def update(self, island, t, tau_E, lawson, fusion_power):
+        self.push(t, island.w, tau_E, lawson, fusion_power)
+
+    # Same as update but from plain values (e.g. records coming out of a SimulationWorker queue)
+    def push(self, t, w, tau_E, lawson, fusion_power):
+        self.append(t, w, tau_E, lawson, fusion_power)
+        now = time.perf_counter()
+        if now - self._last_draw >= self.min_interval:
+            self.redraw()
+            self._last_draw = now
+
+    def _set_artist_data(self):
+        stride = max(1, len(self.recorder) // self.max_points)
+        t = self.series("t")[::stride]
+        self.line_width.set_data(t, self.series("w")[::stride])
+        self.line_tau.set_data(t, self.series("tau_E")[::stride])
+        self.line_power.set_data(t, self.series("power")[::stride])
+        self.circle.set_radius(self._last[1] / 2)
+
+    # Axis limits only change (and force a full redraw) when the data leaves them; they grow with
+    # headroom so this happens a logarithmic number of times over a run
+    def _rescale_if_needed(self):
+        rescaled = False
+        t_first, t_last = self.recorder.column("t")[0], self._last[0]
+        for ax, key in ((self.ax_width, "w"), (self.ax_tau, "tau_E"), (self.ax_power, "power")):
+            x0, x1 = ax.get_xlim()
+            y0, y1 = ax.get_ylim()
+            values = self.series(key)
+            lo, hi = float(values.min()), float(values.max())
+            if t_last > x1 or not (y0 <= lo and hi <= y1):
+                span = max(hi - lo, abs(hi) * 1e-3, 1e-12)
+                ax.set_xlim(t_first, max(t_last * 2, t_last + 1e-9, x1))
+                ax.set_ylim(lo - 0.25 * span, hi + 0.25 * span)
+                rescaled = True
+
+        extent = self._last[1] / 2 + self.pad
+        current = self.ax_cross.get_xlim()[1]
+        if extent > current or extent < current / 4:
+            self.ax_cross.set_xlim(-1.5 * extent, 1.5 * extent)
+            self.ax_cross.set_ylim(-1.5 * extent, 1.5 * extent)
+            rescaled = True
+        return rescaled
+
+    def _full_draw(self):
+        instrumentation.count("full_draws")
+        canvas = self.fig.canvas
+        canvas.draw()
+        self._background = canvas.copy_from_bbox(self.fig.bbox) if canvas.supports_blit else None
+
+    def redraw(self):
+        if self.size == 0:
+            return
+        self.redraws += 1
+        instrumentation.count("redraws")
+        with instrumentation.phase("redraw"):
+            self._draw_frame()
+
+    def _draw_frame(self):
+        self._set_artist_data()
+        canvas = self.fig.canvas
+
+        if self._rescale_if_needed() or self._background is None:
+            self._full_draw()
+        else:
+            canvas.restore_region(self._background)
+
+        for artist in self._artists:
+            artist.axes.draw_artist(artist)
+        if canvas.supports_blit:
+            canvas.blit(self.fig.bbox)
+        canvas.flush_events()
+
+    # Final frame with the complete history, drawn normally so it stays after the run
+    def finish(self):
+        if self.size == 0:
+            return
+        self._set_artist_data()
+        self._rescale_if_needed()
+        for artist in self._artists:
+            artist.set_animated(False)
+        self.fig.canvas.draw_idle()
+        self.fig.canvas.flush_events()
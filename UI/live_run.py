@@ -0,0 +1,109 @@
+# ui/live_run.py
+
+# Connects a background SimulationWorker to an IslandGrowthRenderer.
+# The simulation runs on its own thread; a GUI timer drains its queue every interval_ms and hands the
+# records to the renderer, so the window stays responsive and drawing never blocks the solver.
+# With a SimulationCache, a parameter set that has been run before is replayed from the cache instantly.
+# pyplot is only imported once a run starts, so importing this module needs no display.
+
+from simulation.worker import SimulationWorker
+from simulation.recorder import TimeSeriesRecorder, DEFAULT_COLUMNS
+from simulation.cache import KEYED_OPTIONS, make_key, cacheable, cache_entry, result_from_entry
+from UI.island_plot import IslandGrowthRenderer
+
+
+class LiveRunController:
+    def __init__(self, timer_canvas, dt=0.1, steps=50, interval_ms=30, target_fps=20, on_finished=None,
+                 max_records_per_tick=50_000, cache=None, on_error=None, **run_options):
+        self.dt = dt
+        self.steps = steps
+        self.target_fps = target_fps
+        self.on_finished = on_finished  # called with the worker's result dict when a run completes
+        # called with the exception when a run fails; by default its traceback is printed. Raising from the
+        # timer callback instead would leave the GUI event loop reporting it and the controller half-stopped.
+        self.on_error = on_error
+        self.error = None  # exception of the last failed run
+        self.max_records_per_tick = max_records_per_tick
+        self.run_options = run_options
+        self.cache = cache if cacheable(**run_options) else None  # custom solvers / profiles can't be keyed
+
+        self.worker = None
+        self._cache_key = None
+        self.renderer = None
+        self.timer = timer_canvas.new_timer(interval=interval_ms)
+        self.timer.add_callback(self.poll)
+
+    def running(self):
+        return self.worker is not None and not self.worker.finished()
+
+    # Starts a run with a copy of params, cancelling any run already in progress
+    def start(self, params):
+        import matplotlib.pyplot as plt
+
+        self.cancel()
+        self.error = None
+
+        if self.renderer is None or not plt.fignum_exists(self.renderer.fig.number):
+            self.renderer = IslandGrowthRenderer(target_fps=self.target_fps)
+            plt.show(block=False)
+        else:
+            self.renderer = IslandGrowthRenderer(fig=self.renderer.fig, target_fps=self.target_fps)
+
+        if self.cache is not None:
+            options = {name: self.run_options[name] for name in KEYED_OPTIONS if name in self.run_options}
+            self._cache_key = make_key(params, self.dt, self.steps, self.run_options.get("constants"),
+                                       self.run_options.get("integrator"), **options)
+            entry = self.cache.get(self._cache_key)
+            if entry is not None:
+                self._replay(result_from_entry(entry, self._cache_key))
+                return
+
+        run_options = dict(self.run_options)
+        if self.cache is not None:
+            run_options["recorder"] = TimeSeriesRecorder()  # full trajectory, so the run can be cached
+        self.worker = SimulationWorker(params, dt=self.dt, steps=self.steps, **run_options).start()
+        self.timer.start()
+
+    def _replay(self, result):
+        recorder = result["recorder"]
+        for row in zip(*(recorder.column(name) for name in DEFAULT_COLUMNS)):
+            self.renderer.append(*row)
+        self.renderer.finish()
+        if self.on_finished is not None:
+            self.on_finished(result)
+
+    # Slider changed: only restart if something is currently running
+    def restart(self, params):
+        if self.running():
+            self.start(params)
+
+    def cancel(self):
+        if self.worker is not None:
+            self.worker.cancel()
+            self.worker = None
+        self.timer.stop()
+
+    def poll(self):
+        worker = self.worker
+        if worker is None:
+            return
+
+        for record in worker.drain(self.max_records_per_tick):
+            self.renderer.push(*record)
+
+        if worker.finished():
+            self.timer.stop()
+            self.worker = None
+            self.renderer.finish()
+            if worker.error is not None:
+                self.error = worker.error
+                if self.on_error is not None:
+                    self.on_error(worker.error)
+                else:
+                    import traceback
+                    traceback.print_exception(worker.error)
+                return
+            if self.cache is not None and not worker.result.get("cancelled"):
+                self.cache.put(self._cache_key, cache_entry(worker.result))
+            if self.on_finished is not None and not worker.result.get("cancelled"):
+                self.on_finished(worker.result)
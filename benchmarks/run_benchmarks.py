@@ -0,0 +1,286 @@
+# benchmarks/run_benchmarks.py
+
+#Reproducible timings of the simulation hot paths, with scaling over surfaces, islands, steps and batch size.
+#Results are written as JSON; compare them with a stored baseline to catch slowdowns.
+
+#Usage (from the project folder):
+#   python -m benchmarks.run_benchmarks --out bench.json
+#   python -m benchmarks.run_benchmarks --save-baseline                 (writes benchmarks/baseline.json)
+#   python -m benchmarks.run_benchmarks --baseline benchmarks/baseline.json --threshold 1.25
+#The last form exits with status 1 if any case is more than `threshold` times slower than the baseline.
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+os.environ.setdefault("MPLBACKEND", "Agg")  #rendering benchmarks never open a window
+
+from plasma.flux_surface import FluxSurface, MagneticIsland
+from plasma.plasma_state import PlasmaState, VectorPlasmaState
+from physics.mre_solver import compute_dw_dt
+from physics.mre_kernel import MREKernel, default_kernel, numba
+from physics.confinement import compute_tau_E
+from physics.fusion_output import compute_lawson_product, compute_fusion_power
+from simulation.runner import make_mre_solver, run_headless
+from simulation.sweep import build_grid, run_sweep
+from simulation.events import standard_events
+from plasma.profile import RadialProfile, PowerLawQ
+from physics.transport import TransportModel, solve_tridiagonal
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, "baseline.json")
+
+SEED = 1234
+
+
+#Surfaces at r = 1..n_surfaces with q rising linearly from 1 to 3 and an island on every
+#island_every-th surface
+def build_state(n_surfaces, island_every=10, vectorized=True):
+    rng = np.random.default_rng(SEED)
+    surfaces = []
+    for i in range(n_surfaces):
+        q = 1 + 2 * i / max(n_surfaces - 1, 1)
+        island = None
+        if i % island_every == 0:
+            island = MagneticIsland(w0=rng.uniform(0.001, 0.05), m=2, n=1, bootstrap_drive=0.2)
+        surfaces.append(FluxSurface(radius=i + 1, q=q, magnetic_island=island))
+    if vectorized:
+        return VectorPlasmaState.from_surfaces(surfaces)
+    return PlasmaState(surfaces)
+
+
+#Median / min seconds per call; each repeat loops the call enough times to run for at least min_time
+def time_call(func, repeats=5, min_time=0.05):
+    func()  #warm-up
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or number >= 1 << 20:
+            break
+        number *= 2
+
+    samples = [elapsed / number]
+    for _ in range(repeats - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        samples.append((time.perf_counter() - start) / number)
+    return {"median": statistics.median(samples), "min": min(samples), "number": number, "repeats": repeats}
+
+
+# --- benchmark cases: each yields (name, params, callable) ---
+
+def cases_evolve(quick):
+    solver = make_mre_solver()
+    sizes = (10, 1_000) if quick else (10, 100, 1_000, 10_000)
+    for n_surfaces in sizes:
+        for vectorized in (False, True):
+            state = build_state(n_surfaces, vectorized=vectorized)
+            mode = "vector" if vectorized else "object"
+            yield (f"evolve_islands/{mode}", {"surfaces": n_surfaces, "islands": len(state.get_island_data())},
+                   lambda state=state: state.evolve_islands(1e-4, solver))
+
+
+def cases_rhs(quick):
+    island = MagneticIsland(0.01, 2, 1, 0.2)
+    surface = FluxSurface(10, 2.0)
+    yield ("compute_dw_dt/scalar", {"batch": 1},
+           lambda: compute_dw_dt(island, surface, A=0.5, B=0.01, C=0.5, D=1.0, delta_scale=10))
+
+    if numba is not None:
+        numba_kernel = MREKernel(backend="numba")  #tests/test_mre_kernel.py checks it against numpy
+
+    for batch in ((1_000, 100_000) if quick else (1_000, 100_000, 1_000_000)):
+        rng = np.random.default_rng(SEED)
+        batch_island = MagneticIsland(rng.uniform(0.001, 0.5, batch), 2, 1, rng.uniform(0, 1, batch))
+        yield ("compute_dw_dt/array", {"batch": batch},
+               lambda isl=batch_island: compute_dw_dt(isl, surface, A=0.5, B=0.01, C=0.5, D=1.0, delta_scale=10))
+
+        rhs, _ = default_kernel.bind(A=0.5, B=0.01, C=0.5, D=1.0, delta_prime=0.0,
+                                     bootstrap=batch_island.bootstrap_drive)
+        yield (f"mre_kernel/{default_kernel.backend}", {"batch": batch},
+               lambda rhs=rhs, w=batch_island.w: rhs(0.0, w))
+        if numba is not None:
+            rhs, _ = numba_kernel.bind(A=0.5, B=0.01, C=0.5, D=1.0, delta_prime=0.0,
+                                       bootstrap=batch_island.bootstrap_drive)
+            yield ("mre_kernel/numba", {"batch": batch}, lambda rhs=rhs, w=batch_island.w: rhs(0.0, w))
+
+
+def cases_diagnostics(quick):
+    for n_surfaces in ((10, 1_000) if quick else (10, 1_000, 10_000)):
+        state = build_state(n_surfaces)
+        yield ("compute_tau_E", {"surfaces": n_surfaces}, lambda state=state: compute_tau_E(state))
+
+    yield ("fusion_output/scalar", {"batch": 1},
+           lambda: (compute_fusion_power(0.95), compute_lawson_product(0.95)))
+    tau = np.random.default_rng(SEED).uniform(0.01, 1.0, 100_000)
+    yield ("fusion_output/array", {"batch": tau.size},
+           lambda: (compute_fusion_power(tau), compute_lawson_product(tau)))
+
+
+def cases_rendering(quick):
+    import matplotlib.pyplot as plt
+    from UI.island_plot import plot_island_growth, IslandGrowthRenderer
+    from simulation.recorder import TimeSeriesRecorder
+
+    island = MagneticIsland(0.2, 2, 1, 0.2)
+    for history in ((10, 200) if quick else (10, 200, 1_000)):
+        fig = plt.figure(figsize=(15, 8))
+        recorder = TimeSeriesRecorder()
+        for i in range(history):
+            recorder.append(i * 0.1, 0.2, 0.98, 9.8e20, 9.8e16)
+
+        def frame(recorder=recorder):
+            plot_island_growth(island, recorder.last("t") + 0.1, 0.98, 9.8e20, 9.8e16, recorder)
+
+        yield ("plot_island_growth/frame", {"history": history}, frame)
+        plt.close(fig)
+
+    renderer = IslandGrowthRenderer(target_fps=0)  #no throttling: every push draws a frame
+    for i in range(1_000):
+        renderer.append(i * 0.1, 0.2, 0.98, 9.8e20, 9.8e16)
+
+    def blit_frame():
+        renderer.push(renderer.size * 0.1, 0.2, 0.98, 9.8e20, 9.8e16)
+
+    yield ("IslandGrowthRenderer/frame", {"history": 1_000}, blit_frame)
+
+
+def cases_end_to_end(quick):
+    for steps in ((50, 500) if quick else (50, 500, 5_000)):
+        yield ("run_headless", {"steps": steps}, lambda steps=steps: run_headless(steps=steps))
+
+    for batch in ((1_000, 100_000) if quick else (1_000, 100_000, 1_000_000)):
+        points = build_grid(bootstrap=np.linspace(0, 1, batch))
+        yield ("run_sweep", {"batch": batch, "steps": 50}, lambda points=points: run_sweep(points))
+
+    #Long sweep where most points saturate early: full stepping against saturated points leaving the batch
+    points = build_grid(D=np.linspace(0.1, 2, 100 if quick else 500), bootstrap=np.linspace(0, 1, 400))
+    for events in (None, standard_events()):
+        yield ("run_sweep", {"batch": len(points["D"]), "steps": 300, "events": events is not None},
+               lambda points=points, events=events: run_sweep(points, steps=300, events=events))
+
+
+#One implicit transport step (both profiles, island flattening, bootstrap coupling) against radial resolution,
+#and the tridiagonal solves on their own
+def cases_transport(quick):
+    for n_points in ((1_000, 10_000) if quick else (1_000, 10_000, 100_000)):
+        state = RadialProfile(PowerLawQ(), n_points=n_points, modes=((2, 1), (3, 2), (3, 1))).build_state(w0=0.2)
+        model = TransportModel().bind(state)
+        yield ("transport/advance", {"points": state.radius.size}, lambda model=model: model.advance(0.1))
+
+    rng = np.random.default_rng(SEED)
+    size = 10_000
+    lower, upper = -rng.random((2, size)), -rng.random((2, size))
+    diag, rhs = 2.5 + rng.random((2, size)), rng.random((2, size))
+    for method in ("cyclic",) if quick else ("cyclic", "thomas"):
+        yield ("solve_tridiagonal", {"method": method, "points": size, "systems": 2},
+               lambda method=method: solve_tridiagonal(lower, diag, upper, rhs, method))
+
+
+#Cold import of the headless core / GUI entry points in a fresh interpreter (includes interpreter start-up)
+def cases_startup(quick):
+    root = os.path.dirname(BENCH_DIR)
+    for module in ("simulation.runner", "simulation.parallel", "main"):
+        yield ("import", {"module": module},
+               lambda module=module: subprocess.run([sys.executable, "-c", f"import {module}"], cwd=root, check=True))
+
+
+GROUPS = {
+    "evolve": cases_evolve,
+    "rhs": cases_rhs,
+    "diagnostics": cases_diagnostics,
+    "rendering": cases_rendering,
+    "end_to_end": cases_end_to_end,
+    "transport": cases_transport,
+    "startup": cases_startup,
+}
+
+
+def case_id(name, params):
+    return name + "[" + ",".join(f"{k}={v}" for k, v in sorted(params.items())) + "]"
+
+
+def run_benchmarks(groups=None, quick=False, repeats=5, min_time=0.05, verbose=True):
+    results = {}
+    for group in groups or GROUPS:
+        for name, params, func in GROUPS[group](quick):
+            timing = time_call(func, repeats=repeats, min_time=min_time)
+            key = case_id(name, params)
+            results[key] = {"group": group, "name": name, "params": params, **timing}
+            if verbose:
+                print(f"{key:60s} {timing['median'] * 1e6:12.2f} us")
+    return {
+        "meta": {
+            "python": sys.version.split()[0],
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+
+
+#Cases present in both runs whose median time grew by more than `threshold` times
+def compare(current, baseline, threshold=1.25):
+    rows = []
+    for key, entry in current["results"].items():
+        base = baseline["results"].get(key)
+        if base is None:
+            continue
+        ratio = entry["median"] / base["median"] if base["median"] > 0 else float("inf")
+        rows.append((key, base["median"], entry["median"], ratio, ratio > threshold))
+    return rows
+
+
+def print_comparison(rows, threshold):
+    print(f"\n{'case':60s} {'baseline us':>12s} {'now us':>12s} {'ratio':>7s}")
+    for key, base, now, ratio, regressed in rows:
+        flag = "  REGRESSION" if regressed else ""
+        print(f"{key:60s} {base * 1e6:12.2f} {now * 1e6:12.2f} {ratio:7.2f}{flag}")
+    regressions = sum(1 for row in rows if row[4])
+    print(f"\n{regressions} regression(s) above {threshold:.2f}x out of {len(rows)} compared cases")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the island simulation hot paths")
+    parser.add_argument("--groups", nargs="*", choices=list(GROUPS), default=None)
+    parser.add_argument("--quick", action="store_true", help="smaller problem sizes")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.05, help="seconds per repeat")
+    parser.add_argument("--out", default=None, help="write results JSON here")
+    parser.add_argument("--baseline", default=None, help="baseline JSON to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help=f"write results to {DEFAULT_BASELINE}")
+    parser.add_argument("--threshold", type=float, default=1.25, help="slowdown ratio counted as a regression")
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(args.groups, quick=args.quick, repeats=args.repeats, min_time=args.min_time)
+
+    for path in filter(None, (args.out, DEFAULT_BASELINE if args.save_baseline else None)):
+        with open(path, "w") as fh:
+            json.dump(report, fh, indent=2)
+        print(f"Wrote {path}")
+
+    if args.baseline:
+        with open(args.baseline) as fh:
+            baseline = json.load(fh)
+        rows = compare(report, baseline, args.threshold)
+        print_comparison(rows, args.threshold)
+        if any(row[4] for row in rows):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
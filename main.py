@@ -1,109 +1,99 @@
-from plasma.flux_surface import FluxSurface, MagneticIsland
-from plasma.plasma_state import PlasmaState
-from physics.mre_solver import compute_dw_dt
-from physics.confinement import compute_tau_E
-from physics.fusion_output import compute_lawson_product, compute_fusion_power
-from UI.island_plot import plot_island_growth
-import matplotlib.pyplot as plt
-from matplotlib.widgets import Slider, Button
+# Importing this module is cheap and needs no display: matplotlib (and its widgets) are only loaded when
+# a window is actually opened, by run_simulation or build_ui. The simulation itself lives in the headless
+# core (plasma/, physics/, simulation/), which never imports matplotlib.
+
+from simulation.sweep import DEFAULT_PARAMS
+from simulation.runner import run_headless, print_final_output
+from simulation.recorder import TimeSeriesRecorder
+from simulation.instrumentation import instrumentation
+from simulation.events import standard_events
 import time
 
-#Global variables
-plasma_state = None
-target_island = None
-
-plt.rcParams.update({
+PLOT_STYLE = {
     'font.family': 'DejaVu Sans',
     'font.size': 11,
     'axes.titleweight': 'bold',
     'axes.labelweight': 'bold',
     'axes.titlesize': 14,
     'axes.labelsize': 12,
-})
-
-#Parameters that the user will change and experiment with 
-params = {
-    "bootstrap": 0.2,
-    "delta_scale": 10,
-    "D": 1.0,
-    "initial_width": 0.01
 }
 
-#Building the intial plasma for the given experiement
-def build_initial_plasma():
-    global plasma_state, target_island
-    flux_surfaces = []
-    target_island = None
-
-    for r in range(1, 11):
-        radius = r
-        q = 1 + 0.1 * r
-
-        if abs(q - 2.0) < 0.05:
-            island = MagneticIsland(
-                w0=params["initial_width"],
-                m=2,
-                n=1,
-                bootstrap_drive=params["bootstrap"]
-            )
-            target_island = island
-        else:
-            island = None
-
-        surface = FluxSurface(radius=radius, q=q, magnetic_island=island)
-        flux_surfaces.append(surface)
 
-    plasma_state = PlasmaState(flux_surfaces)
-    print(f"Initialized island with w₀ = {target_island.w}, bootstrap = {params['bootstrap']}, Δ′ scale = {params['delta_scale']}, D = {params['D']}")
+#pyplot with the plot style applied, imported on first use
+def _pyplot():
+    import matplotlib.pyplot as plt
+    plt.rcParams.update(PLOT_STYLE)
+    return plt
 
+#Parameters that the user will change and experiment with 
+params = dict(DEFAULT_PARAMS)
+
+#Each run builds a fresh plasma through simulation.runner, so no plasma state is kept at module level
+#frame_delay slows each step down for viewing (the old fixed time.sleep(0.05)); 0 runs at full speed.
+#Drawing is throttled to target_fps by the renderer whatever the step rate is.
+#profile="run" turns instrumentation on for this run, prints the phase/counter table at the end and writes
+#run.prof (cProfile) and run.folded (flame graph stacks); with ISLAND_PROFILE set only the table is printed.
+#Runs end early once the island has saturated, and steps that leave the physical width range are split
+#(simulation/events.py).
+#restart continues a checkpointed run (a simulation.checkpoint Snapshot or snapshot file) up to `steps`
+#instead of starting from the slider values; checkpoint (a CheckpointWriter) saves snapshots as it runs.
+def run_simulation(event=None, dt=0.1, steps=50, frame_delay=0.0, target_fps=20, profile=None, restart=None,
+                   checkpoint=None):
+    if profile:
+        instrumentation.enable(profile=True)
+    with instrumentation.phase("run_simulation"):
+        result = _run_simulation(dt, steps, frame_delay, target_fps, restart, checkpoint)
+
+    if instrumentation.enabled:
+        print("\n--- PROFILE ---")
+        print(instrumentation.summary())
+        if profile:
+            print("Wrote " + ", ".join(instrumentation.dump(profile)))
+            instrumentation.disable()
+    return result
+
+
+def _run_simulation(dt, steps, frame_delay, target_fps, restart=None, checkpoint=None):
+    from UI.island_plot import IslandGrowthRenderer
+
+    if restart is None:
+        print(f"Initialized island with w₀ = {params['initial_width']}, bootstrap = {params['bootstrap']}, Δ′ scale = {params['delta_scale']}, D = {params['D']}")
+    else:
+        from simulation.checkpoint import as_snapshot
+        restart = as_snapshot(restart)
+        print(f"Resuming from {restart}")
 
-def run_simulation(event=None):
-    global plasma_state, target_island
-    build_initial_plasma()
-
-    dt = 0.1
-    steps = 50
+    plt = _pyplot()
     plt.ion()
-    fig = plt.figure(figsize=(15, 8))
-
-    powers = []
-
-    for t in range(steps):
-        plasma_state.evolve_islands(
-            dt,
-            lambda isl, fs: compute_dw_dt(isl, fs, A=0.5, B=0.01, C=0.5, D=params["D"], delta_scale=params["delta_scale"])
-        )
-
-        tau_E = compute_tau_E(plasma_state)
-        lawson = compute_lawson_product(tau_E)
-        power = compute_fusion_power(tau_E)
-        powers.append(power)
-
-        plot_island_growth(target_island, t * dt, tau_E, lawson, power)
-        time.sleep(0.05)
-
+    renderer = IslandGrowthRenderer(target_fps=target_fps)
+    plt.show(block=False)
+
+    def on_step(t, island, tau_E, lawson, power):
+        with instrumentation.phase("render"):
+            renderer.update(island, t, tau_E, lawson, power)
+        if frame_delay:
+            time.sleep(frame_delay)
+
+    #Snapshot of the slider values so the run is unaffected if they move mid-run.
+    #The renderer keeps the plotted history; the run only needs a short tail for the dP/dt estimate.
+    #A restarted run keeps the snapshot's parameters rather than the current slider values
+    result = run_headless(dict(params) if restart is None else None, dt=dt, steps=steps, on_step=on_step,
+                          recorder=TimeSeriesRecorder(mode="ring", capacity=16), events=standard_events(),
+                          checkpoint=checkpoint, restart=restart)
+
+    renderer.finish()
     plt.ioff()
 
-
-    final_width = target_island.w
-    cross_section_radius = final_width / 2
-    final_power = powers[-1]
-
-    # Estimate gradient of fusion power (last 5 steps)
-    if len(powers) >= 6:
-        dP_dt = (powers[-1] - powers[-6]) / (dt * 5)
-    else:
-        dP_dt = 0
-
-    print("\n--- FINAL SIMULATION OUTPUT ---")
-    print(f"Final Island Width (w): {final_width:.5f}")
-    print(f"Island Cross-Section Radius: {cross_section_radius:.5f}")
-    print(f"Final Fusion Power Output: {final_power:.3e} (arb. units)")
-    print(f"Estimated dPower/dt: {dP_dt:.3e} (arb. units/s)")
-
+    print_final_output(result)
+    return result
 
 
 def build_ui():
+    from matplotlib.widgets import Slider, Button
+    from UI.live_run import LiveRunController
+    from simulation.cache import default_cache
+
+    plt = _pyplot()
     fig, _ = plt.subplots()
     plt.subplots_adjust(left=0.3, bottom=0.5)
     plt.axis('off')
@@ -123,17 +113,28 @@ def build_ui():
     ax_button = plt.axes([0.4, 0.1, 0.2, 0.05])
     b_run = Button(ax_button, 'Run Simulation')
 
+    #The simulation runs on a worker thread and the plots are fed from its queue by a GUI timer
+    #Repeated slider settings are replayed from the cache instead of re-running
+    controller = LiveRunController(fig.canvas, on_finished=print_final_output, cache=default_cache,
+                                   events=standard_events())
+
+    def run(event=None):
+        print(f"Initialized island with w₀ = {params['initial_width']}, bootstrap = {params['bootstrap']}, Δ′ scale = {params['delta_scale']}, D = {params['D']}")
+        controller.start(params)
+
     def update(val):
         params["initial_width"] = s_w0.val
         params["bootstrap"] = s_bootstrap.val
         params["delta_scale"] = s_delta.val
         params["D"] = s_d.val
+        #Moving a slider mid-run restarts the run with the new values
+        controller.restart(params)
 
     s_w0.on_changed(update)
     s_bootstrap.on_changed(update)
     s_delta.on_changed(update)
     s_d.on_changed(update)
-    b_run.on_clicked(run_simulation)
+    b_run.on_clicked(run)
 
     plt.show()
 
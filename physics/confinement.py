@@ -1,14 +1,109 @@
 # physics/confinement.py
 
+import numpy as np
+
+
+#Confinement time from the largest island. Only the island-bearing surfaces are visited (the state keeps
+#an index of them), so the cost is O(islands) however many surfaces the profile has.
 def compute_tau_E(plasma_state, tau_E0=1.0, alpha=1.0, a=10):
-    max_w = 0
+    widths = plasma_state.island_widths()
+    max_w = max(float(widths.max()), 0) if len(widths) else 0
+
+    return tau_E_from_width(max_w, tau_E0, alpha, a)
 
-    for surface in plasma_state.flux_surfaces:
-        if surface.has_island():
-            w = surface.magnetic_island.w
-            if w > max_w:
-                max_w = w
 
+#Same confinement law given the largest island width directly; max_w may be an array (one entry per run)
+def tau_E_from_width(max_w, tau_E0=1.0, alpha=1.0, a=10):
     # Clamp τ_E so it doesn't go below a floor value
-    tau_E = max(tau_E0 * (1 - alpha * (max_w / a)), 0.01)
-    return tau_E
+    if np.ndim(max_w) == 0:
+        return max(tau_E0 * (1 - alpha * (max_w / a)), 0.01)
+    return np.maximum(tau_E0 * (1 - alpha * (np.asarray(max_w) / a)), 0.01)
+
+
+#Chirikov parameter of every pair of radially adjacent islands (radii sorted ascending):
+#sigma = (w_i + w_i+1) / (2 |r_i+1 - r_i|); the islands overlap once sigma >= 1
+def chirikov_parameters(widths, radii):
+    gaps = np.diff(radii)
+    with np.errstate(divide="ignore"):
+        return (widths[:-1] + widths[1:]) / (2 * np.abs(gaps))
+
+
+#Radial extent of the widest chain of overlapping islands (radii sorted ascending). A chain of
+#overlapping islands is treated as one stochastic region spanning all of them; an island that
+#overlaps nothing just contributes its own width.
+def overlap_width(widths, radii, sigma=None):
+    if len(widths) == 0:
+        return 0
+    if sigma is None:
+        sigma = chirikov_parameters(widths, radii)
+    starts = np.concatenate(([0], np.flatnonzero(sigma < 1) + 1))
+    inner = np.minimum.reduceat(radii - widths / 2, starts)
+    outer = np.maximum.reduceat(radii + widths / 2, starts)
+    return max(float((outer - inner).max()), 0)
+
+
+#Ways of turning the island widths into the width that degrades confinement:
+#   max     - the largest island (compute_tau_E)
+#   sum     - the summed width of all islands, each one flattening its own slice of the profile
+#   overlap - the largest chain of Chirikov-overlapping islands (islands that don't overlap count singly)
+CONFINEMENT_MODELS = ("max", "sum", "overlap")
+
+
+#Incremental confinement diagnostics for a PlasmaState.
+#Radii never change, so their sort order and gaps are computed once; each evaluation then only reads
+#the island widths (the "max" model reads the state's running max_width and is O(1)).
+#With every=k the diagnostics are recomputed on every k-th step only and reused in between.
+class ConfinementDiagnostics:
+    def __init__(self, plasma_state, model="max", every=1, tau_E0=1.0, alpha=1.0, a=10):
+        if model not in CONFINEMENT_MODELS:
+            raise ValueError(f"Unknown confinement model '{model}', choose from {', '.join(CONFINEMENT_MODELS)}")
+        self.plasma_state = plasma_state
+        self.model = model
+        self.every = max(int(every), 1)
+        self.tau_E0 = tau_E0
+        self.alpha = alpha
+        self.a = a
+
+        radii = np.asarray(plasma_state.island_radii(), dtype=float)
+        self._order = np.argsort(radii, kind="stable")
+        self._radii = radii[self._order]
+
+        self.tau_E = None
+        self.effective_width = 0
+        self.chirikov = None       #largest Chirikov parameter (overlap model only)
+        self.overlapping = 0       #adjacent island pairs with sigma >= 1 (overlap model only)
+        self.evaluations = 0
+
+    #tau_E for this step; step=None forces an evaluation
+    def update(self, step=None):
+        if self.tau_E is not None and step is not None and step % self.every:
+            return self.tau_E
+
+        state = self.plasma_state
+        if self.model == "max":
+            width = state.max_width
+        else:
+            widths = np.asarray(state.island_widths(), dtype=float)
+            if self.model == "sum":
+                width = float(np.maximum(widths, 0).sum())
+            else:
+                widths = np.maximum(widths[self._order], 0)
+                sigma = chirikov_parameters(widths, self._radii)
+                self.chirikov = float(sigma.max()) if len(sigma) else 0.0
+                self.overlapping = int(np.count_nonzero(sigma >= 1))
+                width = overlap_width(widths, self._radii, sigma)
+
+        self.effective_width = width
+        self.tau_E = tau_E_from_width(width, self.tau_E0, self.alpha, self.a)
+        self.evaluations += 1
+        return self.tau_E
+
+    #Picks the cached values back up from as_dict() output, e.g. when a run restarts from a checkpoint
+    #(simulation/checkpoint.py); with every > 1 the cached tau_E is what the next steps return
+    def restore(self, state):
+        for key in ("tau_E", "effective_width", "chirikov", "overlapping", "evaluations"):
+            setattr(self, key, state[key])
+
+    def as_dict(self):
+        return {"model": self.model, "tau_E": self.tau_E, "effective_width": self.effective_width,
+                "chirikov": self.chirikov, "overlapping": self.overlapping, "evaluations": self.evaluations}
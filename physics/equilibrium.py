@@ -0,0 +1,136 @@
+# physics/equilibrium.py
+
+#Saturated island width straight from the MRE, without time stepping.
+#dw/dt = A*Δ' + B/w + C*bootstrap - D*w^2 = a0 + B/w - D*w^2, so the saturated width is a root of that
+#right hand side. Everything works on arrays of parameters (one entry per run).
+
+#For each run the root found is the one the island actually evolves to from its initial width:
+#if dw/dt > 0 at w0 we search upwards, if dw/dt < 0 downwards. Results are classified as
+
+#1.STABLE   - the island settles at the root (d(dw/dt)/dw < 0 there)
+#2.UNSTABLE - w0 sits exactly on a root the island would leave again
+#3.DECAY    - no root below w0: the island shrinks away (width reported as 0)
+#4.RUNAWAY  - no root above w0: the island grows without bound (width reported as inf)
+
+import numpy as np
+
+from physics.mre_kernel import default_kernel, W_FLOOR
+
+STABLE = 0
+UNSTABLE = 1
+DECAY = 2
+RUNAWAY = 3
+
+STATUS_NAMES = {STABLE: "stable", UNSTABLE: "unstable", DECAY: "decay", RUNAWAY: "runaway"}
+
+#The right hand side and its slope are the MRE kernel's (physics/mre_kernel.py), so the saturated width is
+#a root of exactly what the time-stepping runs integrate: the constant part a0 goes in as A * Δ' with A = 1
+#and no separate bootstrap term
+def _kernel_inputs(a0, B, D):
+    return {"A": 1.0, "delta_prime": a0, "B": B, "C": 0.0, "bootstrap": 0.0, "D": D}
+
+
+def mre_rhs(w, a0, B, D):
+    return default_kernel.rhs(w, **_kernel_inputs(a0, B, D))
+
+
+#d(dw/dt)/dw, zero below the width clamp
+def mre_slope(w, B, D):
+    return default_kernel.jacobian(w, **_kernel_inputs(0.0, B, D))
+
+
+#Constant part of the MRE, A*Δ' + C*bootstrap
+def mre_drive(q, m, n, bootstrap, A, C, delta_scale):
+    return A * (m / n - q) * delta_scale + C * bootstrap
+
+
+#Returns dict of arrays: width, status, stable, slope, iterations.
+#w0, a0, B, D broadcast against each other.
+def solve_saturated_width(w0, a0, B, D, w_max=1e6, rtol=1e-12, max_iter=100):
+    w0, a0, B, D = (np.array(x, dtype=float) for x in np.broadcast_arrays(w0, a0, B, D))
+    shape = w0.shape
+    w0, a0, B, D = (x.ravel() for x in (w0, a0, B, D))
+
+    f0 = mre_rhs(w0, a0, B, D)
+    growing = f0 > 0
+    shrinking = f0 < 0
+
+    #Bracket [lo, hi] with f(lo) > 0 > f(hi) on the side of w0 the island moves towards
+    lo = np.where(growing, w0, 0.0)
+    hi = np.where(shrinking, w0, 0.0)
+    bracketed = np.zeros(w0.shape, dtype=bool)
+
+    #Upwards: for D > 0, f(w) <= 0 at w^2 = (max(a0, 0) + max(B, 0) / w0) / D, which brackets in one go;
+    #otherwise keep doubling until f turns negative or w_max is passed
+    idx = np.nonzero(growing)[0]
+    w_start = np.maximum(w0[idx], W_FLOOR)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        bound = np.sqrt((np.maximum(a0[idx], 0) + np.maximum(B[idx], 0) / w_start) / D[idx])
+    probe = np.where(D[idx] > 0, np.maximum(bound, 2 * w_start), 2 * w_start)
+    while idx.size:
+        f = mre_rhs(probe, a0[idx], B[idx], D[idx])
+        found = f <= 0
+        hi[idx[found]] = probe[found]
+        lo[idx[~found]] = probe[~found]
+        bracketed[idx[found]] = True
+        keep = ~found & (probe < w_max)
+        idx, probe = idx[keep], probe[keep] * 2
+    runaway = growing & ~bracketed
+
+    #Downwards: halve until f turns positive or the width drops below the clamp
+    idx = np.nonzero(shrinking)[0]
+    probe = w0[idx] / 2
+    while idx.size:
+        f = mre_rhs(probe, a0[idx], B[idx], D[idx])
+        found = f >= 0
+        lo[idx[found]] = probe[found]
+        hi[idx[~found]] = probe[~found]
+        bracketed[idx[found]] = True
+        keep = ~found & (probe > W_FLOOR)
+        idx, probe = idx[keep], probe[keep] / 2
+    decay = shrinking & ~bracketed
+
+    #Safeguarded Newton inside the bracket (bisection whenever Newton would leave it).
+    #Newton runs on the cubic g(w) = -w * f(w) = D*w^3 - a0*w - B, which is convex for D > 0, so starting
+    #from the g > 0 end of the bracket (hi) converges monotonically in a handful of iterations.
+    #Only the still-unconverged entries are carried through each iteration.
+    w = w0.copy()
+    iterations = np.zeros(w.shape, dtype=int)
+    idx = np.nonzero((growing | shrinking) & bracketed)[0]
+    w_i, lo_i, hi_i = hi[idx], lo[idx], hi[idx]
+    a0_i, B_i, D_i = a0[idx], B[idx], D[idx]
+
+    for _ in range(max_iter):
+        if not idx.size:
+            break
+        f = mre_rhs(w_i, a0_i, B_i, D_i)
+        lo_i = np.where(f > 0, w_i, lo_i)
+        hi_i = np.where(f < 0, w_i, hi_i)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            w_newton = w_i - w_i * f / (f + w_i * mre_slope(w_i, B_i, D_i))
+        inside = (w_newton >= lo_i) & (w_newton <= hi_i)
+        w_next = np.where(inside, w_newton, 0.5 * (lo_i + hi_i))
+        w_next = np.where(f == 0, w_i, w_next)
+
+        w[idx] = w_next
+        iterations[idx] += 1
+        keep = (np.abs(w_next - w_i) > rtol * np.maximum(np.abs(w_i), W_FLOOR)) & (f != 0)
+        idx, w_i, lo_i, hi_i = idx[keep], w_next[keep], lo_i[keep], hi_i[keep]
+        a0_i, B_i, D_i = a0_i[keep], B_i[keep], D_i[keep]
+
+    slope = mre_slope(w, B, D)
+    status = np.where(slope < 0, STABLE, UNSTABLE)
+    status = np.where(decay, DECAY, status)
+    status = np.where(runaway, RUNAWAY, status)
+
+    width = np.where(decay, 0.0, w)
+    width = np.where(runaway, np.inf, width)
+
+    return {
+        "width": width.reshape(shape),
+        "status": status.reshape(shape),
+        "stable": (status == STABLE).reshape(shape),
+        "slope": slope.reshape(shape),
+        "iterations": iterations.reshape(shape),
+    }
@@ -0,0 +1,208 @@
+# physics/integrators.py
+
+#Time integrators for the modified Rutherford equation dw/dt = f(t, w).
+#w may be a single width or an array of independent island widths (VectorPlasmaState / sweeps).
+
+#Every integrator exposes advance(f, t, w, dt, jac=None) which returns w at t + dt. Adaptive ones take
+#as many internal sub-steps as their error control needs and remember the last good step size between
+#calls. Work done is counted in .stats so methods can be compared on RHS evaluations.
+
+#1.Euler       - the original fixed-step forward Euler update
+#2.RK4         - classic fixed-step 4th order Runge-Kutta
+#3.RK45        - Dormand-Prince 5(4) embedded pair with adaptive step size
+#4.Rosenbrock  - ROS2, a 2-stage L-stable linearly implicit method with adaptive step size, for the
+#                stiff B / w term at small widths
+
+import numpy as np
+
+
+class IntegratorStats:
+    def __init__(self):
+        self.steps = 0       #accepted (sub-)steps
+        self.rejected = 0    #steps thrown away by error control
+        self.rhs_evals = 0
+        self.jac_evals = 0
+
+    def as_dict(self):
+        return {
+            "steps": self.steps,
+            "rejected": self.rejected,
+            "rhs_evals": self.rhs_evals,
+            "jac_evals": self.jac_evals,
+        }
+
+    def __repr__(self):
+        return (f"IntegratorStats(steps={self.steps}, rejected={self.rejected}, "
+                f"rhs_evals={self.rhs_evals}, jac_evals={self.jac_evals})")
+
+
+class Euler:
+    name = "euler"
+
+    def __init__(self):
+        self.stats = IntegratorStats()
+
+    def advance(self, f, t, w, dt, jac=None):
+        self.stats.steps += 1
+        self.stats.rhs_evals += 1
+        return w + f(t, w) * dt
+
+
+class RK4:
+    name = "rk4"
+
+    def __init__(self):
+        self.stats = IntegratorStats()
+
+    def advance(self, f, t, w, dt, jac=None):
+        k1 = f(t, w)
+        k2 = f(t + dt / 2, w + dt / 2 * k1)
+        k3 = f(t + dt / 2, w + dt / 2 * k2)
+        k4 = f(t + dt, w + dt * k3)
+        self.stats.steps += 1
+        self.stats.rhs_evals += 4
+        return w + dt / 6 * (k1 + 2 * k2 + 2 * k3 + k4)
+
+
+#Shared step-size control for the adaptive methods
+class _Adaptive:
+    order = 1  #order of the error estimate, sets the step size exponent
+
+    def __init__(self, rtol=1e-6, atol=1e-9, h0=None, h_min=1e-12, max_steps=100_000,
+                 safety=0.9, min_factor=0.2, max_factor=5.0):
+        self.rtol = rtol
+        self.atol = atol
+        self.h = h0
+        self.h_min = h_min
+        self.max_steps = max_steps
+        self.safety = safety
+        self.min_factor = min_factor
+        self.max_factor = max_factor
+        self.stats = IntegratorStats()
+
+    #RMS of the scaled error over all islands (<= 1 means the step is accepted)
+    def _error_norm(self, err, w, w_new):
+        scale = self.atol + self.rtol * np.maximum(np.abs(w), np.abs(w_new))
+        return float(np.sqrt(np.mean(np.square(err / scale))))
+
+    def _step(self, f, t, w, h, jac):
+        raise NotImplementedError
+
+    def advance(self, f, t, w, dt, jac=None):
+        t_end = t + dt
+        h = dt if self.h is None else min(self.h, dt)
+        taken = 0
+
+        while t < t_end:
+            h = min(h, t_end - t)
+            w_new, err = self._step(f, t, w, h, jac)
+            err_norm = self._error_norm(err, w, w_new)
+
+            if err_norm <= 1.0 or h <= self.h_min:
+                t += h
+                w = w_new
+                self.stats.steps += 1
+            else:
+                self.stats.rejected += 1
+
+            if err_norm == 0.0:
+                factor = self.max_factor
+            else:
+                factor = self.safety * err_norm ** (-1.0 / (self.order + 1))
+                factor = min(self.max_factor, max(self.min_factor, factor))
+            h = max(h * factor, self.h_min)
+
+            taken += 1
+            if taken > self.max_steps:
+                raise RuntimeError(f"{self.name}: more than {self.max_steps} sub-steps in one advance")
+
+        self.h = h
+        return w
+
+
+class RK45(_Adaptive):
+    name = "rk45"
+    order = 4
+
+    #Dormand-Prince tableau
+    C = (0.0, 1 / 5, 3 / 10, 4 / 5, 8 / 9, 1.0, 1.0)
+    A = (
+        (),
+        (1 / 5,),
+        (3 / 40, 9 / 40),
+        (44 / 45, -56 / 15, 32 / 9),
+        (19372 / 6561, -25360 / 2187, 64448 / 6561, -212 / 729),
+        (9017 / 3168, -355 / 33, 46732 / 5247, 49 / 176, -5103 / 18656),
+        (35 / 384, 0.0, 500 / 1113, 125 / 192, -2187 / 6784, 11 / 84),
+    )
+    B5 = (35 / 384, 0.0, 500 / 1113, 125 / 192, -2187 / 6784, 11 / 84, 0.0)
+    B4 = (5179 / 57600, 0.0, 7571 / 16695, 393 / 640, -92097 / 339200, 187 / 2100, 1 / 40)
+
+    def _step(self, f, t, w, h, jac):
+        k = []
+        for c, a in zip(self.C, self.A):
+            w_stage = w
+            for a_ij, k_j in zip(a, k):
+                if a_ij:
+                    w_stage = w_stage + h * a_ij * k_j
+            k.append(f(t + c * h, w_stage))
+        self.stats.rhs_evals += len(k)
+
+        w5 = w + h * sum(b * k_i for b, k_i in zip(self.B5, k) if b)
+        err = h * sum((b5 - b4) * k_i for b5, b4, k_i in zip(self.B5, self.B4, k))
+        return w5, err
+
+
+class Rosenbrock(_Adaptive):
+    name = "rosenbrock"
+    order = 1  #the embedded estimate is first order
+
+    GAMMA = 1 + 1 / np.sqrt(2)
+
+    #The embedded estimate is only first order, so the defaults are looser than RK45's
+    def __init__(self, rtol=1e-4, atol=1e-7, **options):
+        super().__init__(rtol=rtol, atol=atol, **options)
+
+    #Islands are independent, so the Jacobian is diagonal: jac(t, w) returns d(dw/dt)/dw per island.
+    #Without an analytic jac it is estimated with one forward difference.
+    def _jacobian(self, f, t, w, f0, jac):
+        self.stats.jac_evals += 1
+        if jac is not None:
+            return jac(t, w)
+        eps = 1e-7 * np.maximum(np.abs(w), 1e-5)
+        self.stats.rhs_evals += 1
+        return (f(t, w + eps) - f0) / eps
+
+    def _step(self, f, t, w, h, jac):
+        f0 = f(t, w)
+        self.stats.rhs_evals += 1
+        J = self._jacobian(f, t, w, f0, jac)
+        inv = 1.0 / (1.0 - self.GAMMA * h * J)
+
+        k1 = inv * f0
+        k2 = inv * (f(t + h, w + h * k1) - 2 * k1)
+        self.stats.rhs_evals += 1
+
+        w_new = w + 1.5 * h * k1 + 0.5 * h * k2
+        err = 0.5 * h * (k1 + k2)  #difference to the linearly implicit Euler solution w + h * k1
+        return w_new, err
+
+
+INTEGRATORS = {
+    "euler": Euler,
+    "rk4": RK4,
+    "rk45": RK45,
+    "rosenbrock": Rosenbrock,
+}
+
+
+#Returns an integrator instance: a name from INTEGRATORS (options go to its constructor) or an instance
+def make_integrator(integrator="euler", **options):
+    if integrator is None:
+        integrator = "euler"
+    if isinstance(integrator, str):
+        try:
+            return INTEGRATORS[integrator](**options)
+        except KeyError:
+            raise ValueError(f"Unknown integrator '{integrator}', choose from {', '.join(INTEGRATORS)}") from None
+    return integrator
@@ -0,0 +1,291 @@
+# physics/mre_kernel.py
+
+#Batch right hand side of the MRE built from a registry of terms and fused into one kernel.
+#compute_dw_dt (mre_solver.py) is convenient but every call goes through a closure and attribute lookups
+#on island / flux_surface objects. An MREKernel takes plain arrays instead and evaluates the sum of its
+#terms in a single generated function:
+#   numpy backend - one fused array expression (always available, the default)
+#   numba backend - one parallel loop over the islands, every term inlined (opt in with backend="numba";
+#                   compare_backends checks it against the numpy kernel)
+
+#A term is a plain arithmetic function whose first argument is the island width w; its other argument
+#names become named inputs of the kernel (scalars or per-island arrays). Terms sharing a name share the
+#input, so e.g. a new term using `bootstrap` reads the same array as the built-in bootstrap term.
+
+#   register_term("eccd", lambda w, K_cd, w_cd: -K_cd * w / (w * w + w_cd * w_cd))
+#   kernel = MREKernel(DEFAULT_TERMS + ("eccd",))
+#   dw_dt = kernel.rhs(w, A=0.5, delta_prime=dp, B=0.01, C=0.5, bootstrap=0.2, D=1.0, K_cd=0.1, w_cd=0.02)
+
+import inspect
+
+import numpy as np
+
+try:
+    import numba
+except ImportError:  #numba is optional; the numpy backend needs nothing extra
+    numba = None
+
+W_FLOOR = 1e-5  #same width clamp as compute_dw_dt
+
+BACKENDS = ("numpy", "numba")
+
+#name -> (rhs function, d/dw function or None, input names)
+TERMS = {}
+
+#Compiled kernels keyed by (terms, backend), shared between MREKernel instances
+_compiled = {}
+
+
+def register_term(name, func, jacobian=None, replace=False):
+    if name in TERMS and not replace:
+        raise ValueError(f"MRE term '{name}' is already registered (pass replace=True to override it)")
+    args = list(inspect.signature(func).parameters)
+    if not args or args[0] != "w":
+        raise ValueError(f"MRE term '{name}' must take the island width `w` as its first argument")
+    if jacobian is not None and list(inspect.signature(jacobian).parameters) != args:
+        raise ValueError(f"The jacobian of MRE term '{name}' must take the same arguments as the term")
+    TERMS[name] = (func, jacobian, tuple(args[1:]))
+    _compiled.clear()
+
+
+# --- built-in terms: together they are exactly compute_dw_dt ---
+
+def delta_prime_term(w, A, delta_prime):
+    return A * delta_prime
+
+
+def polarisation_term(w, B):
+    return B / w
+
+
+def polarisation_jacobian(w, B):
+    return -B / (w * w)
+
+
+def bootstrap_term(w, C, bootstrap):
+    return C * bootstrap
+
+
+def saturation_term(w, D):
+    return -(D * w**2)
+
+
+def saturation_jacobian(w, D):
+    return -2.0 * D * w
+
+
+#Extra physics that can be switched on by adding the name to a kernel's terms
+#ECCD stabilisation: ~ -K_cd / w for wide islands, falling off below the deposition width w_cd
+def eccd_term(w, K_cd, w_cd):
+    return -K_cd * w / (w * w + w_cd * w_cd)
+
+
+def eccd_jacobian(w, K_cd, w_cd):
+    return -K_cd * (w_cd * w_cd - w * w) / ((w * w + w_cd * w_cd) * (w * w + w_cd * w_cd))
+
+
+#Glasser-Greene-Johnson curvature stabilisation, smoothed below the layer width w_d
+def ggj_term(w, K_ggj, w_d):
+    return -K_ggj / (w * w + 0.2 * w_d * w_d) ** 0.5
+
+
+def ggj_jacobian(w, K_ggj, w_d):
+    return K_ggj * w / (w * w + 0.2 * w_d * w_d) ** 1.5
+
+
+register_term("delta_prime", delta_prime_term, lambda w, A, delta_prime: 0.0 * w)
+register_term("polarisation", polarisation_term, polarisation_jacobian)
+register_term("bootstrap", bootstrap_term, lambda w, C, bootstrap: 0.0 * w)
+register_term("saturation", saturation_term, saturation_jacobian)
+register_term("eccd", eccd_term, eccd_jacobian)
+register_term("ggj", ggj_term, ggj_jacobian)
+
+#Order matches the sum in compute_dw_dt, so the numpy kernel reproduces it bit for bit
+DEFAULT_TERMS = ("delta_prime", "polarisation", "bootstrap", "saturation")
+
+
+#Δ′ of a (m, n) island on a surface of safety factor q, as in compute_dw_dt
+def delta_prime(q, m, n, delta_scale=10):
+    return (np.divide(m, n) - q) * delta_scale
+
+
+# --- code generation ---
+
+def _calls(terms, inputs, width, index="", jacobian=False):
+    calls = []
+    for k, name in enumerate(terms):
+        func, jac, args = TERMS[name]
+        call_args = ", ".join([width] + [f"{arg}{index}" for arg in args])
+        if not jacobian:
+            calls.append(f"_t{k}({call_args})")
+        elif jac is not None:
+            calls.append(f"_j{k}({call_args})")
+        else:
+            #central difference for terms registered without a jacobian
+            hi = ", ".join([f"{width} * (1 + 1e-6)"] + [f"{arg}{index}" for arg in args])
+            lo = ", ".join([f"{width} * (1 - 1e-6)"] + [f"{arg}{index}" for arg in args])
+            calls.append(f"(_t{k}({hi}) - _t{k}({lo})) / (2e-6 * {width})")
+    return " + ".join(calls) if calls else f"0.0 * {width}"
+
+
+def _build(terms, backend):
+    key = (terms, backend)
+    if key in _compiled:
+        return _compiled[key]
+
+    inputs = []
+    for name in terms:
+        inputs.extend(arg for arg in TERMS[name][2] if arg not in inputs)
+    signature = ", ".join(["w"] + inputs)
+
+    namespace = {"np": np, "W_FLOOR": W_FLOOR}
+    wrap = (lambda f: f) if backend == "numpy" else numba.njit(inline="always")
+    for k, name in enumerate(terms):
+        func, jac, _ = TERMS[name]
+        namespace[f"_t{k}"] = wrap(func)
+        if jac is not None:
+            namespace[f"_j{k}"] = wrap(jac)
+
+    if backend == "numpy":
+        source = (
+            f"def rhs({signature}):\n"
+            f"    w = np.maximum(w, W_FLOOR)\n"
+            f"    return {_calls(terms, inputs, 'w')}\n"
+            f"\n"
+            f"def jac({signature}):\n"
+            f"    wc = np.maximum(w, W_FLOOR)\n"
+            f"    return np.where(w < W_FLOOR, 0.0, {_calls(terms, inputs, 'wc', jacobian=True)})\n"
+        )
+    else:
+        namespace["prange"] = numba.prange
+        source = (
+            f"def rhs({signature}, out):\n"
+            f"    for i in prange(w.shape[0]):\n"
+            f"        wi = max(w[i], W_FLOOR)\n"
+            f"        out[i] = {_calls(terms, inputs, 'wi', '[i]')}\n"
+            f"    return out\n"
+            f"\n"
+            f"def jac({signature}, out):\n"
+            f"    for i in prange(w.shape[0]):\n"
+            f"        wi = w[i]\n"
+            f"        out[i] = 0.0 if wi < W_FLOOR else {_calls(terms, inputs, 'wi', '[i]', jacobian=True)}\n"
+            f"    return out\n"
+        )
+
+    exec(compile(source, f"<mre kernel {'+'.join(terms)}>", "exec"), namespace)
+    rhs, jac = namespace["rhs"], namespace["jac"]
+    if backend == "numba":
+        #no fastmath: the numba kernel keeps IEEE semantics so it agrees with the numpy one
+        rhs = numba.njit(parallel=True)(rhs)
+        jac = numba.njit(parallel=True)(jac)
+
+    _compiled[key] = (rhs, jac, tuple(inputs))
+    return _compiled[key]
+
+
+class MREKernel:
+    #terms: names from TERMS, summed in this order. backend: "numpy", "numba" or "auto" (= numpy; numba is
+    #only used when asked for, so results never change with what happens to be installed)
+    def __init__(self, terms=DEFAULT_TERMS, backend="auto"):
+        unknown = [name for name in terms if name not in TERMS]
+        if unknown:
+            raise ValueError(f"Unknown MRE term(s): {', '.join(unknown)}; registered: {', '.join(TERMS)}")
+        if backend == "auto":
+            backend = "numpy"
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown kernel backend '{backend}', choose from {', '.join(BACKENDS)}")
+        if backend == "numba" and numba is None:
+            raise ImportError("The numba backend needs numba installed (pip install numba)")
+
+        self.terms = tuple(terms)
+        self.backend = backend
+        self._rhs, self._jac, self.inputs = _build(self.terms, backend)
+
+    #Rebuilt from its term names when sent to a worker process (compiled functions do not pickle)
+    def __reduce__(self):
+        return (MREKernel, (self.terms, self.backend))
+
+    def _arguments(self, w, inputs):
+        missing = [name for name in self.inputs if name not in inputs]
+        if missing:
+            raise TypeError(f"MRE kernel inputs missing: {', '.join(missing)}")
+        if self.backend == "numpy":
+            return (w,) + tuple(inputs[name] for name in self.inputs)
+        values = [np.asarray(w, dtype=np.float64)] + [np.asarray(inputs[name], dtype=np.float64)
+                                                      for name in self.inputs]
+        shape = np.broadcast_shapes(*(np.shape(value) for value in values))
+        return tuple(np.broadcast_to(value, shape or (1,)).reshape(-1) for value in values)
+
+    def _call(self, func, w, out, inputs):
+        args = self._arguments(w, inputs)
+        if self.backend == "numpy":
+            value = func(*args)
+            if out is None:
+                return value
+            out[...] = value
+            return out
+        shape = np.broadcast_shapes(np.shape(w), *(np.shape(inputs[name]) for name in self.inputs))
+        if out is not None and out.flags.c_contiguous and out.size == args[0].size:
+            func(*args, out.reshape(-1))  #written in place
+            return out
+        result = func(*args, np.empty(args[0].shape)).reshape(shape)
+        if out is not None:
+            out[...] = result
+            return out
+        return float(result) if not shape else result
+
+    #dw/dt for every island; inputs are scalars or arrays broadcastable to w
+    def rhs(self, w, out=None, **inputs):
+        return self._call(self._rhs, w, out, inputs)
+
+    #d(dw/dt)/dw, zero below the width clamp where the clamped rhs is flat
+    def jacobian(self, w, out=None, **inputs):
+        return self._call(self._jac, w, out, inputs)
+
+    #f(t, w) and jac(t, w) with the inputs fixed, in the form physics/integrators.py expects
+    def bind(self, **inputs):
+        def rhs(t, w):
+            return self.rhs(w, **inputs)
+
+        def jac(t, w):
+            return self.jacobian(w, **inputs)
+
+        return rhs, jac
+
+    #Drop-in replacements for the compute_dw_dt closures taking (island, flux_surface); Δ′ is built
+    #from the island's m, n and the surface's q, other inputs (A, B, C, D, ...) are fixed here
+    def mre_solver(self, delta_scale=10, **inputs):
+        def solver(island, flux_surface):
+            dp = delta_prime(flux_surface.q, island.m, island.n, delta_scale)
+            return self.rhs(island.w, delta_prime=dp, bootstrap=island.bootstrap_drive, **inputs)
+        return solver
+
+    def mre_jacobian(self, delta_scale=10, **inputs):
+        def jacobian(island, flux_surface):
+            dp = delta_prime(flux_surface.q, island.m, island.n, delta_scale)
+            return self.jacobian(island.w, delta_prime=dp, bootstrap=island.bootstrap_drive, **inputs)
+        return jacobian
+
+    def __repr__(self):
+        return f"MREKernel(terms={list(self.terms)}, backend={self.backend!r})"
+
+
+#Largest relative difference between the numba and numpy kernels of `terms` (rhs and jacobian) on random
+#widths and inputs, including widths below the clamp. Run it after changing a term or upgrading numba.
+def compare_backends(terms=DEFAULT_TERMS, batch=10_000, seed=0):
+    numpy_kernel = MREKernel(terms, backend="numpy")
+    numba_kernel = MREKernel(terms, backend="numba")
+    rng = np.random.default_rng(seed)
+    w = np.concatenate((rng.uniform(0.0, 2 * W_FLOOR, batch // 10), rng.uniform(1e-3, 1.0, batch)))
+    inputs = {name: rng.uniform(-1.0, 1.0, w.size) for name in numpy_kernel.inputs}
+    worst = 0.0
+    for method in ("rhs", "jacobian"):
+        expected = getattr(numpy_kernel, method)(w, **inputs)
+        actual = getattr(numba_kernel, method)(w, **inputs)
+        scale = np.maximum(np.abs(expected), 1e-300)
+        worst = max(worst, float(np.max(np.abs(actual - expected) / scale)))
+    return worst
+
+
+#Kernel of the standard model (numpy backend)
+default_kernel = MREKernel()
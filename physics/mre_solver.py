@@ -1,5 +1,10 @@
 # physics/mre_solver.py
 
+import numpy as np
+
+
+#Works for a single island or for a whole batch: when island.w, flux_surface.q etc. are numpy arrays
+#every term is evaluated elementwise, so the same function drives the vectorised PlasmaState
 def compute_dw_dt(island, flux_surface, A, B, C, D, delta_scale=10):
     w = island.w
     q = flux_surface.q
@@ -9,7 +14,24 @@ def compute_dw_dt(island, flux_surface, A, B, C, D, delta_scale=10):
 
     delta_prime = (m/n - q) * delta_scale
 
-    if w < 1e-5:
-        w = 1e-5
+    #Clamp tiny widths so the B / w polarisation term stays finite
+    if np.ndim(w) == 0:
+        if w < 1e-5:
+            w = 1e-5
+    else:
+        w = np.maximum(w, 1e-5)
 
     return A * delta_prime + B / w + C * bootstrap - D * w**2
+
+
+#d(dw/dt)/dw of the same model, used by the implicit (Rosenbrock) integrator
+def compute_dw_dt_jacobian(island, flux_surface, A, B, C, D, delta_scale=10):
+    w = island.w
+
+    #Below the clamp compute_dw_dt is constant in w, so the whole derivative is zero there
+    w_clamped = np.maximum(w, 1e-5)
+    jacobian = np.where(np.asarray(w) < 1e-5, 0.0, -B / w_clamped**2 - 2 * D * w_clamped)
+    if np.ndim(jacobian) == 0:
+        jacobian = float(jacobian)
+
+    return jacobian
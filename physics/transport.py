@@ -0,0 +1,316 @@
+# physics/transport.py
+
+#Radially resolved temperature / density transport with island flattening.
+#T(r, t) and n(r, t) live on the PlasmaState's radial grid and evolve by cylindrical diffusion with sources,
+#   dT/dt = (1/r) d/dr (r chi dT/dr) + S_T(r)        dn/dt = (1/r) d/dr (r D dn/dr) + S_n(r)
+#with zero flux through the innermost surface and fixed edge values on the outermost one. Across every
+#island the diffusivity is raised by `flattening`, which flattens both profiles over the island width (how
+#islands degrade confinement). Islands narrower than a grid cell still count: each cell face uses the
+#harmonic mean of the diffusivity over the fraction of its interval that islands cover.
+
+#The sources are chosen so the initial parabolic profiles are the steady state without islands; islands
+#then erode them. Each step is backward Euler, i.e. one tridiagonal system per field, and both fields are
+#solved in one batched call to solve_tridiagonal, so a step costs O(N) in the number of radial points.
+
+#What the run gets back:
+#   tau_E - tau_E0 * W / W_ref, the stored energy <n T> relative to the island-free equilibrium (the heating
+#           is fixed), clamped at the same 0.01 floor as tau_E_from_width
+#   power - scaling * <n^2 (T / T_ref)^2>, the fusion power integrated over the profile (<sigma v> ~ T^2
+#           around 10 keV). Uniform n = 1e20, T = 10 gives compute_fusion_power's value at tau_E = 1.
+#   drive - every island's bootstrap drive is scaled by the pressure gradient just outside it, relative to
+#           the same gradient in the equilibrium profile (the bootstrap current follows dp/dr)
+#<...> are volume averages over the cylinder (weights r dr).
+
+#   run_headless(params, profile=get_profile(PowerLawQ(), n_points=10_000), transport=TransportModel())
+
+import numpy as np
+
+from physics.fusion_output import compute_lawson_product
+
+SOLVERS = ("auto", "cyclic", "thomas", "scipy")
+
+_solve_banded = None
+
+
+#scipy.linalg.solve_banded if scipy is installed (imported on first use: scipy is slow to import), else None
+def _scipy_solver():
+    global _solve_banded
+    if _solve_banded is None:
+        try:
+            from scipy.linalg import solve_banded
+        except ImportError:  #scipy is optional; cyclic reduction needs only numpy
+            solve_banded = False
+        _solve_banded = solve_banded
+    return _solve_banded or None
+
+
+# --- tridiagonal solvers ---
+#All take the sub-diagonal `lower` (lower[..., 0] unused), the diagonal, the super-diagonal `upper`
+#(upper[..., -1] unused) and the right hand side, each shaped (..., N): leading axes are independent systems.
+
+#Thomas algorithm: the textbook O(N) elimination, one Python-level step per row (vectorised over systems)
+def thomas(lower, diag, upper, rhs):
+    lower, diag, upper, rhs = np.broadcast_arrays(lower, diag, upper, rhs)
+    N = diag.shape[-1]
+    c = np.empty(diag.shape)
+    d = np.empty(diag.shape)
+    c[..., 0] = upper[..., 0] / diag[..., 0]
+    d[..., 0] = rhs[..., 0] / diag[..., 0]
+    for i in range(1, N):
+        denom = diag[..., i] - lower[..., i] * c[..., i - 1]
+        c[..., i] = upper[..., i] / denom
+        d[..., i] = (rhs[..., i] - lower[..., i] * d[..., i - 1]) / denom
+    x = d
+    for i in range(N - 2, -1, -1):
+        x[..., i] -= c[..., i] * x[..., i + 1]
+    return x
+
+
+#Cyclic reduction: every level eliminates the even rows from the odd ones, halving the system, then the
+#levels are unwound. Same O(N) work as Thomas but in log2(N) whole-array steps, so it runs at numpy speed.
+#Stable for the diagonally dominant systems diffusion produces.
+def cyclic_reduction(lower, diag, upper, rhs):
+    lower, diag, upper, rhs = (np.array(x, dtype=float) for x in np.broadcast_arrays(lower, diag, upper, rhs))
+    lower[..., 0] = 0
+    upper[..., -1] = 0
+    a, b, c, d = lower, diag, upper, rhs
+
+    levels = []
+    while b.shape[-1] > 1:
+        levels.append((a, b, c, d))
+        k = b.shape[-1] // 2         #odd rows, which form the next level
+        kr = (b.shape[-1] - 1) // 2  #those with a right neighbour (the last odd row may have none)
+        alpha = -a[..., 1::2] / b[..., 0:2 * k:2]
+        a_new = alpha * a[..., 0:2 * k:2]
+        b_new = b[..., 1::2] + alpha * c[..., 0:2 * k:2]
+        c_new = np.zeros(b_new.shape)
+        d_new = d[..., 1::2] + alpha * d[..., 0:2 * k:2]
+        if kr:
+            gamma = -c[..., 1:2 * kr:2] / b[..., 2::2]
+            b_new[..., :kr] += gamma * a[..., 2::2]
+            c_new[..., :kr] = gamma * c[..., 2::2]
+            d_new[..., :kr] += gamma * d[..., 2::2]
+        a, b, c, d = a_new, b_new, c_new, d_new
+
+    x = d / b
+    for a, b, c, d in reversed(levels):
+        m = b.shape[-1]
+        zero = np.zeros(x.shape[:-1] + (1,))
+        left = np.concatenate((zero, x), axis=-1)[..., :(m + 1) // 2]
+        right = x if m % 2 == 0 else np.concatenate((x, zero), axis=-1)
+        full = np.empty(b.shape)
+        full[..., 1::2] = x
+        full[..., 0::2] = (d[..., 0::2] - a[..., 0::2] * left - c[..., 0::2] * right) / b[..., 0::2]
+        x = full
+    return x
+
+
+#LAPACK banded solve, one call per system
+def _scipy_tridiagonal(lower, diag, upper, rhs):
+    solve_banded = _scipy_solver()
+    lower, diag, upper, rhs = np.broadcast_arrays(lower, diag, upper, rhs)
+    x = np.empty(diag.shape)
+    for index in np.ndindex(diag.shape[:-1]):
+        bands = np.zeros((3, diag.shape[-1]))
+        bands[0, 1:] = upper[index][:-1]
+        bands[1] = diag[index]
+        bands[2, :-1] = lower[index][1:]
+        x[index] = solve_banded((1, 1), bands, rhs[index], check_finite=False)
+    return x
+
+
+#Solves tridiagonal systems; method "auto" uses scipy when it is installed and cyclic reduction otherwise
+def solve_tridiagonal(lower, diag, upper, rhs, method="auto"):
+    if method not in SOLVERS:
+        raise ValueError(f"Unknown tridiagonal solver '{method}', choose from {', '.join(SOLVERS)}")
+    if method == "auto":
+        method = "scipy" if _scipy_solver() is not None else "cyclic"
+    if method == "scipy":
+        if _scipy_solver() is None:
+            raise ValueError("The 'scipy' tridiagonal solver needs scipy installed")
+        return _scipy_tridiagonal(lower, diag, upper, rhs)
+    if method == "thomas":
+        return thomas(lower, diag, upper, rhs)
+    return cyclic_reduction(lower, diag, upper, rhs)
+
+
+# --- island coverage ---
+
+#Island length below every node x at once, sum_k clip(x - lo_k, 0, hi_k - lo_k) for islands [lo_k, hi_k],
+#from sorted breakpoints and cumulative sums in O((N + K) log K); differences between neighbouring nodes give
+#the covered length of each interval. Overlapping islands are counted twice; callers clip the fraction to 1.
+def _covered_below(x, lo, hi):
+    lo, hi = np.sort(lo), np.sort(hi)
+    sum_lo = np.concatenate(([0.0], np.cumsum(lo)))
+    sum_hi = np.concatenate(([0.0], np.cumsum(hi)))
+    k_lo = np.searchsorted(lo, x)
+    k_hi = np.searchsorted(hi, x)
+    return (k_lo * x - sum_lo[k_lo]) - (k_hi * x - sum_hi[k_hi])
+
+
+class TransportModel:
+    #chi / diffusivity: heat and particle diffusivities (radius^2 per time unit of the run)
+    #T_peak, T_edge (keV) and n_peak, n_edge (m^-3): the initial parabolic profiles, also the equilibrium
+    #flattening: diffusivity multiplier inside islands
+    #probe: radial distance over which the pressure gradient outside each island is measured
+    #couple_bootstrap=False leaves the island drives alone (profiles follow the islands, not the reverse)
+    #solver: see solve_tridiagonal
+    def __init__(self, chi=5.0, diffusivity=2.0, T_peak=15.0, T_edge=0.5, n_peak=1.2e20, n_edge=0.3e20,
+                 flattening=1e3, probe=0.1, tau_E0=1.0, tau_floor=0.01, T_ref=10.0, scaling=1e-23,
+                 couple_bootstrap=True, solver="auto"):
+        self.diffusivities = np.array([[chi], [diffusivity]], dtype=float)
+        self.T_peak = T_peak
+        self.T_edge = T_edge
+        self.n_peak = n_peak
+        self.n_edge = n_edge
+        self.flattening = flattening
+        self.probe = probe
+        self.tau_E0 = tau_E0
+        self.tau_floor = tau_floor
+        self.T_ref = T_ref
+        self.scaling = scaling
+        self.couple_bootstrap = couple_bootstrap
+        self.solver = solver
+        self.plasma_state = None
+
+    #Attaches the model to a plasma and sets up the grid, equilibrium and sources. T, n and base_drive
+    #continue a checkpointed run (simulation/checkpoint.py) instead of starting from the equilibrium.
+    def bind(self, plasma_state, T=None, n=None, base_drive=None):
+        if hasattr(plasma_state, "radius"):
+            radius = np.asarray(plasma_state.radius, dtype=float)
+            #the drives are rescaled in place every step, so the state must own a writable copy
+            plasma_state.bootstrap_drive = np.array(plasma_state.bootstrap_drive, dtype=float)
+            self._islands = None
+        else:
+            radius = np.array([fs.radius for fs in plasma_state.flux_surfaces], dtype=float)
+            self._islands = [fs.magnetic_island for fs in plasma_state.flux_surfaces if fs.has_island()]
+        if len(radius) < 3 or np.any(np.diff(radius) <= 0):
+            raise ValueError("Transport needs at least 3 surfaces with strictly increasing radii")
+        self.plasma_state = plasma_state
+        self.radius = radius
+        self.island_radii = np.asarray(plasma_state.island_radii(), dtype=float)
+
+        #Finite volumes: node i owns [face i-1, face i] (the innermost from the first radius); the last node
+        #holds the fixed edge values
+        faces = (radius[:-1] + radius[1:]) / 2
+        self._gap = np.diff(radius)
+        self._face_area = faces  #circumference / 2 pi
+        bounds = np.concatenate(([radius[0]], faces, [radius[-1]]))
+        self.volume = (bounds[1:] ** 2 - bounds[:-1] ** 2) / 2
+        self._weights = self.volume / self.volume.sum()
+
+        rho = (radius - radius[0]) / (radius[-1] - radius[0])
+        self.equilibrium = np.array([self.T_edge + (self.T_peak - self.T_edge) * (1 - rho ** 2),
+                                     self.n_edge + (self.n_peak - self.n_edge) * (1 - rho ** 2)])
+        coefficients = self._face_coefficients(np.zeros(len(radius) - 1))
+        self.sources = -self._apply_operator(coefficients, self.equilibrium)
+        self.sources[:, -1] = 0
+
+        self.fields = self.equilibrium.copy()
+        if T is not None:
+            self.fields[0] = T
+        if n is not None:
+            self.fields[1] = n
+        if base_drive is None:
+            base_drive = (plasma_state.bootstrap_drive if self._islands is None else
+                          [island.bootstrap_drive for island in self._islands])
+        self.base_drive = np.array(base_drive, dtype=float)
+
+        self._W_ref = self._average(self.equilibrium[0] * self.equilibrium[1])
+        self._p_ref = self.equilibrium[0] * self.equilibrium[1]
+        self.drive_scale = np.ones(len(self.island_radii))
+        self._update_outputs(np.asarray(plasma_state.island_widths(), dtype=float))
+        return self
+
+    @property
+    def T(self):
+        return self.fields[0]
+
+    @property
+    def n(self):
+        return self.fields[1]
+
+    def _average(self, values):
+        return float(np.dot(self._weights, values))
+
+    #r_face * D_face / gap for both fields; covered is the fraction of each interval inside an island
+    def _face_coefficients(self, covered):
+        #harmonic mean of D and D * flattening over the interval
+        resistance = 1 - covered + covered / self.flattening
+        return self.diffusivities * (self._face_area / (self._gap * resistance))
+
+    #(1/r) d/dr (r D dx/dr) per unit volume, as the finite-volume flux balance of every node
+    def _apply_operator(self, coefficients, x):
+        flux = coefficients * np.diff(x, axis=-1)
+        balance = np.zeros(x.shape)
+        balance[:, :-1] += flux
+        balance[:, 1:] -= flux
+        return balance / self.volume
+
+    #Fraction of each grid interval covered by the islands of the given widths
+    def covered_fraction(self, widths):
+        half = np.maximum(widths, 0) / 2
+        if not np.any(half):
+            return np.zeros(len(self._gap))
+        below = _covered_below(self.radius, self.island_radii - half, self.island_radii + half)
+        return np.minimum(np.diff(below) / self._gap, 1.0)
+
+    #One implicit step of length dt with the islands at their current widths, then the outputs and (if
+    #coupled) the island drives are updated
+    def advance(self, dt):
+        widths = np.asarray(self.plasma_state.island_widths(), dtype=float)
+        coupling = dt * self._face_coefficients(self.covered_fraction(widths))  #(2, N - 1)
+
+        lower = np.zeros(self.fields.shape)
+        upper = np.zeros(self.fields.shape)
+        lower[:, 1:-1] = -coupling[:, :-1] / self.volume[1:-1]
+        upper[:, :-1] = -coupling / self.volume[:-1]
+        diag = 1 - lower - upper
+        upper[:, -1] = lower[:, -1] = 0
+        diag[:, -1] = 1
+
+        rhs = self.fields + dt * self.sources
+        rhs[:, -1] = self.equilibrium[:, -1]
+        self.fields = solve_tridiagonal(lower, diag, upper, rhs, self.solver)
+        self._update_outputs(widths)
+
+    def _update_outputs(self, widths):
+        T, n = self.fields
+        self.stored_energy = self._average(n * T)
+        self.tau_E = max(self.tau_E0 * self.stored_energy / self._W_ref, self.tau_floor)
+        self.power = self.scaling * self._average((n * (T / self.T_ref)) ** 2)
+        self.lawson = compute_lawson_product(self.tau_E, n=self._average(n), T=self._average(T))
+        if self.couple_bootstrap and len(widths):
+            self._couple(widths)
+
+    #Bootstrap drive ~ the pressure gradient just outside each island (mean of both sides), relative to the
+    #equilibrium gradient at the same places
+    def _couple(self, widths):
+        half = np.maximum(widths, 0) / 2
+        probes = np.concatenate([self.island_radii - half - self.probe, self.island_radii - half,
+                                 self.island_radii + half, self.island_radii + half + self.probe])
+        p = np.interp(probes, self.radius, self.fields[0] * self.fields[1]).reshape(4, -1)
+        p_ref = np.interp(probes, self.radius, self._p_ref).reshape(4, -1)
+        drop = (p[0] - p[1]) + (p[2] - p[3])
+        drop_ref = (p_ref[0] - p_ref[1]) + (p_ref[2] - p_ref[3])
+        scale = np.where(drop_ref > 0, np.maximum(drop, 0) / np.where(drop_ref > 0, drop_ref, 1), 1.0)
+        self.drive_scale = scale
+        drive = self.base_drive * scale
+        if self._islands is None:
+            self.plasma_state.bootstrap_drive[:] = drive
+        else:
+            for island, value in zip(self._islands, drive.tolist()):
+                island.bootstrap_drive = value
+
+    #Profiles and base drives, for checkpoints
+    def state(self):
+        return {"T": self.fields[0].copy(), "n": self.fields[1].copy(), "base_drive": self.base_drive.copy()}
+
+    def as_dict(self):
+        return {"tau_E": self.tau_E, "power": self.power, "stored_energy": self.stored_energy,
+                "T_axis": float(self.fields[0, 0]), "n_axis": float(self.fields[1, 0]),
+                "drive_scale": [float(s) for s in self.drive_scale]}
+
+    def __repr__(self):
+        points = len(self.radius) if self.plasma_state is not None else "unbound"
+        return f"TransportModel({points} radial points, chi={self.diffusivities[0, 0]}, D={self.diffusivities[1, 0]})"
@@ -6,6 +6,8 @@
 
 #2.Magnetic Island: represents a magnetic island (instability) living on the surface
 
+#3.MagneticIslandView / FluxSurfaceView: lightweight views into the arrays of a VectorPlasmaState
+
 
 class MagneticIsland: #Magnetic island class sole purpose is to define a magnetic island (1 use)
 
@@ -18,9 +20,27 @@ class MagneticIsland: #Magnetic island class sole purpose is to define a magneti
         self.n = n
         self.bootstrap_drive = bootstrap_drive  #self generated current within the plasma due to pressure gradients
 
-    def evolve(self, dt, flux_surface, mre_solver):
-        dw_dt = mre_solver(self, flux_surface) #mre_solver esentially solves the MRE to solve for the change in width of island over time
-        self.w += dw_dt * dt #Total width with all contributions added up 
+    def evolve(self, dt, flux_surface, mre_solver, integrator=None, mre_jacobian=None, t=0.0):
+        if integrator is None:
+            dw_dt = mre_solver(self, flux_surface) #mre_solver esentially solves the MRE to solve for the change in width of island over time
+            self.w += dw_dt * dt #Total width with all contributions added up 
+            return
+
+        #Higher order / adaptive integrators (physics/integrators.py) need dw/dt at trial widths
+        rhs, jac = self.rhs_functions(flux_surface, mre_solver, mre_jacobian)
+        self.w = integrator.advance(rhs, t, self.w, dt, jac)
+
+    #Wraps mre_solver (and optionally its jacobian) as functions of the width alone, f(t, w)
+    def rhs_functions(self, flux_surface, mre_solver, mre_jacobian=None):
+        def rhs(t, w):
+            return mre_solver(MagneticIsland(w, self.m, self.n, self.bootstrap_drive), flux_surface)
+
+        jac = None
+        if mre_jacobian is not None:
+            def jac(t, w):
+                return mre_jacobian(MagneticIsland(w, self.m, self.n, self.bootstrap_drive), flux_surface)
+
+        return rhs, jac
 
 
 #Components of a Flux surface made out of a radius, safety factor and a magnetic island
@@ -41,9 +61,65 @@ class FluxSurface:
          return f"FluxSurface(r={self.radius}, q={self.q}, island={'yes' if self.magnetic_island else 'no'})"
 
 
-       
-                 
+#Views used by VectorPlasmaState (plasma_state.py). They hold no data of their own, only an index
+#into the state's contiguous arrays, so old callers (compute_tau_E, the plots, main.py) still see
+#normal island / surface objects while the state evolves everything in one vectorised step.
+
+class MagneticIslandView(MagneticIsland):
+
+    def __init__(self, state, index):
+        self._state = state
+        self._index = index  #position of this island in the state's island arrays
+
+    @property
+    def w(self):
+        return float(self._state.w[self._index])
+
+    #Keeps the state's running max_width right, which ConfinementDiagnostics("max") reads instead of rescanning
+    @w.setter
+    def w(self, value):
+        state = self._state
+        was_largest = state.w[self._index] >= state.max_width
+        state.w[self._index] = value
+        if state.w[self._index] >= state.max_width:
+            state.max_width = float(state.w[self._index])
+        elif was_largest:
+            state.reindex()
+
+    @property
+    def m(self):
+        return int(self._state.m[self._index])
+
+    @property
+    def n(self):
+        return int(self._state.n[self._index])
+
+    @property
+    def bootstrap_drive(self):
+        return float(self._state.bootstrap_drive[self._index])
+
+    @bootstrap_drive.setter
+    def bootstrap_drive(self, value):
+        self._state.bootstrap_drive[self._index] = value
+
+
+class FluxSurfaceView(FluxSurface):
 
+    def __init__(self, state, index):
+        self._state = state
+        self._index = index  #position of this surface in the state's radial arrays
 
+    @property
+    def radius(self):
+        return float(self._state.radius[self._index])
 
+    @property
+    def q(self):
+        return float(self._state.q[self._index])
 
+    @property
+    def magnetic_island(self):
+        island_index = self._state.surface_island[self._index]
+        if island_index < 0:
+            return None
+        return self._state.island(island_index)
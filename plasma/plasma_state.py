@@ -8,20 +8,48 @@
 #1.Any small perturbation like a change in current, tear these surfaces (NTM) and stay trapped
 #2.Instead of closed magnetic loops we get magnetic islands which disrupt confinement
 
-from plasma.flux_surface import FluxSurface
+import numpy as np
+
+from plasma.flux_surface import FluxSurface, MagneticIsland, FluxSurfaceView, MagneticIslandView
 
 
 #Plasma state is just a bunch of flux_surfaces
 class PlasmaState:
     def __init__(self, flux_surfaces):
         self.flux_surfaces = flux_surfaces
+        self.reindex()
+
+    #Index of the surfaces carrying an island, so per-step work scales with the number of islands rather
+    #than surfaces. Call again after adding or removing islands on the surfaces.
+    def reindex(self):
+        self._island_surfaces = [fs for fs in self.flux_surfaces if fs.has_island()]
+        self._island_radii = np.array([fs.radius for fs in self._island_surfaces], dtype=float)
+        self.max_width = max([fs.magnetic_island.w for fs in self._island_surfaces] + [0])
 
-    
     #evolves all magnetic islands across the surfaces using th eprocided mre_solver and timestep dt
-    def evolve_islands(self, dt, mre_solver):
-        for fs in self.flux_surfaces:
-            if fs.has_island():
-                fs.magnetic_island.evolve(dt, fs, mre_solver)
+    #integrator (physics/integrators.py) replaces forward Euler; mre_jacobian is d(dw/dt)/dw for Rosenbrock
+    #max_width (largest island width, 0 if none) is kept up to date as the islands evolve
+    def evolve_islands(self, dt, mre_solver, integrator=None, mre_jacobian=None, t=0.0):
+        max_w = 0
+        for fs in self._island_surfaces:
+            island = fs.magnetic_island
+            island.evolve(dt, fs, mre_solver, integrator, mre_jacobian, t)
+            if island.w > max_w:
+                max_w = island.w
+        self.max_width = max_w
+
+    #Radius and current width of every island, in island order
+    def island_radii(self):
+        return self._island_radii
+
+    def island_widths(self):
+        return np.array([fs.magnetic_island.w for fs in self._island_surfaces], dtype=float)
+
+    #Puts every island back to the given widths (island order), e.g. to retry a step
+    def set_island_widths(self, widths):
+        for fs, w in zip(self._island_surfaces, np.asarray(widths, dtype=float).tolist()):
+            fs.magnetic_island.w = w
+        self.max_width = max([fs.magnetic_island.w for fs in self._island_surfaces] + [0])
     
     #Returns a list of  radius and island_width tuples for all surfaces that have a magnetic island
     def get_island_data(self):
@@ -29,4 +57,103 @@ class PlasmaState:
 
 
     def __repr__(self):
-        return f"PlasmaState with {len(self.flux_surfaces)} surfaces"
\ No newline at end of file
+        return f"PlasmaState with {len(self.flux_surfaces)} surfaces"
+
+
+#Structure-of-arrays version of PlasmaState for profiles with thousands of surfaces / islands.
+#Surfaces are stored as radius[] and q[], islands as w[], m[], n[], bootstrap_drive[] plus the index
+#of the surface each island lives on. A single evolve_islands call updates every island at once.
+class VectorPlasmaState(PlasmaState):
+    def __init__(self, radius, q, island_surface, w, m, n, bootstrap_drive):
+        self.radius = np.ascontiguousarray(radius, dtype=float)
+        self.q = np.ascontiguousarray(q, dtype=float)
+
+        self.island_surface = np.ascontiguousarray(island_surface, dtype=np.intp)
+        self.w = np.ascontiguousarray(w, dtype=float)
+        self.m = np.ascontiguousarray(m, dtype=np.int64)
+        self.n = np.ascontiguousarray(n, dtype=np.int64)
+        self.bootstrap_drive = np.ascontiguousarray(bootstrap_drive, dtype=float)
+
+        #surface -> island lookup (-1 means no island on that surface)
+        self.surface_island = np.full(len(self.radius), -1, dtype=np.intp)
+        self.surface_island[self.island_surface] = np.arange(len(self.island_surface))
+
+        self._island_views = {}
+        self._surface_views = None
+        self._island_radii = self.radius[self.island_surface]
+        self.reindex()
+
+    #Islands live in fixed arrays here, so only the running max width needs refreshing
+    def reindex(self):
+        self.max_width = max(float(self.w.max()), 0) if self.n_islands else 0
+
+    #Packs an existing list of FluxSurface objects into arrays
+    @classmethod
+    def from_surfaces(cls, flux_surfaces):
+        radius = [fs.radius for fs in flux_surfaces]
+        q = [fs.q for fs in flux_surfaces]
+        island_surface = [i for i, fs in enumerate(flux_surfaces) if fs.has_island()]
+        islands = [flux_surfaces[i].magnetic_island for i in island_surface]
+        return cls(
+            radius, q, island_surface,
+            w=[isl.w for isl in islands],
+            m=[isl.m for isl in islands],
+            n=[isl.n for isl in islands],
+            bootstrap_drive=[isl.bootstrap_drive for isl in islands],
+        )
+
+    @property
+    def n_islands(self):
+        return len(self.w)
+
+    #q on the surface of every island, in island order
+    @property
+    def island_q(self):
+        return self.q[self.island_surface]
+
+    #View objects are created lazily, so large profiles only pay for the ones actually used
+    @property
+    def flux_surfaces(self):
+        if self._surface_views is None:
+            self._surface_views = [FluxSurfaceView(self, i) for i in range(len(self.radius))]
+        return self._surface_views
+
+    def island(self, index):
+        view = self._island_views.get(index)
+        if view is None:
+            view = MagneticIslandView(self, index)
+            self._island_views[index] = view
+        return view
+
+    #Batch stand-ins for a MagneticIsland / FluxSurface whose attributes are whole arrays, so an
+    #mre_solver written for one island (e.g. compute_dw_dt) evaluates every island in one call
+    def island_batch(self):
+        return MagneticIsland(self.w, self.m, self.n, self.bootstrap_drive)
+
+    def surface_batch(self):
+        return FluxSurface(self._island_radii, self.island_q)
+
+    def evolve_islands(self, dt, mre_solver, integrator=None, mre_jacobian=None, t=0.0):
+        if self.n_islands == 0:
+            return
+        if integrator is None:
+            dw_dt = mre_solver(self.island_batch(), self.surface_batch())
+            self.w += dw_dt * dt  #in place, so existing views see the new widths
+        else:
+            #The whole island array is one ODE system for the integrator
+            rhs, jac = self.island_batch().rhs_functions(self.surface_batch(), mre_solver, mre_jacobian)
+            self.w[:] = integrator.advance(rhs, t, self.w, dt, jac)
+        self.max_width = max(float(self.w.max()), 0)
+
+    def island_widths(self):
+        return self.w
+
+    def set_island_widths(self, widths):
+        self.w[:] = widths
+        self.reindex()
+
+    def get_island_data(self):
+        return list(zip(self.radius[self.island_surface].tolist(), self.w.tolist()))
+
+    def __repr__(self):
+        return f"VectorPlasmaState with {len(self.radius)} surfaces and {self.n_islands} islands"
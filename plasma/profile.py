@@ -0,0 +1,209 @@
+# plasma/profile.py
+
+#Radial profiles: a safety factor q(r) on a fine radial grid, the rational surfaces q = m/n of a set of
+#candidate modes, and PlasmaStates built from them with an island seeded on every rational surface.
+
+#q is either a function of r (evaluated on the whole grid at once) or a table (r_values, q_values) that is
+#linearly interpolated. Rational surfaces are found for every mode at once from the sign changes of
+#q(r) - m/n between neighbouring grid points, so non-monotonic (reversed shear) profiles give several
+#surfaces per mode. Each surface is then added to the grid at its exact radius with q = m/n, so Δ′ of
+#the seeded island comes out exactly as in the original hand-built plasma.
+
+#   profile = get_profile(PowerLawQ(q0=1.0, qa=3.0, a=10), r_max=10, n_points=100_000, modes=[(2, 1), (3, 2)])
+#   state = profile.build_state(w0=0.01, bootstrap=0.2)
+
+#get_profile keeps recently built profiles, so repeated runs on the same equilibrium skip construction.
+
+import hashlib
+from collections import OrderedDict
+from math import gcd
+
+import numpy as np
+
+from plasma.flux_surface import FluxSurface, MagneticIsland
+from plasma.plasma_state import PlasmaState, VectorPlasmaState
+
+DEFAULT_MODES = ((2, 1),)
+
+
+#q(r) = q0 + (qa - q0) * (r / a)**power. Instances with equal parameters compare equal, so they share
+#cache entries in get_profile (a lambda would only match itself).
+class PowerLawQ:
+    def __init__(self, q0=1.0, qa=3.0, a=10, power=2):
+        self.q0 = q0
+        self.qa = qa
+        self.a = a
+        self.power = power
+
+    def __call__(self, r):
+        return self.q0 + (self.qa - self.q0) * (np.asarray(r) / self.a) ** self.power
+
+    def _key(self):
+        return (self.q0, self.qa, self.a, self.power)
+
+    def __eq__(self, other):
+        return isinstance(other, PowerLawQ) and self._key() == other._key()
+
+    def __hash__(self):
+        return hash(("PowerLawQ",) + self._key())
+
+    def __repr__(self):
+        return f"PowerLawQ(q0={self.q0}, qa={self.qa}, a={self.a}, power={self.power})"
+
+
+#Radius of every crossing q(r) = m/n for each mode, as arrays (radius, q, m, n) sorted by radius.
+#q_func (the analytic profile, if there is one) refines each crossing by `refine` regula falsi steps
+#inside its grid interval; tabulated profiles are exact at linear interpolation already.
+#Modes with the same m/n would sit on the same surface, so only the first one listed is kept.
+def find_rational_surfaces(radius, q, modes=DEFAULT_MODES, q_func=None, refine=3):
+    found_r, found_q, found_m, found_n = [], [], [], []
+    seen = set()
+    for m, n in modes:
+        ratio = (m // gcd(m, n), n // gcd(m, n))
+        if ratio in seen:
+            continue
+        seen.add(ratio)
+        target = m / n
+
+        d = q - target
+        exact = np.flatnonzero(d == 0)
+        lo = np.flatnonzero(d[:-1] * d[1:] < 0)
+
+        r_lo, r_hi = radius[lo], radius[lo + 1]
+        d_lo, d_hi = d[lo], d[lo + 1]
+        roots = r_lo + (r_hi - r_lo) * d_lo / (d_lo - d_hi)
+        if q_func is not None:
+            for _ in range(refine):
+                d_mid = np.asarray(q_func(roots), dtype=float) - target
+                left = np.sign(d_mid) == np.sign(d_lo)
+                r_lo, d_lo = np.where(left, roots, r_lo), np.where(left, d_mid, d_lo)
+                r_hi, d_hi = np.where(left, r_hi, roots), np.where(left, d_hi, d_mid)
+                step = np.where(d_lo != d_hi, d_lo / np.where(d_lo != d_hi, d_lo - d_hi, 1), 0.5)
+                roots = r_lo + (r_hi - r_lo) * step
+
+        roots = np.concatenate((radius[exact], roots))
+        found_r.append(roots)
+        found_q.append(np.full(len(roots), target))
+        found_m.append(np.full(len(roots), m, dtype=np.int64))
+        found_n.append(np.full(len(roots), n, dtype=np.int64))
+
+    if not found_r:
+        return {"radius": np.empty(0), "q": np.empty(0),
+                "m": np.empty(0, dtype=np.int64), "n": np.empty(0, dtype=np.int64)}
+    order = np.argsort(np.concatenate(found_r), kind="stable")
+    return {
+        "radius": np.concatenate(found_r)[order],
+        "q": np.concatenate(found_q)[order],
+        "m": np.concatenate(found_m)[order],
+        "n": np.concatenate(found_n)[order],
+    }
+
+
+class RadialProfile:
+    #q: function of r or (r_values, q_values). The grid is n_points evenly spaced radii on [r_min, r_max]
+    #plus one extra point at every rational surface that doesn't already fall on the grid.
+    def __init__(self, q, r_min=0.0, r_max=10.0, n_points=10_000, modes=DEFAULT_MODES, refine=3):
+        grid = np.linspace(r_min, r_max, int(n_points))
+        if callable(q):
+            q_func = q
+            q_grid = np.broadcast_to(np.asarray(q(grid), dtype=float), grid.shape)
+        else:
+            q_func = None
+            r_table, q_table = (np.asarray(col, dtype=float) for col in q)
+            q_grid = np.interp(grid, r_table, q_table)
+
+        self.modes = tuple((int(m), int(n)) for m, n in modes)
+        rational = find_rational_surfaces(grid, q_grid, self.modes, q_func, refine)
+
+        #Rational surfaces landing on a grid point reuse it, the rest are inserted in radial order
+        pos = np.searchsorted(grid, rational["radius"])
+        on_grid = (pos < len(grid)) & (grid[np.minimum(pos, len(grid) - 1)] == rational["radius"])
+        self.radius = np.insert(grid, pos[~on_grid], rational["radius"][~on_grid])
+        self.q = np.insert(q_grid, pos[~on_grid], rational["q"][~on_grid])
+
+        self.island_surface = np.searchsorted(self.radius, rational["radius"])
+        self.q[self.island_surface] = rational["q"]
+        self.m = rational["m"]
+        self.n = rational["n"]
+
+        for array in (self.radius, self.q, self.island_surface, self.m, self.n):
+            array.flags.writeable = False  #profiles are shared through the cache
+
+    @property
+    def n_surfaces(self):
+        return len(self.radius)
+
+    @property
+    def n_islands(self):
+        return len(self.island_surface)
+
+    #Radius of every rational surface of one mode
+    def surfaces_of(self, m, n):
+        return self.radius[self.island_surface[(self.m == m) & (self.n == n)]]
+
+    #Index (in island order) of the first island of mode (m, n), or None
+    def island_index(self, m, n):
+        match = np.flatnonzero((self.m == m) & (self.n == n))
+        return int(match[0]) if len(match) else None
+
+    #Fresh PlasmaState with an island on every rational surface.
+    #w0 and bootstrap are scalars, arrays with one entry per island, or functions f(r, m, n) of arrays.
+    #vectorized=False builds FluxSurface / MagneticIsland objects instead (slow for large grids).
+    def build_state(self, w0=0.01, bootstrap=0.2, vectorized=True):
+        island_r = self.radius[self.island_surface]
+        w = self._per_island(w0, island_r)
+        drive = self._per_island(bootstrap, island_r)
+
+        if vectorized:
+            return VectorPlasmaState(self.radius, self.q, self.island_surface, w, self.m, self.n, drive)
+
+        islands = {}
+        for k, surface in enumerate(self.island_surface.tolist()):
+            islands[surface] = MagneticIsland(w0=float(w[k]), m=int(self.m[k]), n=int(self.n[k]),
+                                              bootstrap_drive=float(drive[k]))
+        return PlasmaState([FluxSurface(radius=float(r), q=float(q), magnetic_island=islands.get(i))
+                            for i, (r, q) in enumerate(zip(self.radius.tolist(), self.q.tolist()))])
+
+    def _per_island(self, value, island_r):
+        if callable(value):
+            value = value(island_r, self.m, self.n)
+        return np.array(np.broadcast_to(np.asarray(value, dtype=float), island_r.shape))
+
+    def __repr__(self):
+        return f"RadialProfile({self.n_surfaces} surfaces, {self.n_islands} rational surfaces, modes={list(self.modes)})"
+
+
+# --- construction cache ---
+
+_profile_cache = OrderedDict()
+PROFILE_CACHE_SIZE = 32
+
+
+def _q_key(q):
+    if callable(q):
+        return q
+    digest = hashlib.sha256()
+    for col in q:
+        digest.update(np.ascontiguousarray(col, dtype=float).tobytes())
+        digest.update(b"|")
+    return digest.hexdigest()
+
+
+#RadialProfile with the same arguments as the constructor, reused from the cache when the same profile
+#(an equal PowerLawQ / the same function object / identical table values) was built recently
+def get_profile(q, r_min=0.0, r_max=10.0, n_points=10_000, modes=DEFAULT_MODES, refine=3):
+    key = (_q_key(q), float(r_min), float(r_max), int(n_points),
+           tuple((int(m), int(n)) for m, n in modes), int(refine))
+    profile = _profile_cache.get(key)
+    if profile is None:
+        profile = RadialProfile(q, r_min, r_max, n_points, modes, refine)
+        _profile_cache[key] = profile
+        while len(_profile_cache) > PROFILE_CACHE_SIZE:
+            _profile_cache.popitem(last=False)
+    else:
+        _profile_cache.move_to_end(key)
+    return profile
+
+
+def clear_profile_cache():
+    _profile_cache.clear()
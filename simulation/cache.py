@@ -0,0 +1,250 @@
+# simulation/cache.py
+
+#Memoisation of simulation runs keyed by their full input set.
+#The key is a SHA-256 of the normalised inputs (slider params with defaults filled in, A/B/C, dt, steps,
+#integrator) together with a solver version: a hash of the source of physics/, plasma/ and every simulation
+#module run_headless depends on (VERSIONED_SOURCES). Editing any of that code changes the version, so old
+#entries simply stop matching.
+
+#Two tiers:
+#   memory - LRU dict of the most recent max_entries results
+#   disk   - one .npz per entry under disk_dir, evicted least-recently-used once max_disk_bytes is passed
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from simulation.sweep import DEFAULT_PARAMS, DEFAULT_CONSTANTS
+from simulation.recorder import TimeSeriesRecorder
+from simulation.runner import run_headless
+from simulation.instrumentation import instrumentation
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+VERSIONED_SOURCES = ("physics", "plasma") + tuple(
+    os.path.join("simulation", name) for name in ("runner.py", "sweep.py", "events.py", "recorder.py",
+                                                  "checkpoint.py", "instrumentation.py"))
+
+#Modules behind stored analysis results (Sobol / Morris indices, optima, ensemble statistics) on top of
+#the solver: records of those are keyed on analysis_version()
+ANALYSIS_SOURCES = tuple(os.path.join("simulation", name) for name in ("sensitivity.py", "optimize.py",
+                                                                      "ensemble.py", "parallel.py"))
+
+_version_lock = threading.Lock()
+_version_cache = {}  #sources -> (stamp, digest)
+
+
+#Hash of the given source files / folders; recomputed only when a file's mtime or size changes
+def source_version(sources):
+    files = []
+    for entry in sources:
+        path = os.path.join(PROJECT_ROOT, entry)
+        if os.path.isdir(path):
+            files.extend(os.path.join(path, name) for name in sorted(os.listdir(path)) if name.endswith(".py"))
+        elif os.path.exists(path):
+            files.append(path)
+
+    stamp = tuple((f, os.stat(f).st_mtime_ns, os.stat(f).st_size) for f in files)
+    with _version_lock:
+        cached = _version_cache.get(sources)
+        if cached is None or cached[0] != stamp:
+            digest = hashlib.sha256()
+            for f in files:
+                digest.update(os.path.relpath(f, PROJECT_ROOT).encode())
+                with open(f, "rb") as fh:
+                    digest.update(fh.read())
+            cached = _version_cache[sources] = (stamp, digest.hexdigest()[:16])
+        return cached[1]
+
+
+#Hash of the physics source
+def solver_version():
+    return source_version(VERSIONED_SOURCES)
+
+
+#Hash of the physics source and the analysis code built on it
+def analysis_version():
+    return source_version(VERSIONED_SOURCES + ANALYSIS_SOURCES)
+
+
+#run_headless options besides the physics inputs that change a run's result, and so go into its key
+KEYED_OPTIONS = ("confinement_model", "diagnostics_every", "events", "record_islands")
+
+
+#Inputs with defaults filled in and numbers as floats, so {"D": 1} and {"D": 1.0} share a key
+def normalise_inputs(params=None, dt=0.1, steps=50, constants=None, integrator=None,
+                     confinement_model="max", diagnostics_every=1, events=None, record_islands=False):
+    params = {**DEFAULT_PARAMS, **(params or {})}
+    constants = {**DEFAULT_CONSTANTS, **(constants or {})}
+    inputs = {
+        "params": {key: float(params[key]) for key in sorted(params)},
+        "constants": {key: float(constants[key]) for key in sorted(constants)},
+        "dt": float(dt),
+        "steps": int(steps),
+        "integrator": integrator or "euler",
+        "confinement": [confinement_model, int(diagnostics_every)],
+    }
+    if events:
+        inputs["events"] = [event.spec() for event in events]
+    if record_islands:
+        inputs["record_islands"] = True  #adds the island_w column to the stored trajectory
+    return inputs
+
+
+def make_key(params=None, dt=0.1, steps=50, constants=None, integrator=None, **options):
+    inputs = normalise_inputs(params, dt, steps, constants, integrator, **options)
+    payload = json.dumps({"inputs": inputs, "version": solver_version()}, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class SimulationCache:
+    def __init__(self, max_entries=256, disk_dir=None, max_disk_bytes=512 * 2**20):
+        self.max_entries = max_entries
+        self.disk_dir = disk_dir
+        self.max_disk_bytes = max_disk_bytes
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        if disk_dir is not None:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    def __contains__(self, key):
+        return key in self._memory or (self.disk_dir is not None and os.path.exists(self._path(key)))
+
+    def get(self, key):
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                instrumentation.count("cache_hits")
+                return entry
+
+        entry = self._read_disk(key)
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                instrumentation.count("cache_misses")
+                return None
+            self.disk_hits += 1
+            instrumentation.count("cache_hits")
+            self._remember(key, entry)
+        return entry
+
+    #entry: {"metrics": dict of scalars, "trajectory": dict of arrays}
+    def put(self, key, entry):
+        with self._lock:
+            self._remember(key, entry)
+        if self.disk_dir is not None:
+            self._write_disk(key, entry)
+            self._evict_disk()
+
+    def _remember(self, key, entry):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+        if self.disk_dir is not None:
+            for name in os.listdir(self.disk_dir):
+                if name.endswith(".npz"):
+                    os.remove(os.path.join(self.disk_dir, name))
+
+    def stats(self):
+        return {"hits": self.hits, "disk_hits": self.disk_hits, "misses": self.misses,
+                "memory_entries": len(self._memory)}
+
+    # --- disk tier ---
+
+    def _path(self, key):
+        return os.path.join(self.disk_dir, f"{key}.npz")
+
+    def _read_disk(self, key):
+        if self.disk_dir is None:
+            return None
+        path = self._path(key)
+        try:
+            with np.load(path) as data:
+                metrics = json.loads(bytes(data["__metrics__"]).decode())
+                trajectory = {name: data[name] for name in data.files if name != "__metrics__"}
+        except (FileNotFoundError, OSError, ValueError, KeyError):
+            return None
+        os.utime(path)  #mtime doubles as the last-used time for eviction
+        return {"metrics": metrics, "trajectory": trajectory}
+
+    def _write_disk(self, key, entry):
+        metrics = np.frombuffer(json.dumps(entry["metrics"]).encode(), dtype=np.uint8)
+        tmp = self._path(key) + f".{os.getpid()}.tmp"
+        with open(tmp, "wb") as fh:
+            np.savez(fh, __metrics__=metrics, **entry["trajectory"])
+        os.replace(tmp, self._path(key))
+
+    def _evict_disk(self):
+        entries = []
+        for name in os.listdir(self.disk_dir):
+            if name.endswith(".npz"):
+                stat = os.stat(os.path.join(self.disk_dir, name))
+                entries.append((stat.st_mtime_ns, stat.st_size, name))
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_disk_bytes:
+                break
+            os.remove(os.path.join(self.disk_dir, name))
+            total -= size
+
+
+#Module-level default cache used by cached_run when none is passed
+default_cache = SimulationCache()
+
+
+#run_headless with memoisation. A hit returns the stored final metrics and a recorder rebuilt from
+#the stored trajectory without running anything; result["cache_hit"] tells which path was taken.
+#Custom mre_solvers, integrator instances, radial profiles or recorders cannot be keyed (a recorder decides
+#what trajectory is kept, e.g. a ring buffer of the last rows), so those always run uncached. So do restarts
+#(the result depends on the snapshot), checkpointed runs (a hit would write no checkpoints) and runs with
+#a transport model (it replaces tau_E and the power, and its settings are not part of the key).
+def cached_run(params=None, dt=0.1, steps=50, constants=None, integrator=None, cache=None, **run_options):
+    cache = default_cache if cache is None else cache
+    if not cacheable(integrator, **run_options):
+        return {**run_headless(params, dt=dt, steps=steps, constants=constants, integrator=integrator,
+                               **run_options), "cache_hit": False}
+
+    key = make_key(params, dt, steps, constants, integrator,
+                   **{name: run_options[name] for name in KEYED_OPTIONS if name in run_options})
+    entry = cache.get(key)
+    if entry is not None:
+        return result_from_entry(entry, key)
+
+    result = run_headless(params, dt=dt, steps=steps, constants=constants, integrator=integrator, **run_options)
+    if not result.get("cancelled"):
+        cache.put(key, cache_entry(result))
+    return {**result, "cache_hit": False, "cache_key": key}
+
+
+def cacheable(integrator=None, mre_solver=None, profile=None, recorder=None, restart=None, checkpoint=None,
+              transport=None, **run_options):
+    return mre_solver is None and profile is None and recorder is None and restart is None and \
+        checkpoint is None and transport is None and (integrator is None or isinstance(integrator, str))
+
+
+#Cache entry for a finished run_headless result: JSON-safe metrics plus a copy of the trajectory
+def cache_entry(result):
+    metrics = {name: value for name, value in result.items()
+               if name != "recorder" and (np.ndim(value) == 0 or isinstance(value, dict))}
+    metrics = json.loads(json.dumps(metrics, default=float))
+    trajectory = {name: np.array(col) for name, col in result["recorder"].as_dict().items()}
+    return {"metrics": metrics, "trajectory": trajectory}
+
+
+#Result dict in the shape run_headless returns, rebuilt from a cache entry
+def result_from_entry(entry, key=None):
+    recorder = TimeSeriesRecorder.from_columns(entry["trajectory"])
+    return {**entry["metrics"], "recorder": recorder, "cache_hit": True, "cache_key": key}
@@ -0,0 +1,449 @@
+# simulation/checkpoint.py
+
+#Checkpoint / restart of single runs (simulation.runner.run_headless).
+#A Snapshot holds everything needed to carry a run on exactly where it stopped:
+#   surfaces and islands - the structure-of-arrays columns of VectorPlasmaState (radius, q, island_surface,
+#                          w, m, n, bootstrap_drive); object PlasmaStates are packed the same way
+#   time                 - completed steps and dt
+#   integrator state     - its name, the step size an adaptive method had settled on and its work counters
+#   diagnostics / events - the cached tau_E of ConfinementDiagnostics, EventMonitor hold counters and log
+#   history tail         - the last rows of the recorder, so dP/dt of a resumed run matches an unbroken one
+#   transport            - T / n profiles and undisturbed bootstrap drives of a physics.transport model
+#   rng                  - state of a numpy Generator, when the caller draws random numbers (e.g. perturbations)
+#   params, constants and any JSON attrs
+
+#File format (save_snapshot / load_snapshot), one file per snapshot:
+#   8-byte magic, uint64 header length, JSON header, then every array as raw bytes at 64-byte aligned
+#   offsets. Arrays are memory-mapped copy-on-write on load, so a profile with 10^5 surfaces is read
+#   lazily and never copied unless something writes to it.
+
+#Periodic checkpoints: run_headless(..., checkpoint=CheckpointWriter(...)). The step loop only captures the
+#snapshot (a copy of the widths; the surface arrays never change during a run and are shared), the file is
+#written by a background thread. If that thread is still busy, the newest snapshot replaces the one waiting
+#for it, so the step loop never waits on the disk.
+
+#Forking: Snapshot.fork() makes a continuation that shares every array with its parent (they are read-only)
+#except the ones it overrides. fork_runs / fork_sweep run many perturbed continuations from the shared
+#prefix instead of recomputing it.
+
+#   with CheckpointWriter("run/step_{step:06d}.snap", every=1000, keep=3) as writer:
+#       run_headless(params, steps=100_000, checkpoint=writer)
+#   run_headless(steps=100_000, restart="run/step_050000.snap")
+#   results = list(fork_runs("run/step_050000.snap", [{"D": 0.8}, {"D": 1.2}], steps=60_000))
+
+import json
+import os
+import threading
+
+import numpy as np
+
+from plasma.flux_surface import FluxSurface, MagneticIsland
+from plasma.plasma_state import PlasmaState, VectorPlasmaState
+from physics.integrators import make_integrator
+from simulation.sweep import DEFAULT_PARAMS, DEFAULT_CONSTANTS, ISLAND_Q, ISLAND_M, ISLAND_N
+
+MAGIC = b"ISLSNAP1"
+ALIGN = 64
+STATE_ARRAYS = ("radius", "q", "island_surface", "w", "m", "n", "bootstrap_drive")
+HISTORY_ROWS = 6  #final_metrics estimates dP/dt from the last 6 recorded rows
+
+
+#Read-only view: snapshots and their forks share arrays, so none of them may write to one
+def _frozen(array):
+    view = np.asarray(array).view()
+    view.flags.writeable = False
+    return view
+
+
+def _json_default(value):
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"{type(value).__name__} is not JSON serialisable")
+
+
+class Snapshot:
+    def __init__(self, arrays, step, dt, target=0, vectorized=True, params=None, constants=None,
+                 integrator=None, diagnostics=None, events=None, history=None, rng_state=None, attrs=None,
+                 transport=None):
+        self.arrays = {key: _frozen(arrays[key]) for key in STATE_ARRAYS}
+        self.step = int(step)          #completed steps; a restarted run continues with step index `step`
+        self.dt = float(dt)
+        self.target = int(target)      #island index of the run's target island
+        self.vectorized = bool(vectorized)
+        self.params = {**DEFAULT_PARAMS, **(params or {})}
+        self.constants = {**DEFAULT_CONSTANTS, **(constants or {})}
+        self.integrator = integrator   #{"name", "h", "stats"}, or None for the built-in forward Euler
+        self.diagnostics = diagnostics
+        self.events = events
+        self.history = {key: _frozen(col) for key, col in (history or {}).items()}
+        self.rng_state = rng_state
+        self.attrs = attrs or {}
+        self.transport = {key: _frozen(col) for key, col in transport.items()} if transport else None
+
+    @property
+    def t(self):
+        return self.step * self.dt
+
+    @property
+    def n_islands(self):
+        return len(self.arrays["w"])
+
+    #Width of the target island
+    @property
+    def w(self):
+        return float(self.arrays["w"][self.target])
+
+    #Continuation sharing this snapshot's arrays except those overridden: w= replaces the widths (e.g. a
+    #perturbed copy), params= updates the slider parameters, anything else replaces that attribute.
+    #Parameters that set up the state rather than the right hand side are applied to it, as fork_sweep does:
+    #a changed "bootstrap" becomes every island's bootstrap drive, a changed "initial_width" the target
+    #island's width.
+    def fork(self, w=None, params=None, **changes):
+        arrays = dict(self.arrays)
+        if w is not None:
+            arrays["w"] = np.array(w, dtype=float).reshape(self.arrays["w"].shape)
+        fields = {key: getattr(self, key) for key in ("step", "dt", "target", "vectorized", "constants",
+                                                      "integrator", "diagnostics", "events", "history",
+                                                      "rng_state", "attrs", "transport")}
+        fields.update(changes)
+        params = {**self.params, **(params or {})}
+
+        if params["bootstrap"] != self.params["bootstrap"]:
+            arrays["bootstrap_drive"] = np.full(self.n_islands, float(params["bootstrap"]))
+            if fields["transport"] is not None:
+                #the transport model rescales the drives from these every step
+                fields["transport"] = {**fields["transport"], "base_drive": arrays["bootstrap_drive"]}
+        if params["initial_width"] != self.params["initial_width"]:
+            arrays["w"] = np.array(arrays["w"], dtype=float)
+            arrays["w"][fields["target"]] = params["initial_width"]
+        return Snapshot(arrays, params=params, **fields)
+
+    #numpy Generator in the state it had when the snapshot was taken (None if none was captured)
+    def rng(self):
+        if self.rng_state is None:
+            return None
+        bit_generator = getattr(np.random, self.rng_state["bit_generator"])()
+        bit_generator.state = self.rng_state
+        return np.random.Generator(bit_generator)
+
+    #Fresh (plasma_state, target_island) at the snapshot's widths. The surface arrays stay shared with the
+    #snapshot, the widths are copied since evolving writes to them.
+    def build_state(self, vectorized=None):
+        vectorized = self.vectorized if vectorized is None else vectorized
+        a = self.arrays
+        if vectorized:
+            state = VectorPlasmaState(a["radius"], a["q"], a["island_surface"], np.array(a["w"]), a["m"], a["n"],
+                                      a["bootstrap_drive"])
+            return state, state.island(self.target)
+
+        islands = [MagneticIsland(w0=w, m=m, n=n, bootstrap_drive=b)
+                   for w, m, n, b in zip(a["w"].tolist(), a["m"].tolist(), a["n"].tolist(),
+                                         a["bootstrap_drive"].tolist())]
+        on_surface = dict(zip(a["island_surface"].tolist(), islands))
+        surfaces = [FluxSurface(radius=r, q=q, magnetic_island=on_surface.get(i))
+                    for i, (r, q) in enumerate(zip(a["radius"].tolist(), a["q"].tolist()))]
+        return PlasmaState(surfaces), islands[self.target]
+
+    #The integrator instance to continue with, or None for the built-in forward Euler. A given instance
+    #(e.g. one with custom tolerances) takes over the saved step size and counters.
+    def build_integrator(self, integrator=None):
+        if self.integrator is None and integrator is None:
+            return None
+        integrator = make_integrator(integrator if integrator is not None else self.integrator["name"])
+        if self.integrator is not None:
+            if self.integrator["h"] is not None and hasattr(integrator, "h"):
+                integrator.h = self.integrator["h"]
+            for key, value in self.integrator["stats"].items():
+                setattr(integrator.stats, key, value)
+        return integrator
+
+    #Puts the history tail back into a recorder with the same columns (skipped otherwise)
+    def fill_recorder(self, recorder):
+        if not self.history or set(self.history) != set(recorder.names):
+            return
+        columns = [self.history[name] for name in recorder.names]
+        for row in zip(*columns):
+            recorder.append(*row)
+
+    def meta(self):
+        return {"step": self.step, "dt": self.dt, "target": self.target, "vectorized": self.vectorized,
+                "params": self.params, "constants": self.constants, "integrator": self.integrator,
+                "diagnostics": self.diagnostics, "events": self.events, "rng_state": self.rng_state,
+                "attrs": self.attrs}
+
+    def __repr__(self):
+        return (f"Snapshot(step={self.step}, t={self.t:g}, {len(self.arrays['radius'])} surfaces, "
+                f"{self.n_islands} islands)")
+
+
+#Snapshot of a running simulation after `step` completed steps. Arguments are the objects run_headless
+#works with; integrator / diagnostics / monitor / recorder / rng may be None.
+def capture(plasma_state, target_island, step, dt, params=None, constants=None, integrator=None,
+            diagnostics=None, monitor=None, recorder=None, rng=None, attrs=None, transport=None):
+    if isinstance(plasma_state, VectorPlasmaState):
+        packed, target = plasma_state, target_island._index
+    else:
+        packed = VectorPlasmaState.from_surfaces(plasma_state.flux_surfaces)
+        islands = [fs.magnetic_island for fs in plasma_state.flux_surfaces if fs.has_island()]
+        target = next(i for i, island in enumerate(islands) if island is target_island)
+    arrays = {key: getattr(packed, key) for key in STATE_ARRAYS}
+    arrays["w"] = np.array(packed.w)  #the only array a run changes
+
+    integrator_state = None
+    if integrator is not None:
+        integrator_state = {"name": integrator.name, "h": getattr(integrator, "h", None),
+                            "stats": integrator.stats.as_dict()}
+    diagnostics_state = None
+    if diagnostics is not None:
+        diagnostics_state = {**diagnostics.as_dict(), "every": diagnostics.every}
+    history = None
+    if recorder is not None:
+        history = {name: np.array(recorder.tail(name, HISTORY_ROWS)) for name in recorder.names}
+    rng_state = rng.bit_generator.state if rng is not None else None
+
+    return Snapshot(arrays, step, dt, target, isinstance(plasma_state, VectorPlasmaState), params, constants,
+                    integrator_state, diagnostics_state, monitor.state() if monitor is not None else None,
+                    history, rng_state, attrs, transport.state() if transport is not None else None)
+
+
+# --- binary files ---
+
+def _aligned(offset):
+    return -(-offset // ALIGN) * ALIGN
+
+
+#Writes the snapshot to `path` (via a temporary file and a rename, so readers never see half a file)
+def save_snapshot(snapshot, path):
+    path = str(path)
+    arrays = dict(snapshot.arrays)
+    arrays.update({f"history/{name}": col for name, col in snapshot.history.items()})
+    arrays.update({f"transport/{name}": col for name, col in (snapshot.transport or {}).items()})
+
+    specs = {}
+    offset = 0
+    for name, array in arrays.items():
+        specs[name] = [array.dtype.str, list(array.shape), offset]
+        offset = _aligned(offset + array.nbytes)
+    header = json.dumps({"meta": snapshot.meta(), "arrays": specs}, default=_json_default).encode()
+    start = _aligned(len(MAGIC) + 8 + len(header))
+
+    folder = os.path.dirname(path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    tmp = f"{path}.tmp-{os.getpid()}-{threading.get_ident()}"
+    with open(tmp, "wb") as fh:
+        fh.write(MAGIC)
+        fh.write(np.uint64(len(header)).tobytes())
+        fh.write(header)
+        for name, array in arrays.items():
+            fh.seek(start + specs[name][2])
+            fh.write(np.ascontiguousarray(array).tobytes())
+        fh.truncate(start + offset)
+    os.replace(tmp, path)
+    return path
+
+
+#Reads a snapshot file. With mmap=True (default) the arrays are copy-on-write memory maps of the file.
+def load_snapshot(path, mmap=True):
+    path = str(path)
+    with open(path, "rb") as fh:
+        if fh.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not an island snapshot")
+        length = int(np.frombuffer(fh.read(8), dtype=np.uint64)[0])
+        header = json.loads(fh.read(length))
+        start = _aligned(len(MAGIC) + 8 + length)
+        data = None if mmap else fh.read()
+
+    arrays = {}
+    for name, (dtype, shape, offset) in header["arrays"].items():
+        dtype, shape = np.dtype(dtype), tuple(shape)
+        count = int(np.prod(shape))
+        if count == 0:
+            arrays[name] = np.empty(shape, dtype=dtype)
+        elif mmap:
+            arrays[name] = np.memmap(path, dtype=dtype, mode="c", offset=start + offset, shape=shape)
+        else:
+            begin = offset + start - len(MAGIC) - 8 - length
+            arrays[name] = np.frombuffer(data, dtype=dtype, count=count, offset=begin).reshape(shape)
+
+    meta = header["meta"]
+    history = {name[len("history/"):]: col for name, col in arrays.items() if name.startswith("history/")}
+    transport = {name[len("transport/"):]: col for name, col in arrays.items() if name.startswith("transport/")}
+    return Snapshot(arrays, meta["step"], meta["dt"], meta["target"], meta["vectorized"], meta["params"],
+                    meta["constants"], meta["integrator"], meta["diagnostics"], meta["events"], history,
+                    meta["rng_state"], meta["attrs"], transport)
+
+
+#A Snapshot from a Snapshot or a snapshot file path
+def as_snapshot(source):
+    return source if isinstance(source, Snapshot) else load_snapshot(source)
+
+
+# --- periodic asynchronous checkpoints ---
+
+#Writes a snapshot every `every` steps of a run on a background thread.
+#path is a file name, optionally with a {step} field ("run/step_{step:06d}.snap"); without one every
+#checkpoint replaces the last. keep limits how many numbered files are left on disk (oldest removed first).
+#Use it as a context manager (or call close()) so the last snapshot is on disk before going on.
+class CheckpointWriter:
+    def __init__(self, path, every=1000, keep=None):
+        self.path = str(path)
+        self.every = max(int(every), 1)
+        self.keep = keep
+        self.paths = []        #files written, oldest first
+        self.written = 0
+        self.skipped = 0       #snapshots replaced by a newer one before they were written
+        self.error = None
+        self._pending = None
+        self._busy = False
+        self._closing = False
+        self._cond = threading.Condition()
+        self._thread = None
+
+    def due(self, step):
+        return step % self.every == 0
+
+    #Hands a snapshot to the writer thread and returns at once
+    def submit(self, snapshot):
+        self._raise_error()
+        with self._cond:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name="checkpoint-writer", daemon=True)
+                self._thread.start()
+            if self._pending is not None:
+                self.skipped += 1
+            self._pending = snapshot
+            self._cond.notify_all()
+
+    __call__ = submit
+
+    def _loop(self):
+        while True:
+            with self._cond:
+                while self._pending is None and not self._closing:
+                    self._cond.wait()
+                if self._pending is None:
+                    return
+                snapshot, self._pending = self._pending, None
+                self._busy = True
+            try:
+                self._write(snapshot)
+            except Exception as exc:
+                self.error = exc
+            with self._cond:
+                self._busy = False
+                self._cond.notify_all()
+
+    def _write(self, snapshot):
+        path = self.path.format(step=snapshot.step)
+        save_snapshot(snapshot, path)
+        self.written += 1
+        if path in self.paths:
+            self.paths.remove(path)
+        self.paths.append(path)
+        if self.keep is not None and len(self.paths) > self.keep:
+            for old in self.paths[:-self.keep]:
+                if os.path.exists(old):
+                    os.remove(old)
+            self.paths = self.paths[-self.keep:]
+
+    def _raise_error(self):
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise RuntimeError("Writing a checkpoint failed") from error
+
+    #Blocks until every submitted snapshot is on disk
+    def flush(self):
+        with self._cond:
+            while self._pending is not None or self._busy:
+                self._cond.wait()
+        self._raise_error()
+
+    def close(self):
+        self.flush()
+        with self._cond:
+            self._closing = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def latest(self):
+        return self.paths[-1] if self.paths else None
+
+
+# --- forking ---
+
+#Runs one continuation of `snapshot` per variation up to step `steps` (the total, as in the original run).
+#A variation is a dict of parameter overrides (applied through Snapshot.fork, so "bootstrap" and
+#"initial_width" change the state) or a Snapshot (e.g. snapshot.fork(w=...)). run_options go
+#to run_headless (integrator, events, confinement_model, ... must match the original run to continue it
+#exactly). Yields the run_headless results in order.
+def fork_runs(snapshot, variations, steps, **run_options):
+    from simulation.runner import run_headless
+
+    snapshot = as_snapshot(snapshot)
+    for variation in variations:
+        if isinstance(variation, Snapshot):
+            yield run_headless(dt=variation.dt, steps=steps, restart=variation, **run_options)
+        else:
+            yield run_headless(variation, dt=snapshot.dt, steps=steps, restart=snapshot, **run_options)
+
+
+#Many continuations of a single-(2,1)-island snapshot as one batched sweep (simulation.sweep.run_sweep).
+#points are sweep columns; parameters not given keep the snapshot's values and "initial_width" defaults to
+#the snapshot's width, so it perturbs the state rather than the start of the run. Runs the steps left up to
+#`steps`. Returns the run_sweep table.
+def fork_sweep(snapshot, points, steps, **sweep_options):
+    from simulation.sweep import normalise_points, run_sweep
+
+    snapshot = as_snapshot(snapshot)
+    a = snapshot.arrays
+    if snapshot.n_islands != 1 or a["m"][0] != ISLAND_M or a["n"][0] != ISLAND_N or \
+            a["q"][a["island_surface"][0]] != ISLAND_Q:
+        raise ValueError("fork_sweep needs a snapshot of the single (2,1) island plasma; use fork_runs")
+    if snapshot.step >= steps:
+        raise ValueError(f"The snapshot is already at step {snapshot.step} of {steps}")
+
+    points = dict(points)
+    count = max([np.size(value) for value in points.values()] + [1])
+    for key, value in {**snapshot.params, **snapshot.constants, "initial_width": snapshot.w}.items():
+        points.setdefault(key, np.full(count, value))
+    integrator = sweep_options.pop("integrator", snapshot.integrator["name"] if snapshot.integrator else None)
+    return run_sweep(normalise_points(points), dt=snapshot.dt, steps=steps - snapshot.step,
+                     integrator=integrator, **sweep_options)
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Inspect or resume a checkpointed island run")
+    parser.add_argument("snapshot", help="snapshot file")
+    parser.add_argument("--resume", type=int, default=None, metavar="STEPS",
+                        help="continue the run up to STEPS total steps and print the final output")
+    args = parser.parse_args(argv)
+
+    snapshot = load_snapshot(args.snapshot)
+    print(snapshot)
+    print(f"t = {snapshot.t:g}, target island width = {snapshot.w:.6g}")
+    print("params: " + ", ".join(f"{key}={value:g}" for key, value in snapshot.params.items()))
+    if snapshot.integrator is not None:
+        print(f"integrator: {snapshot.integrator['name']} (h = {snapshot.integrator['h']})")
+
+    if args.resume is not None:
+        from simulation.runner import run_headless, print_final_output
+        #the path, not the object: run as a script this module is __main__, not simulation.checkpoint
+        print_final_output(run_headless(dt=snapshot.dt, steps=args.resume, restart=args.snapshot))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,278 @@
+# simulation/ensemble.py
+
+#Monte Carlo ensembles: uncertain parameters are sampled, the members are evolved in batches through the
+#same chunked MRE update as the sweeps, and only running statistics are kept. No trajectories and no
+#full per-member result table are ever held, so the memory use is set by chunk_size and reservoir_size,
+#not by the number of members.
+
+#Usage (from the project folder):
+#   python -m simulation.ensemble --members 1000000 --method lhs --seed 1
+#   python -m simulation.ensemble --D normal:1.0:0.2:0.1:2 --bootstrap uniform:0:1 --members 100000
+
+#Distributions are given per parameter as
+#   ("uniform", low, high)
+#   ("normal", mean, std)              optionally ("normal", mean, std, low, high) to clip the tails
+#   a number                           held fixed
+#and method picks how the underlying uniform variates are drawn:
+#   "random" - independent draws
+#   "lhs"    - Latin hypercube: each chunk is stratified into equal-probability bins in every parameter
+
+import time
+
+import numpy as np
+
+from simulation.sweep import SWEEP_KEYS, RESULT_KEYS, normalise_points, _run_chunk
+from physics.integrators import make_integrator
+from physics.confinement import tau_E_from_width
+
+#The uncertain inputs, spread over the slider ranges of the interactive UI
+DEFAULT_DISTRIBUTIONS = {
+    "bootstrap": ("uniform", 0.0, 1.0),
+    "delta_scale": ("uniform", 0.0, 20.0),
+    "D": ("uniform", 0.1, 2.0),
+    "initial_width": ("uniform", 0.001, 0.05),
+}
+
+METHODS = ("random", "lhs")
+
+TAU_E_FLOOR = 0.01  #the clamp in tau_E_from_width
+
+#Statistics kept for every member metric; min_tau_E is the lowest tau_E a member reached during its run
+ENSEMBLE_METRICS = RESULT_KEYS + ("min_tau_E",)
+
+
+#Inverse of the standard normal CDF (Acklam's rational approximation, relative error < 1.2e-9)
+def normal_ppf(u):
+    a = (-3.969683028665376e+01, 2.209460984245205e+02, -2.759285104469687e+02,
+         1.383577518672690e+02, -3.066479806614716e+01, 2.506628277459239e+00)
+    b = (-5.447609879822406e+01, 1.615858368580409e+02, -1.556989798598866e+02,
+         6.680131188771972e+01, -1.328068155288572e+01)
+    c = (-7.784894002430293e-03, -3.223964580411365e-01, -2.400758277161838e+00,
+         -2.549732539343734e+00, 4.374664141464968e+00, 2.938163982698783e+00)
+    d = (7.784695709041462e-03, 3.224671290700398e-01, 2.445134137142996e+00, 3.754408661907416e+00)
+
+    u = np.clip(np.asarray(u, dtype=float), 1e-300, 1 - 1e-16)
+    x = np.empty_like(u)
+
+    low = u < 0.02425
+    high = u > 1 - 0.02425
+    mid = ~(low | high)
+
+    q = u[mid] - 0.5
+    r = q * q
+    x[mid] = (((((a[0] * r + a[1]) * r + a[2]) * r + a[3]) * r + a[4]) * r + a[5]) * q / \
+             (((((b[0] * r + b[1]) * r + b[2]) * r + b[3]) * r + b[4]) * r + 1)
+
+    for mask, sign in ((low, 1.0), (high, -1.0)):
+        tail = u[mask] if sign > 0 else 1 - u[mask]
+        q = np.sqrt(-2 * np.log(tail))
+        x[mask] = sign * (((((c[0] * q + c[1]) * q + c[2]) * q + c[3]) * q + c[4]) * q + c[5]) / \
+                  ((((d[0] * q + d[1]) * q + d[2]) * q + d[3]) * q + 1)
+    return x
+
+
+#size x k uniform variates in [0, 1), independent or Latin hypercube
+def _uniform_variates(rng, size, k, method):
+    if method == "random":
+        return rng.random((size, k))
+    if method == "lhs":
+        strata = np.argsort(rng.random((size, k)), axis=0)  #an independent permutation per column
+        return (strata + rng.random((size, k))) / size
+    raise ValueError(f"Unknown sampling method '{method}', choose from {', '.join(METHODS)}")
+
+
+def _transform(u, spec):
+    kind = spec[0]
+    if kind == "uniform":
+        _, low, high = spec
+        return low + (high - low) * u
+    if kind == "normal":
+        _, mean, std, *bounds = spec
+        values = mean + std * normal_ppf(u)
+        if bounds:
+            values = np.clip(values, *bounds)
+        return values
+    raise ValueError(f"Unknown distribution '{kind}', use 'uniform' or 'normal'")
+
+
+#size sampled parameter sets as a dict of arrays (fixed numbers are broadcast)
+def sample_parameters(size, distributions=None, method="lhs", seed=None, rng=None):
+    distributions = DEFAULT_DISTRIBUTIONS if distributions is None else distributions
+    unknown = set(distributions) - set(SWEEP_KEYS)
+    if unknown:
+        raise ValueError(f"Unknown ensemble parameter(s): {', '.join(sorted(unknown))}")
+    rng = np.random.default_rng(seed) if rng is None else rng
+
+    sampled = [key for key, spec in distributions.items() if isinstance(spec, (tuple, list))]
+    u = _uniform_variates(rng, size, len(sampled), method)
+    points = {key: np.full(size, float(spec)) for key, spec in distributions.items() if key not in sampled}
+    for column, key in enumerate(sampled):
+        points[key] = _transform(u[:, column], distributions[key])
+    return points
+
+
+#Running count / mean / variance / min / max (merged chunk by chunk, Chan et al.) plus a uniform
+#reservoir sample for quantiles and exceedance probabilities. Quantiles are exact while the number of
+#values seen is at most reservoir_size.
+class StreamingStats:
+    def __init__(self, reservoir_size=100_000, seed=None):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+        self.reservoir = np.empty(reservoir_size)
+        self._rng = np.random.default_rng(seed)
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float).ravel()
+        n_b = len(values)
+        if n_b == 0:
+            return
+        mean_b = float(values.mean())
+        m2_b = float(((values - mean_b) ** 2).sum())
+        n_a = self.count
+        n = n_a + n_b
+        delta = mean_b - self.mean
+        self.mean += delta * n_b / n
+        self._m2 += m2_b + delta * delta * n_a * n_b / n
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        self._sample(values)
+        self.count = n
+
+    #Algorithm R for a whole chunk: value i (0-based over the stream) replaces slot j ~ U{0..i} if j < k
+    def _sample(self, values):
+        k = len(self.reservoir)
+        start = self.count
+        fill = max(min(k - start, len(values)), 0)
+        self.reservoir[start:start + fill] = values[:fill]
+        rest = values[fill:]
+        if len(rest) == 0:
+            return
+        index = np.arange(start + fill, start + fill + len(rest))
+        slots = (self._rng.random(len(rest)) * (index + 1)).astype(np.int64)
+        keep = slots < k
+        slots, rest = slots[keep], rest[keep]
+        #later values win when two land in the same slot, as in the sequential algorithm
+        last = len(slots) - 1 - np.unique(slots[::-1], return_index=True)[1]
+        self.reservoir[slots[last]] = rest[last]
+
+    @property
+    def sample(self):
+        return self.reservoir[:min(self.count, len(self.reservoir))]
+
+    @property
+    def variance(self):
+        return self._m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def std(self):
+        return self.variance ** 0.5
+
+    def quantiles(self, q):
+        return np.quantile(self.sample, q) if self.count else np.full(np.shape(q), np.nan)
+
+    #Estimated P(value > threshold) (or < threshold with below=True)
+    def exceedance(self, threshold, below=False):
+        if not self.count:
+            return np.nan
+        sample = self.sample
+        return float(np.mean(sample < threshold if below else sample > threshold))
+
+    def summary(self, q=(0.05, 0.5, 0.95)):
+        return {"count": self.count, "mean": self.mean, "std": self.std, "min": self.min, "max": self.max,
+                "quantiles": dict(zip(q, np.atleast_1d(self.quantiles(q)).tolist()))}
+
+
+#Runs a Monte Carlo ensemble of `members` and returns streaming statistics of every metric in
+#ENSEMBLE_METRICS together with the probability that a member hits the tau_E floor at any step.
+#Members are sampled and evolved chunk_size at a time; chunk c uses its own generator spawned from `seed`,
+#so results depend on (seed, chunk_size) only and not on anything run before.
+def run_ensemble(members, distributions=None, method="lhs", seed=0, dt=0.1, steps=50, chunk_size=1 << 16,
+                 integrator=None, quantiles=(0.05, 0.5, 0.95), reservoir_size=100_000, tau_floor=TAU_E_FLOOR,
+                 progress=None):
+    seeds = np.random.SeedSequence(seed)
+    reservoir_seeds = seeds.spawn(len(ENSEMBLE_METRICS))
+    stats = {key: StreamingStats(reservoir_size, reservoir_seeds[i]) for i, key in enumerate(ENSEMBLE_METRICS)}
+    floor_hits = 0
+    n_chunks = -(-members // chunk_size)
+    start = time.perf_counter()
+
+    for index, chunk_seed in enumerate(seeds.spawn(n_chunks)):
+        size = min(chunk_size, members - index * chunk_size)
+        chunk = normalise_points(sample_parameters(size, distributions, method, rng=np.random.default_rng(chunk_seed)))
+
+        min_tau = np.full(size, np.inf)
+
+        def on_step(t, w):
+            np.minimum(min_tau, tau_E_from_width(w), out=min_tau)
+
+        chunk_integrator = None if integrator is None else make_integrator(integrator)
+        results = _run_chunk(chunk, dt, steps, chunk_integrator, on_step=on_step)
+        results["min_tau_E"] = min_tau
+
+        for key in ENSEMBLE_METRICS:
+            stats[key].update(results[key])
+        floor_hits += int(np.count_nonzero(min_tau <= tau_floor))
+
+        if progress is not None:
+            progress(index, n_chunks, stats["final_width"].count, time.perf_counter() - start)
+
+    return {
+        "members": members,
+        "method": method,
+        "seed": seed,
+        "tau_floor_probability": floor_hits / members if members else np.nan,
+        "tau_floor_hits": floor_hits,
+        "stats": stats,
+        "summary": {key: stats[key].summary(quantiles) for key in ENSEMBLE_METRICS},
+        "elapsed": time.perf_counter() - start,
+    }
+
+
+def print_summary(result):
+    print(f"\n--- ENSEMBLE OF {result['members']} MEMBERS ({result['method']}, seed {result['seed']}) ---")
+    first = next(iter(result["summary"].values()))
+    q_names = [f"q{100 * q:g}" for q in first["quantiles"]]
+    print(f"{'metric':16s} {'mean':>12s} {'std':>12s} " + " ".join(f"{name:>12s}" for name in q_names))
+    for key, summary in result["summary"].items():
+        values = [summary["mean"], summary["std"], *summary["quantiles"].values()]
+        print(f"{key:16s} " + " ".join(f"{value:12.5g}" for value in values))
+    print(f"P(tau_E hits floor): {result['tau_floor_probability']:.4g} "
+          f"({result['tau_floor_hits']} members) in {result['elapsed']:.2f} s")
+
+
+#"uniform:low:high", "normal:mean:std[:low:high]" or a plain number
+def _parse_distribution(text):
+    kind, *numbers = text.split(":")
+    if not numbers:
+        return float(kind)
+    return (kind, *map(float, numbers))
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Monte Carlo ensemble of the island model")
+    parser.add_argument("--members", type=int, default=100_000)
+    parser.add_argument("--method", choices=METHODS, default="lhs")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--dt", type=float, default=0.1)
+    parser.add_argument("--steps", type=int, default=50)
+    parser.add_argument("--chunk-size", type=int, default=1 << 16)
+    parser.add_argument("--integrator", default=None)
+    for key in SWEEP_KEYS:
+        parser.add_argument(f"--{key}", type=_parse_distribution, default=None,
+                            help="uniform:low:high, normal:mean:std[:low:high] or a fixed value")
+    args = parser.parse_args(argv)
+
+    given = {key: getattr(args, key) for key in SWEEP_KEYS if getattr(args, key) is not None}
+    distributions = {**DEFAULT_DISTRIBUTIONS, **given}
+    result = run_ensemble(args.members, distributions, args.method, args.seed, args.dt, args.steps,
+                          args.chunk_size, args.integrator)
+    print_summary(result)
+
+
+if __name__ == "__main__":
+    main()
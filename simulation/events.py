@@ -0,0 +1,219 @@
+# simulation/events.py
+
+#Events watched during island evolution, and what to do when one fires.
+#Kinds:
+#   saturation   - every island has |dw/dt| below tol (the run has nothing left to show)
+#   tau_floor    - tau_E has hit its clamp (physics/confinement.py), confinement is lost
+#   overlap      - two radially adjacent islands overlap (Chirikov parameter >= 1)
+#   width_bounds - an island width leaves [w_min, w_max], e.g. negative or wider than the minor radius a=10
+#Actions:
+#   stop   - end the run (in a batch: freeze that member and stop spending steps on it)
+#   record - note it in the event log and carry on
+#   shrink - redo the step as 2, 4, ... max_substeps substeps; if it still fires at max_substeps the run
+#            is stopped, since the state is not physical at any step size
+
+#An event fires once its condition has held for `hold` consecutive steps; saturation defaults to 3 so one
+#slow step does not end a run. "record" events are logged on the step they start to hold, not every step.
+
+#   run_headless(params, events=standard_events())
+#   run_sweep(points, events=[Event("saturation", tol=1e-4), Event("width_bounds", "stop")])
+
+import numpy as np
+
+from physics.confinement import tau_E_from_width
+
+EVENT_KINDS = ("saturation", "tau_floor", "overlap", "width_bounds")
+ACTIONS = ("stop", "record", "shrink")
+
+TAU_E_FLOOR = 0.01  #the clamp in tau_E_from_width
+MINOR_RADIUS = 10   #a in compute_tau_E
+
+
+class Event:
+    def __init__(self, kind, action="stop", tol=1e-3, hold=None, floor=TAU_E_FLOOR, w_min=0.0,
+                 w_max=MINOR_RADIUS, max_substeps=16, name=None):
+        if kind not in EVENT_KINDS:
+            raise ValueError(f"Unknown event '{kind}', choose from {', '.join(EVENT_KINDS)}")
+        if action not in ACTIONS:
+            raise ValueError(f"Unknown event action '{action}', choose from {', '.join(ACTIONS)}")
+        self.kind = kind
+        self.action = action
+        self.tol = tol
+        self.hold = (3 if kind == "saturation" else 1) if hold is None else max(int(hold), 1)
+        self.floor = floor
+        self.w_min = w_min
+        self.w_max = w_max
+        self.max_substeps = max_substeps
+        self.name = name or kind
+
+    #Cheap test over the whole batch (a reduction or two): False means the condition holds for no member,
+    #so the per-member check can be skipped. Only the rare events have one.
+    def possible(self, w, tau_E=None):
+        if not w.size:
+            return False
+        if self.kind == "width_bounds":
+            return w.min() < self.w_min or w.max() > self.w_max
+        if self.kind == "tau_floor":
+            return (tau_E_from_width(w.max()) if tau_E is None else np.min(tau_E)) <= self.floor
+        return True
+
+    #Mask of the members whose condition holds. w / w_prev are (members, islands) widths after and before
+    #a step of length dt, sigma is (members, island pairs) or None. tau_E is (members,); without it tau_E
+    #follows from each member's widest island as in the sweeps.
+    def check(self, w, w_prev, dt, tau_E=None, sigma=None):
+        if self.kind == "saturation":
+            if w.shape[1] == 1:
+                return np.abs(w[:, 0] - w_prev[:, 0]) < self.tol * dt
+            return np.all(np.abs(w - w_prev) < self.tol * dt, axis=1)
+        if self.kind == "tau_floor":
+            if tau_E is None:
+                tau_E = tau_E_from_width(w.max(axis=1))
+            return np.asarray(tau_E) <= self.floor
+        if self.kind == "overlap":
+            if sigma is None or sigma.shape[1] == 0:
+                return np.zeros(len(w), dtype=bool)
+            return np.any(sigma >= 1, axis=1)
+        if w.shape[1] == 1:
+            return (w[:, 0] < self.w_min) | (w[:, 0] > self.w_max)
+        return np.any((w < self.w_min) | (w > self.w_max), axis=1)
+
+    #Everything that changes the outcome of a run, for cache keys
+    def spec(self):
+        return [self.kind, self.action, float(self.tol), self.hold, float(self.floor), float(self.w_min),
+                float(self.w_max), int(self.max_substeps), self.name]
+
+    def __repr__(self):
+        return f"Event({self.kind!r}, {self.action!r})"
+
+
+#The events used by the interactive run: stop once saturated, shrink the step when a width goes
+#out of bounds, and log confinement loss and island overlap
+def standard_events(tol=1e-3):
+    return [Event("saturation", "stop", tol=tol), Event("width_bounds", "shrink"),
+            Event("tau_floor", "record"), Event("overlap", "record")]
+
+
+#Event state of `members` runs evolved together (1 for run_headless).
+#The arrays passed to shrink_mask / update are in batch order: entry i is member slots[i]. A batch that
+#drops its stopped members calls compact(keep) so the monitor's per-entry state follows it.
+class EventMonitor:
+    def __init__(self, events, members=1):
+        self.events = list(events)
+        self.members = members
+        self.slots = np.arange(members)
+        self.active = np.ones(members, dtype=bool)
+        self.stop_time = np.full(members, np.nan)
+        self.stop_event = np.full(members, -1, dtype=np.int64)  #index into events, -1 = ran to the end
+        self.log = []  #(t, event name, members it fired for, action)
+        #consecutive steps each event's condition has held (events with hold=1 only need the last step's hit)
+        self._held = [np.zeros(members, dtype=np.int64 if event.hold > 1 else bool) for event in self.events]
+        self._shrink = [i for i, event in enumerate(self.events) if event.action == "shrink"]
+        self._holding = [False] * len(self.events)  #whether _held[i] may have nonzero entries
+        self._needs_sigma = any(event.kind == "overlap" for event in self.events)
+
+    @property
+    def shrinks(self):
+        return bool(self._shrink)
+
+    @property
+    def max_substeps(self):
+        return max([self.events[i].max_substeps for i in self._shrink] + [1])
+
+    #Chirikov parameters (as in physics.confinement.chirikov_parameters) of each member's islands, radii
+    #sorted ascending; only computed if an overlap event needs them
+    def sigma(self, w, radii):
+        if not self._needs_sigma or w.shape[1] < 2:
+            return None
+        with np.errstate(divide="ignore"):
+            return (w[:, :-1] + w[:, 1:]) / (2 * np.abs(np.diff(radii)))
+
+    #Mask of the given entries for which a shrink event fires on the trial step
+    def shrink_mask(self, w, w_prev, dt, tau_E=None, sigma=None):
+        mask = np.zeros(len(w), dtype=bool)
+        for i in self._shrink:
+            event = self.events[i]
+            if event.possible(w, tau_E):
+                mask |= event.check(w, w_prev, dt, tau_E, sigma)
+        return mask
+
+    #Logs a step that had to be split into substeps (or failed to settle even then, which stops the
+    #members). positions are batch entries.
+    def note_shrink(self, t, positions, substeps, failed):
+        members = self.slots[positions]
+        name = ",".join(self.events[i].name for i in self._shrink)
+        self.log.append((t, name, members, "stop" if failed else f"shrink x{substeps}"))
+        if failed:
+            self._stop(t, members, self._shrink[0])
+
+    #Checks the step that ended at time t for every batch entry and returns the mask of entries that stop
+    #now. live masks out entries that have stopped already but are still in the batch.
+    def update(self, t, w, w_prev, dt, tau_E=None, sigma=None, live=None):
+        stopping = np.zeros(len(w), dtype=bool)
+        for i, event in enumerate(self.events):
+            if event.action == "shrink" or (event.kind == "overlap" and sigma is None):
+                continue
+            held = self._held[i]
+            if not event.possible(w, tau_E):
+                if self._holding[i]:
+                    held[:] = 0
+                    self._holding[i] = False
+                continue
+            hit = event.check(w, w_prev, dt, tau_E, sigma)
+            self._holding[i] = True
+            if event.hold > 1:
+                held += 1
+                held *= hit
+                fired = held == event.hold
+            else:
+                fired = hit & ~held if event.action == "record" else hit
+                held[:] = hit
+            if live is not None:
+                fired &= live
+            if event.action == "stop":
+                fired &= ~stopping
+                stopping |= fired
+            if fired.any():
+                members = self.slots[fired]
+                self.log.append((t, event.name, members, event.action))
+                if event.action == "stop":
+                    self._stop(t, members, i)
+        return stopping
+
+    #Keeps only the batch entries where keep is True
+    def compact(self, keep):
+        self.slots = self.slots[keep]
+        self._held = [held[keep] for held in self._held]
+
+    def _stop(self, t, members, event_index):
+        members = members[self.active[members]]
+        self.active[members] = False
+        self.stop_time[members] = t
+        self.stop_event[members] = event_index
+
+    #(t, event name, action) of everything that happened to one member
+    def member_log(self, member=0):
+        return [(t, name, action) for t, name, members, action in self.log if member in members]
+
+    #Hold counters, pending-hold flags and log of a single run (member 0), for checkpoints
+    #(simulation/checkpoint.py). specs identify the events so a restart only resumes matching ones.
+    def state(self):
+        return {"specs": [event.spec() for event in self.events],
+                "held": [held.tolist() for held in self._held], "holding": list(self._holding),
+                "log": [[float(t), name, action] for t, name, action in self.member_log(0)]}
+
+    def restore(self, state):
+        if state["specs"] != [event.spec() for event in self.events]:
+            raise ValueError("The checkpoint was taken with different events")
+        self._held = [np.array(held, dtype=current.dtype) for held, current in zip(state["held"], self._held)]
+        self._holding = list(state["holding"])
+        self.log = [(t, name, np.zeros(1, dtype=np.int64), action) for t, name, action in state["log"]]
+
+    #JSON-friendly summary of a single run's events (member 0)
+    def as_dict(self):
+        index = int(self.stop_event[0])
+        return {
+            "stopped": index >= 0,
+            "stop_time": None if index < 0 else float(self.stop_time[0]),
+            "stop_event": None if index < 0 else self.events[index].name,
+            "log": [[float(t), name, action] for t, name, action in self.member_log(0)],
+        }
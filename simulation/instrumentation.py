@@ -0,0 +1,152 @@
+# simulation/instrumentation.py
+
+#Opt-in timers and counters for finding where a run spends its time.
+#The shared `instrumentation` object is disabled by default; while disabled, phase() hands back one
+#shared no-op context manager and count() returns straight away, so the hooks left in the runner,
+#renderer and cache cost next to nothing.
+
+#Typical use:
+#   from simulation.instrumentation import instrumentation
+#   instrumentation.enable(profile=True)
+#   ... run_headless(...) / main.run_simulation(...) ...
+#   print(instrumentation.summary())
+#   instrumentation.dump("run")   -> run.prof (cProfile, for snakeviz / flameprof / gprof2dot)
+#                                    run.folded (phase stacks in flamegraph.pl "collapsed" format)
+
+#Setting ISLAND_PROFILE=1 in the environment enables it at import time.
+
+import os
+import threading
+import time
+from contextlib import nullcontext
+
+_NO_OP = nullcontext()
+
+
+class _Phase:
+    __slots__ = ("instr", "name", "start", "child_time")
+
+    def __init__(self, instr, name):
+        self.instr = instr
+        self.name = name
+
+    def __enter__(self):
+        self.child_time = 0.0
+        self.instr._stack().append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        stack = self.instr._stack()
+        stack.pop()
+        path = ";".join([frame.name for frame in stack] + [self.name])
+        self.instr._record(self.name, path, elapsed, elapsed - self.child_time)
+        if stack:
+            stack[-1].child_time += elapsed
+        return False
+
+
+class Instrumentation:
+    def __init__(self):
+        self.enabled = False
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._profiler = None
+        self.reset()
+
+    def reset(self):
+        self.timers = {}    #phase name -> [calls, total seconds]
+        self.stacks = {}    #"outer;inner" -> self seconds (for flame graphs)
+        self.counters = {}
+        self._started = time.perf_counter()
+
+    def enable(self, profile=False):
+        self.enabled = True
+        self.reset()
+        if profile:
+            import cProfile
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+
+    def disable(self):
+        self.enabled = False
+        if self._profiler is not None:
+            self._profiler.disable()
+
+    def _stack(self):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _record(self, name, path, elapsed, self_time):
+        with self._lock:
+            entry = self.timers.setdefault(name, [0, 0.0])
+            entry[0] += 1
+            entry[1] += elapsed
+            self.stacks[path] = self.stacks.get(path, 0.0) + self_time
+
+    #Context manager timing one phase; phases nest
+    def phase(self, name):
+        if not self.enabled:
+            return _NO_OP
+        return _Phase(self, name)
+
+    def count(self, name, n=1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    #Wraps a callable so each call is timed as `name` and counted under `counter`
+    def wrap(self, name, func, counter=None):
+        if not self.enabled:
+            return func
+        counter = counter or name
+
+        def wrapped(*args, **kwargs):
+            self.count(counter)
+            with self.phase(name):
+                return func(*args, **kwargs)
+
+        return wrapped
+
+    # --- reporting ---
+
+    def summary(self):
+        wall = time.perf_counter() - self._started
+        lines = [f"{'phase':28s} {'calls':>9s} {'total s':>10s} {'mean us':>10s} {'% wall':>7s}"]
+        for name, (calls, total) in sorted(self.timers.items(), key=lambda item: -item[1][1]):
+            lines.append(f"{name:28s} {calls:9d} {total:10.4f} {total / calls * 1e6:10.2f} "
+                         f"{100 * total / wall if wall else 0:7.1f}")
+        if self.counters:
+            lines.append("")
+            lines.append(f"{'counter':28s} {'value':>9s}")
+            for name, value in sorted(self.counters.items()):
+                lines.append(f"{name:28s} {value:9d}")
+        lines.append(f"\nwall time since enable: {wall:.4f} s")
+        return "\n".join(lines)
+
+    #Writes <prefix>.folded (always) and <prefix>.prof (when enabled with profile=True)
+    def dump(self, prefix):
+        written = []
+        folded = f"{prefix}.folded"
+        with open(folded, "w") as fh:
+            for path, seconds in sorted(self.stacks.items()):
+                fh.write(f"{path} {max(int(seconds * 1e6), 0)}\n")  #microseconds as sample counts
+        written.append(folded)
+
+        if self._profiler is not None:
+            self._profiler.disable()
+            self._profiler.dump_stats(f"{prefix}.prof")
+            written.append(f"{prefix}.prof")
+            if self.enabled:
+                self._profiler.enable()
+        return written
+
+
+instrumentation = Instrumentation()
+
+if os.environ.get("ISLAND_PROFILE"):
+    instrumentation.enable(profile=True)
@@ -0,0 +1,410 @@
+# simulation/optimize.py
+
+#Optimisation of the island model: find the bootstrap, delta_scale, D and initial_width within bounds that
+#maximise the final fusion power (or minimise the saturated island width).
+#   "gradient" - multi-start projected gradient ascent. Gradients are analytic: the MRE sensitivities
+#                S = dw/dp are stepped alongside w (dS/dt = df/dw * S + df/dp), or, for steady_state=True,
+#                taken from the root itself (dw*/dp = -(df/dp) / (df/dw)). Each iteration line-searches
+#                all starts over several step lengths in one batch.
+#   "cmaes"    - CMA-ES; one generation is one batch
+#   "bayes"    - Gaussian process surrogate with a UCB acquisition; batches are picked with the kriging
+#                believer (each pick shrinks the surrogate's uncertainty before the next one is chosen)
+#Every candidate population is evaluated as one batched sweep (or over a process pool with workers > 1)
+#and evaluated points are memoised, so revisited candidates cost nothing.
+
+#Usage (from the project folder):
+#   python -m simulation.optimize --method cmaes --evals 300
+#   python -m simulation.optimize --method gradient --objective final_width --steady-state
+
+import numpy as np
+
+from physics.mre_kernel import default_kernel, delta_prime, W_FLOOR
+from physics.confinement import tau_E_from_width
+from physics.fusion_output import compute_fusion_power
+from simulation.sweep import SWEEP_KEYS, ISLAND_Q, ISLAND_M, ISLAND_N, normalise_points, run_sweep
+from simulation.ensemble import DEFAULT_DISTRIBUTIONS
+
+DEFAULT_BOUNDS = {key: spec[1:] for key, spec in DEFAULT_DISTRIBUTIONS.items()}
+
+METHODS = ("gradient", "cmaes", "bayes")
+
+#Objective -> +1 to maximise, -1 to minimise
+OBJECTIVES = {"power": 1, "final_width": -1}
+
+
+# --- analytic sensitivities ---
+
+#df/dp of the MRE for every optimised parameter, at (unclamped) width w. columns as from normalise_points.
+def _mre_partials(w, columns, names):
+    wc = np.maximum(w, W_FLOOR)
+    partials = {
+        "bootstrap": columns["C"] + 0 * w,
+        "delta_scale": columns["A"] * delta_prime(ISLAND_Q, ISLAND_M, ISLAND_N, 1.0) + 0 * w,
+        "D": -wc * wc,
+        "initial_width": 0 * w,
+    }
+    return np.column_stack([partials[name] for name in names])
+
+
+def _kernel_inputs(columns):
+    return {"A": columns["A"], "B": columns["B"], "C": columns["C"], "D": columns["D"],
+            "delta_prime": delta_prime(ISLAND_Q, ISLAND_M, ISLAND_N, columns["delta_scale"]),
+            "bootstrap": columns["bootstrap"]}
+
+
+#Final width and dw_final/dp after `steps` forward Euler steps (the default stepping of run_sweep).
+#The sensitivities are stepped with the same scheme, so they are the exact derivative of what run_sweep
+#returns, not an approximation of the continuous one.
+def width_sensitivities(points, names, dt=0.1, steps=50):
+    columns = normalise_points(points)
+    rhs, jac = default_kernel.bind(**_kernel_inputs(columns))
+    w = columns["initial_width"].copy()
+    S = np.zeros((len(w), len(names)))
+    if "initial_width" in names:
+        S[:, names.index("initial_width")] = 1.0
+
+    for t in range(steps):
+        f_w = jac(t * dt, w)
+        f_p = _mre_partials(w, columns, names)
+        w_next = w + rhs(t * dt, w) * dt
+        S += (f_w[:, None] * S + f_p) * dt
+        w = w_next
+    return w, S
+
+
+#Saturated width and dw*/dp from the implicit function theorem; zero gradient where no stable root exists
+def steady_state_sensitivities(points, names):
+    from simulation.steady_state import run_steady_state
+
+    results = run_steady_state(points)
+    w = results["final_width"]
+    stable = results["stable"]
+    w_safe = np.where(stable, w, 1.0)
+    f_w = default_kernel.jacobian(w_safe, **_kernel_inputs(results))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        S = -_mre_partials(w_safe, results, names) / f_w[:, None]
+    S[~stable] = 0.0
+    return w, S
+
+
+#d(metric)/d(width) for the result columns, elementwise
+def _metric_slope(objective, width):
+    if objective == "final_width":
+        return np.ones_like(width)
+    #compute_fusion_power is linear in tau_E, and tau_E = 1 - w / 10 above its floor
+    tau_E = tau_E_from_width(width)
+    return np.where(tau_E > 0.01, -compute_fusion_power(1.0) / 10, 0.0)
+
+
+# --- memoised batch objective ---
+
+#Objective over the unit cube: x[i] in [0, 1] maps linearly onto bounds[names[i]].
+#Values are returned as scores to maximise (sign * metric). fixed holds any other sweep keys constant.
+class Objective:
+    def __init__(self, bounds=None, objective="power", steady_state=False, dt=0.1, steps=50, integrator=None,
+                 workers=1, fixed=None):
+        bounds = DEFAULT_BOUNDS if bounds is None else bounds
+        unknown = set(bounds) - set(SWEEP_KEYS)
+        if unknown:
+            raise ValueError(f"Unknown optimisation parameter(s): {', '.join(sorted(unknown))}")
+        if objective not in OBJECTIVES:
+            raise ValueError(f"Unknown objective '{objective}', choose from {', '.join(OBJECTIVES)}")
+
+        self.names = list(bounds)
+        self.lower = np.array([bounds[key][0] for key in self.names], dtype=float)
+        self.upper = np.array([bounds[key][1] for key in self.names], dtype=float)
+        self.objective = objective
+        self.sign = OBJECTIVES[objective]
+        self.steady_state = steady_state
+        self.dt = dt
+        self.steps = steps
+        self.integrator = integrator
+        self.workers = workers
+        self.fixed = dict(fixed or {})
+
+        self.memo = {}           #parameter row bytes -> metric
+        self.gradient_memo = {}  #parameter row bytes -> (metric, d metric / dp)
+        self.evaluations = 0     #model runs actually made
+        self.cache_hits = 0
+
+    def to_params(self, x):
+        return self.lower + (self.upper - self.lower) * np.clip(x, 0, 1)
+
+    def _points(self, params):
+        return {**self.fixed, **{key: params[:, i] for i, key in enumerate(self.names)}}
+
+    def _run(self, params):
+        points = self._points(params)
+        if self.steady_state:
+            from simulation.steady_state import run_steady_state
+            return run_steady_state(points)[self.objective]
+        if self.workers > 1 and len(params) > 1:
+            from simulation.parallel import run_parallel
+            chunk_size = -(-len(params) // self.workers)
+            return run_parallel(points, dt=self.dt, steps=self.steps, chunk_size=chunk_size,
+                                max_workers=self.workers, integrator=self.integrator)[self.objective]
+        return run_sweep(points, dt=self.dt, steps=self.steps, integrator=self.integrator)[self.objective]
+
+    #Metric of every row of x (n, k); only rows not seen before are run, all of them in one batch
+    def metric(self, x):
+        params = self.to_params(np.atleast_2d(x))
+        keys = [row.tobytes() for row in params]
+        missing = {}
+        for i, key in enumerate(keys):
+            if key not in self.memo and key not in missing:
+                missing[key] = i
+        self.cache_hits += len(keys) - len(missing)
+        if missing:
+            values = self._run(params[list(missing.values())])
+            self.evaluations += len(missing)
+            self.memo.update(zip(missing, np.asarray(values, dtype=float)))
+        return np.array([self.memo[key] for key in keys])
+
+    def __call__(self, x):
+        return self.sign * self.metric(x)
+
+    #Scores and their gradients with respect to x (n, k), from the analytic MRE sensitivities
+    def value_and_gradient(self, x):
+        if self.integrator is not None and not self.steady_state:
+            raise ValueError("Analytic gradients follow the forward Euler stepping; use integrator=None "
+                             "or steady_state=True")
+        params = self.to_params(np.atleast_2d(x))
+        keys = [row.tobytes() for row in params]
+        missing = {}
+        for i, key in enumerate(keys):
+            if key not in self.gradient_memo and key not in missing:
+                missing[key] = i
+        self.cache_hits += len(keys) - len(missing)
+
+        if missing:
+            points = self._points(params[list(missing.values())])
+            if self.steady_state:
+                width, S = steady_state_sensitivities(points, self.names)
+            else:
+                width, S = width_sensitivities(points, self.names, self.dt, self.steps)
+            self.evaluations += len(missing)
+            slope = _metric_slope(self.objective, width)
+            metric = width if self.objective == "final_width" else compute_fusion_power(tau_E_from_width(width))
+            for j, key in enumerate(missing):
+                self.memo[key] = float(metric[j])
+                self.gradient_memo[key] = (float(metric[j]), slope[j] * S[j])
+
+        values = np.array([self.gradient_memo[key][0] for key in keys])
+        grads = np.array([self.gradient_memo[key][1] for key in keys])
+        #chain rule through the unit-cube scaling; x outside [0, 1] is clipped, so no gradient there
+        inside = (x >= 0) & (x <= 1)
+        return self.sign * values, self.sign * grads * (self.upper - self.lower) * inside
+
+
+# --- methods ---
+
+def _gradient_ascent(objective, max_evals, rng, starts=8, step=0.5, shrink=0.5, line_points=6, tol=1e-6):
+    k = len(objective.names)
+    x = rng.random((starts, k))
+    active = np.ones(starts, dtype=bool)
+    history = []
+    alphas = step * shrink ** np.arange(line_points)
+
+    while active.any() and objective.evaluations < max_evals:
+        idx = np.flatnonzero(active)
+        value, grad = objective.value_and_gradient(x[idx])
+        #steps are measured in the unit cube along the max-norm direction, so the line search is scale free
+        scale = np.abs(grad).max(axis=1)
+        stalled = scale == 0
+        direction = grad / np.where(stalled, 1, scale)[:, None]
+
+        trial = np.clip(x[idx][:, None, :] + alphas[None, :, None] * direction[:, None, :], 0, 1)
+        trial_value = objective(trial.reshape(-1, k)).reshape(len(idx), line_points)
+        best = trial_value.argmax(axis=1)
+        improved = (trial_value[np.arange(len(idx)), best] > value) & ~stalled
+
+        moved = np.abs(trial[np.arange(len(idx)), best] - x[idx]).max(axis=1)
+        x[idx[improved]] = trial[np.arange(len(idx)), best][improved]
+        active[idx[~improved | (moved < tol)]] = False
+        history.append(float(max(value.max(), trial_value.max())))
+    return history
+
+
+#CMA-ES (Hansen's tutorial formulation) in the unit cube; samples outside it are repaired by clipping
+def _cmaes(objective, max_evals, rng, population=None, sigma=0.3):
+    k = len(objective.names)
+    lam = population or 4 + int(3 * np.log(k))
+    mu = lam // 2
+    weights = np.log(mu + 0.5) - np.log(np.arange(1, mu + 1))
+    weights /= weights.sum()
+    mu_eff = 1 / np.sum(weights ** 2)
+
+    c_c = (4 + mu_eff / k) / (k + 4 + 2 * mu_eff / k)
+    c_s = (mu_eff + 2) / (k + mu_eff + 5)
+    c_1 = 2 / ((k + 1.3) ** 2 + mu_eff)
+    c_mu = min(1 - c_1, 2 * (mu_eff - 2 + 1 / mu_eff) / ((k + 2) ** 2 + mu_eff))
+    damps = 1 + 2 * max(0, np.sqrt((mu_eff - 1) / (k + 1)) - 1) + c_s
+    chi_n = np.sqrt(k) * (1 - 1 / (4 * k) + 1 / (21 * k * k))
+
+    mean = rng.random(k)
+    C = np.eye(k)
+    p_c = np.zeros(k)
+    p_s = np.zeros(k)
+    history = []
+    generation = 0
+
+    while objective.evaluations < max_evals:
+        eigenvalues, B = np.linalg.eigh(C)
+        D = np.sqrt(np.maximum(eigenvalues, 1e-20))
+        z = rng.standard_normal((lam, k))
+        y = (z * D) @ B.T
+        x = np.clip(mean + sigma * y, 0, 1)
+        y = (x - mean) / sigma  #repaired steps drive the update
+
+        fitness = objective(x)
+        order = np.argsort(-fitness, kind="stable")
+        history.append(float(fitness[order[0]]))
+        y_w = weights @ y[order[:mu]]
+        mean = mean + sigma * y_w
+
+        C_inv_sqrt = B @ np.diag(1 / D) @ B.T
+        p_s = (1 - c_s) * p_s + np.sqrt(c_s * (2 - c_s) * mu_eff) * C_inv_sqrt @ y_w
+        generation += 1
+        h_s = np.linalg.norm(p_s) / np.sqrt(1 - (1 - c_s) ** (2 * generation)) < (1.4 + 2 / (k + 1)) * chi_n
+        p_c = (1 - c_c) * p_c + h_s * np.sqrt(c_c * (2 - c_c) * mu_eff) * y_w
+        rank_mu = (y[order[:mu]].T * weights) @ y[order[:mu]]
+        C = ((1 - c_1 - c_mu) * C + c_1 * (np.outer(p_c, p_c) + (1 - h_s) * c_c * (2 - c_c) * C)
+             + c_mu * rank_mu)
+        sigma *= np.exp((c_s / damps) * (np.linalg.norm(p_s) / chi_n - 1))
+        if sigma * np.sqrt(eigenvalues.max()) < 1e-10:
+            break
+    objective(np.clip(mean, 0, 1)[None])  #the final mean is usually the best estimate
+    return history
+
+
+#Zero-mean GP with a squared exponential kernel on normalised scores; the length scale is picked from a
+#small grid by marginal likelihood
+def _gp_fit(X, y, noise=1e-6):
+    y_mean, y_std = y.mean(), y.std() or 1.0
+    t = (y - y_mean) / y_std
+    sq = np.sum((X[:, None, :] - X[None, :, :]) ** 2, axis=-1)
+    best = None
+    for length in (0.05, 0.1, 0.2, 0.4, 0.8):
+        K = np.exp(-0.5 * sq / length ** 2) + noise * np.eye(len(X))
+        try:
+            L = np.linalg.cholesky(K)
+        except np.linalg.LinAlgError:
+            continue
+        alpha = np.linalg.solve(L.T, np.linalg.solve(L, t))
+        evidence = -0.5 * t @ alpha - np.log(np.diag(L)).sum()
+        if best is None or evidence > best[0]:
+            best = (evidence, length, L, alpha)
+    _, length, L, alpha = best
+    return {"X": X, "L": L, "alpha": alpha, "length": length, "y_mean": y_mean, "y_std": y_std}
+
+
+def _gp_predict(gp, Z):
+    Ks = np.exp(-0.5 * np.sum((Z[:, None, :] - gp["X"][None, :, :]) ** 2, axis=-1) / gp["length"] ** 2)
+    V = np.linalg.solve(gp["L"], Ks.T)
+    return Ks @ gp["alpha"], np.maximum(1 - np.sum(V * V, axis=0), 0), V
+
+
+#Batch of `batch` points by GP-UCB with the kriging believer: a pick is assumed to return the surrogate
+#mean, which leaves the mean unchanged and only conditions the variance on it. That conditioning is a
+#rank-one update per pick, so the GP is fitted and solved once per batch.
+def _bayes(objective, max_evals, rng, batch=8, initial=16, beta=2.0, candidates=2048):
+    k = len(objective.names)
+    #Latin hypercube start
+    X = (np.argsort(rng.random((initial, k)), axis=0) + rng.random((initial, k))) / initial
+    y = objective(X)
+    history = [float(y.max())]
+
+    while objective.evaluations < max_evals:
+        best = X[np.argmax(y)]
+        pool = np.concatenate((rng.random((candidates, k)),
+                               np.clip(best + 0.05 * rng.standard_normal((candidates // 4, k)), 0, 1)))
+        gp = _gp_fit(X, y)
+        mean, var, V = _gp_predict(gp, pool)
+        updates = []
+        picks = []
+        for _ in range(min(batch, max_evals - objective.evaluations)):
+            choice = int(np.argmax(mean + beta * np.sqrt(var)))
+            if var[choice] <= 1e-12:
+                break
+            z = pool[choice]
+            cov = np.exp(-0.5 * np.sum((pool - z) ** 2, axis=1) / gp["length"] ** 2) - V.T @ V[:, choice]
+            for c in updates:
+                cov -= c * c[choice]
+            c = cov / np.sqrt(var[choice])
+            var = np.maximum(var - c * c, 0)
+            updates.append(c)
+            picks.append(z)
+
+        if not picks:
+            break
+        picks = np.array(picks)
+        X = np.vstack((X, picks))
+        y = np.append(y, objective(picks))
+        history.append(float(y.max()))
+    return history
+
+
+#Finds the best parameters within bounds. Returns a dict with the best parameters ("params"), the metric
+#there ("value"), the unique model runs made ("evaluations"), memo hits and the best score per iteration.
+#max_evals is a budget of model runs; a method stops at the first batch boundary past it.
+def optimize(method="cmaes", bounds=None, objective="power", max_evals=300, seed=0, steady_state=False,
+             dt=0.1, steps=50, integrator=None, workers=1, fixed=None, **method_options):
+    if method not in METHODS:
+        raise ValueError(f"Unknown optimisation method '{method}', choose from {', '.join(METHODS)}")
+    problem = Objective(bounds, objective, steady_state, dt, steps, integrator, workers, fixed)
+    rng = np.random.default_rng(seed)
+
+    if method == "gradient":
+        history = _gradient_ascent(problem, max_evals, rng, **method_options)
+    elif method == "cmaes":
+        history = _cmaes(problem, max_evals, rng, **method_options)
+    else:
+        history = _bayes(problem, max_evals, rng, **method_options)
+
+    #Best point ever evaluated
+    rows = list(problem.memo)
+    scores = problem.sign * np.array([problem.memo[row] for row in rows])
+    best = np.frombuffer(rows[int(np.argmax(scores))], dtype=float)
+
+    return {
+        "method": method,
+        "objective": objective,
+        "names": problem.names,
+        "params": dict(zip(problem.names, best.tolist())),
+        "value": float(problem.memo[best.tobytes()]),
+        "evaluations": problem.evaluations,
+        "cache_hits": problem.cache_hits,
+        "history": problem.sign * np.array(history),
+    }
+
+
+def print_result(result):
+    print(f"\n--- {result['method'].upper()} OPTIMUM OF {result['objective']} "
+          f"({result['evaluations']} runs, {result['cache_hits']} memo hits) ---")
+    for name, value in result["params"].items():
+        print(f"{name:16s} {value:.6g}")
+    print(f"{result['objective']:16s} {result['value']:.6g}")
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Optimise the island model parameters")
+    parser.add_argument("--method", choices=METHODS, default="cmaes")
+    parser.add_argument("--objective", choices=tuple(OBJECTIVES), default="power")
+    parser.add_argument("--evals", type=int, default=300, help="budget of model runs")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--steady-state", action="store_true",
+                        help="optimise the saturated width instead of the time-stepped run")
+    parser.add_argument("--workers", type=int, default=1, help="evaluate batches over a process pool")
+    parser.add_argument("--dt", type=float, default=0.1)
+    parser.add_argument("--steps", type=int, default=50)
+    args = parser.parse_args(argv)
+
+    result = optimize(args.method, objective=args.objective, max_evals=args.evals, seed=args.seed,
+                      steady_state=args.steady_state, dt=args.dt, steps=args.steps, workers=args.workers)
+    print_result(result)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+# simulation/parallel.py
+
+#Process-pool execution of large sweeps and ensembles.
+#The parameter space is cut into chunks, each chunk is one task handed to one worker, and the chunk
+#results are yielded back in chunk order no matter which worker finishes first.
+
+#Two chunk modes:
+#   "vectorized" - the chunk is evolved as one array computation (simulation.sweep.run_sweep)
+#   "per-run"    - every point is run on its own with run_headless, for custom (picklable) mre solvers
+
+import os
+import time
+
+import numpy as np
+
+from simulation.sweep import SWEEP_KEYS, DEFAULT_PARAMS, DEFAULT_CONSTANTS, RESULT_KEYS, run_sweep
+from simulation.runner import run_headless
+
+
+#Yields consecutive chunks of at most chunk_size points. The parameter columns are only broadcast (views),
+#each chunk is copied out as it is needed, so a sweep never holds more than the chunks in flight.
+def chunk_points(points, chunk_size):
+    columns = {}
+    for key in SWEEP_KEYS:
+        default = DEFAULT_PARAMS.get(key, DEFAULT_CONSTANTS.get(key))
+        columns[key] = np.atleast_1d(np.asarray(points.get(key, default), dtype=float))
+    columns = dict(zip(columns, np.broadcast_arrays(*columns.values())))
+    total = len(columns["initial_width"])
+    for start in range(0, total, chunk_size):
+        yield {key: np.ascontiguousarray(col[start:start + chunk_size]) for key, col in columns.items()}
+
+
+#Number of points a sweep over `points` has, without building its columns
+def count_points(points):
+    shapes = [np.shape(points[key]) for key in SWEEP_KEYS if key in points]
+    return int(np.prod(np.broadcast_shapes((1,), *shapes)))
+
+
+def _run_per_point(chunk, dt, steps, mre_solver, integrator):
+    count = len(chunk["initial_width"])
+    results = {key: np.empty(count) for key in RESULT_KEYS}
+
+    for i in range(count):
+        params = {key: float(chunk[key][i]) for key in DEFAULT_PARAMS}
+        constants = {key: float(chunk[key][i]) for key in SWEEP_KEYS if key not in DEFAULT_PARAMS}
+        run = run_headless(params, dt=dt, steps=steps, constants=constants, mre_solver=mre_solver,
+                           integrator=integrator)
+        for key in RESULT_KEYS:
+            results[key][i] = run[key]
+
+    return {**chunk, **results}
+
+
+#Executed inside the worker process; only plain arrays and picklable callables cross the boundary
+#With store_root set, the worker appends its own chunk to the ResultStore (ordered by chunk index)
+def _run_chunk_task(index, chunk, dt, steps, mode, mre_solver, integrator, store_root=None, attrs=None,
+                    events=None):
+    start = time.perf_counter()
+    if mode == "vectorized":
+        results = run_sweep(chunk, dt=dt, steps=steps, integrator=integrator, events=events)
+    elif mode == "per-run":
+        if events:
+            raise ValueError("events are only available in vectorized chunk mode")
+        results = _run_per_point(chunk, dt, steps, mre_solver, integrator)
+    else:
+        raise ValueError(f"Unknown chunk mode: {mode}")
+    if store_root is not None:
+        from simulation.result_store import ResultStore
+        ResultStore(store_root).append(results, attrs=attrs, order=index)
+    return index, os.getpid(), results, time.perf_counter() - start
+
+
+#Runs `points` across a process pool and yields (chunk_index, results) in chunk order.
+#progress(chunk_index, worker_pid, points_done, points_total, elapsed) is called as each chunk arrives;
+#ProgressPrinter below is a ready-made version that keeps per-worker totals.
+#store_root makes every worker write its chunk straight into that ResultStore, tagged with store_attrs.
+#events (simulation/events.py) are handed to run_sweep in every worker.
+def iter_parallel(points, dt=0.1, steps=50, chunk_size=50_000, max_workers=None, mode="vectorized",
+                  mre_solver=None, integrator=None, progress=None, store_root=None, store_attrs=None,
+                  events=None):
+    if mode == "per-run" and mre_solver is not None:
+        import pickle
+        try:
+            pickle.dumps(mre_solver)
+        except Exception as error:
+            raise ValueError("mre_solver must be picklable (a top-level function or a functools.partial of "
+                             f"one) so it can be sent to worker processes: {error}") from None
+
+    #Imported here: workers importing this module for _run_chunk_task never need the pool machinery
+    from collections import deque
+    from concurrent.futures import ProcessPoolExecutor
+
+    points_total = count_points(points)
+    points_done = 0
+
+    #At most 2 * workers chunks are in flight, so neither their inputs nor finished results pile up;
+    #waiting on them in submission order keeps the output deterministic
+    window = 2 * (max_workers or os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        pending = deque()
+        chunks = enumerate(chunk_points(points, chunk_size))
+        while True:
+            for index, chunk in chunks:
+                pending.append(pool.submit(_run_chunk_task, index, chunk, dt, steps, mode, mre_solver,
+                                           integrator, store_root, store_attrs, events))
+                if len(pending) >= window:
+                    break
+            if not pending:
+                break
+            index, pid, results, elapsed = pending.popleft().result()
+            points_done += len(results["initial_width"])
+            if progress is not None:
+                progress(index, pid, points_done, points_total, elapsed)
+            yield index, results
+
+
+#Same as iter_parallel but concatenates every chunk into one results table
+def run_parallel(points, **kwargs):
+    parts = [results for _, results in iter_parallel(points, **kwargs)]
+    if not parts:
+        return {}
+    return {key: np.concatenate([part[key] for part in parts]) for key in parts[0]}
+
+
+#Progress callback that prints one line per chunk with a running per-worker chunk count
+class ProgressPrinter:
+    def __init__(self):
+        self.per_worker = {}  #worker pid -> chunks finished
+
+    def __call__(self, index, pid, points_done, points_total, elapsed):
+        self.per_worker[pid] = self.per_worker.get(pid, 0) + 1
+        print(f"chunk {index} done by worker {pid} in {elapsed:.2f} s "
+              f"({self.per_worker[pid]} chunks on this worker, {points_done}/{points_total} points)")
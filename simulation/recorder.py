@@ -0,0 +1,253 @@
+# simulation/recorder.py
+
+#Columnar time-series recorder for simulation histories.
+#Each column (t, w, tau_E, ...) is a typed numpy array filled in place, one row per recorded step.
+#A column can also hold a fixed-size vector per row (e.g. the width of every island).
+
+#Modes:
+#   "full"     - keep every row. Storage grows in fixed-size chunks (no copying of old data) and, once
+#                spill_threshold rows are held in memory, full chunks are appended to raw binary files
+#                on disk that are read back through np.memmap.
+#   "ring"     - keep only the latest `capacity` rows.
+#   "decimate" - keep at most `capacity` rows spread evenly over the whole run: whenever the buffer
+#                fills, every other row is dropped and the recording stride doubles.
+#A spill directory the recorder created itself is removed by close() (or on leaving a `with` block), and
+#at the latest when the recorder is garbage collected.
+
+import os
+import weakref
+
+import numpy as np
+
+MODES = ("full", "ring", "decimate")
+
+DEFAULT_COLUMNS = ("t", "w", "tau_E", "lawson", "power")
+
+
+class TimeSeriesRecorder:
+    #columns: names (scalar float64 columns) or a dict name -> shape / (shape, dtype) for vector columns
+    def __init__(self, columns=DEFAULT_COLUMNS, mode="full", chunk_size=65_536, capacity=None,
+                 spill_threshold=None, spill_dir=None, dtype=np.float64):
+        if mode not in MODES:
+            raise ValueError(f"Unknown recorder mode '{mode}', choose from {', '.join(MODES)}")
+        if mode != "full" and not capacity:
+            raise ValueError(f"'{mode}' mode needs a capacity")
+
+        self.mode = mode
+        self.chunk_size = capacity if mode != "full" else chunk_size
+        self.capacity = capacity
+        self.spill_threshold = spill_threshold
+        self.spill_dir = spill_dir
+        self._owns_spill_dir = False
+        self._finalizer = None   #removes a temporary spill_dir if the recorder is dropped without close()
+
+        self.specs = {}
+        if not isinstance(columns, dict):
+            columns = {name: () for name in columns}
+        for name, spec in columns.items():
+            if isinstance(spec, tuple) and len(spec) == 2 and not isinstance(spec[1], int):
+                shape, col_dtype = spec
+            else:
+                shape, col_dtype = spec, dtype
+            self.specs[name] = (tuple(np.atleast_1d(shape)) if shape != () else (), np.dtype(col_dtype))
+        self.names = tuple(self.specs)
+
+        self.clear()
+
+    #Full-mode recorder holding existing columns (e.g. a trajectory loaded from a cache or store)
+    @classmethod
+    def from_columns(cls, columns):
+        columns = {name: np.asarray(col) for name, col in columns.items()}
+        rows = len(next(iter(columns.values()))) if columns else 0
+        recorder = cls({name: (col.shape[1:], col.dtype) for name, col in columns.items()},
+                       chunk_size=max(rows, 1))
+        if rows:
+            chunk = recorder._new_chunk()
+            for name, col in columns.items():
+                chunk[name][:] = col
+            recorder._fill = rows
+            recorder.total = rows
+        return recorder
+
+    #Drops all recorded data (and any spilled files) so the recorder can be reused for a new run
+    def clear(self):
+        self._chunks = []       #list of dicts name -> array of chunk_size rows
+        self._fill = 0          #rows used in the last chunk
+        self._spilled = 0       #rows written to disk
+        self.total = 0          #rows offered to append (before ring / decimation)
+        self.stride = 1         #decimate mode: only every stride-th row is stored
+        self._ring_start = 0    #ring mode: index of the oldest row once the buffer has wrapped
+        self._remove_spill_files()
+
+    def _new_chunk(self):
+        chunk = {name: np.empty((self.chunk_size,) + shape, dtype=col_dtype)
+                 for name, (shape, col_dtype) in self.specs.items()}
+        self._chunks.append(chunk)
+        self._fill = 0
+        return chunk
+
+    #Rows currently held (memory + disk)
+    def __len__(self):
+        if self.mode == "ring":
+            return min(self.total, self.capacity)
+        if not self._chunks:
+            return self._spilled
+        return self._spilled + (len(self._chunks) - 1) * self.chunk_size + self._fill
+
+    #Records one row; values are given in column order
+    def append(self, *values):
+        index = self.total
+        self.total += 1
+
+        if self.mode == "decimate" and index % self.stride:
+            return
+
+        if not self._chunks:
+            chunk = self._new_chunk()
+        elif self._fill == self.chunk_size:
+            if self.mode == "full":
+                chunk = self._new_chunk()
+                if self.spill_threshold and len(self) - self._spilled > self.spill_threshold:
+                    self._spill()
+            elif self.mode == "ring":
+                chunk = self._chunks[0]
+                self._fill = 0
+                self._ring_start = 0
+            else:
+                chunk = self._compact()
+                if index % self.stride:
+                    return
+        else:
+            chunk = self._chunks[-1]
+
+        row = self._fill
+        for name, value in zip(self.names, values):
+            chunk[name][row] = value
+        self._fill += 1
+        if self.mode == "ring" and self.total > self.capacity:
+            self._ring_start = self._fill % self.capacity
+
+    #Decimate mode: keep every other stored row and double the stride
+    def _compact(self):
+        chunk = self._chunks[0]
+        half = (self.chunk_size + 1) // 2
+        for name in self.names:
+            chunk[name][:half] = chunk[name][::2]
+        self._fill = half
+        self.stride *= 2
+        return chunk
+
+    # --- on-disk spill ---
+
+    def _spill_path(self, name):
+        return os.path.join(self.spill_dir, f"{name}.bin")
+
+    #Moves every full in-memory chunk to the end of the per-column binary files
+    def _spill(self):
+        import tempfile
+
+        if self.spill_dir is None:
+            import shutil
+
+            self.spill_dir = tempfile.mkdtemp(prefix="island_recorder_")
+            self._owns_spill_dir = True
+            self._finalizer = weakref.finalize(self, shutil.rmtree, self.spill_dir, ignore_errors=True)
+        os.makedirs(self.spill_dir, exist_ok=True)
+
+        full, self._chunks = self._chunks[:-1], self._chunks[-1:]
+        for name in self.names:
+            with open(self._spill_path(name), "ab") as fh:
+                for chunk in full:
+                    chunk[name].tofile(fh)
+        self._spilled += len(full) * self.chunk_size
+        self._write_meta()
+
+    def _write_meta(self):
+        import json
+
+        meta = {
+            "rows": self._spilled,
+            "columns": {name: {"shape": list(shape), "dtype": col_dtype.str}
+                        for name, (shape, col_dtype) in self.specs.items()},
+        }
+        with open(os.path.join(self.spill_dir, "meta.json"), "w") as fh:
+            json.dump(meta, fh)
+
+    def _spilled_column(self, name):
+        shape, col_dtype = self.specs[name]
+        return np.memmap(self._spill_path(name), dtype=col_dtype, mode="r", shape=(self._spilled,) + shape)
+
+    def _remove_spill_files(self):
+        if self.spill_dir is None or not os.path.isdir(self.spill_dir):
+            return
+        if self._owns_spill_dir:
+            self._finalizer()  #removes the directory once and detaches the finalizer
+            self._finalizer = None
+            self.spill_dir = None
+            self._owns_spill_dir = False
+        else:
+            for name in self.names:
+                if os.path.exists(self._spill_path(name)):
+                    os.remove(self._spill_path(name))
+
+    # --- reading ---
+
+    def _memory_parts(self, name):
+        if not self._chunks:
+            return []
+        if self.mode == "ring" and self.total > self.capacity:
+            buf = self._chunks[0][name]
+            return [buf[self._ring_start:], buf[:self._ring_start]]
+        parts = [chunk[name] for chunk in self._chunks[:-1]]
+        parts.append(self._chunks[-1][name][:self._fill])
+        return parts
+
+    #Whole column in time order. A single in-memory chunk is returned as a view (no copy).
+    def column(self, name):
+        parts = self._memory_parts(name)
+        if self._spilled:
+            parts.insert(0, self._spilled_column(name))
+        if len(parts) == 1:
+            return parts[0]
+        if not parts:
+            shape, col_dtype = self.specs[name]
+            return np.empty((0,) + shape, dtype=col_dtype)
+        return np.concatenate(parts)
+
+    #Last n rows of a column without touching the rest of the history
+    def tail(self, name, n):
+        parts = self._memory_parts(name)
+        picked = []
+        needed = n
+        for part in reversed(parts):
+            if needed <= 0:
+                break
+            picked.insert(0, part[max(len(part) - needed, 0):])
+            needed -= len(picked[0])
+        if needed > 0 and self._spilled:
+            spilled = self._spilled_column(name)
+            picked.insert(0, np.array(spilled[max(self._spilled - needed, 0):]))
+        if not picked:
+            shape, col_dtype = self.specs[name]
+            return np.empty((0,) + shape, dtype=col_dtype)
+        return np.concatenate(picked) if len(picked) > 1 else picked[0]
+
+    def last(self, name):
+        return self.tail(name, 1)[0]
+
+    def as_dict(self):
+        return {name: self.column(name) for name in self.names}
+
+    #Frees the in-memory chunks and removes any spilled files (and a temporary spill_dir)
+    def close(self):
+        self._chunks = []
+        self._remove_spill_files()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __repr__(self):
+        return f"TimeSeriesRecorder({len(self)} rows, mode={self.mode}, columns={list(self.names)})"
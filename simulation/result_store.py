@@ -0,0 +1,136 @@
+# simulation/result_store.py
+
+#Persistent store for sweep tables, per-step trajectories and final metrics.
+
+#Layout on disk (everything under one root folder):
+#   shards/<shard_id>/<column>.npy   one plain .npy file per column, so reads can be memory-mapped
+#   index/<shard_id>.json            small record per shard: kind, row count, columns, attrs
+
+#Every append writes a new shard into a temporary folder and renames it into place, then writes its
+#index record the same way. Nothing is ever rewritten, so any number of processes can append to the
+#same store at once and readers only ever see complete shards.
+
+import json
+import os
+import time
+import uuid
+
+import numpy as np
+
+SWEEP = "sweep"
+TRAJECTORY = "trajectory"
+
+
+class ResultStore:
+    def __init__(self, root):
+        self.root = str(root)
+        self.shard_dir = os.path.join(self.root, "shards")
+        self.index_dir = os.path.join(self.root, "index")
+        os.makedirs(self.shard_dir, exist_ok=True)
+        os.makedirs(self.index_dir, exist_ok=True)
+
+    # --- writing ---
+
+    #Appends one table (dict of equal-length arrays) and returns its shard id.
+    #order sorts shards when reading (e.g. the chunk index of a parallel sweep); attrs is any
+    #JSON-serialisable metadata such as run parameters or final metrics.
+    def append(self, table, kind=SWEEP, attrs=None, order=None):
+        columns = {key: np.asarray(value) for key, value in table.items()}
+        rows = {len(col) for col in columns.values()}
+        if len(rows) > 1:
+            raise ValueError(f"All columns of a {kind} table must have the same length, got {sorted(rows)}")
+
+        shard_id = f"{time.time_ns():020d}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        tmp_dir = os.path.join(self.shard_dir, f".tmp-{shard_id}")
+        os.makedirs(tmp_dir)
+        for key, col in columns.items():
+            np.save(os.path.join(tmp_dir, f"{key}.npy"), np.ascontiguousarray(col))
+        os.rename(tmp_dir, os.path.join(self.shard_dir, shard_id))
+
+        record = {
+            "shard": shard_id,
+            "kind": kind,
+            "rows": rows.pop() if rows else 0,
+            "columns": list(columns),
+            "order": order,
+            "attrs": _jsonable(attrs or {}),
+        }
+        tmp_index = os.path.join(self.index_dir, f".tmp-{shard_id}.json")
+        with open(tmp_index, "w") as fh:
+            json.dump(record, fh)
+        os.rename(tmp_index, os.path.join(self.index_dir, f"{shard_id}.json"))
+        return shard_id
+
+    #Stores one simulation run: the recorder history as a trajectory shard, with the run parameters
+    #and final metrics (the old "FINAL SIMULATION OUTPUT") in its attrs
+    def append_run(self, params, result, recorder=None, attrs=None):
+        recorder = recorder if recorder is not None else result.get("recorder")
+        table = recorder.as_dict() if recorder is not None else {}
+        metrics = {key: value for key, value in result.items()
+                   if np.ndim(value) == 0 and not hasattr(value, "as_dict")}
+        return self.append(table, kind=TRAJECTORY,
+                           attrs={"params": params, "metrics": metrics, **(attrs or {})})
+
+    # --- reading ---
+
+    #Index records, optionally filtered by kind and by exact attrs matches, in (order, shard id) order
+    def index(self, kind=None, **attrs):
+        records = []
+        for name in os.listdir(self.index_dir):
+            if name.startswith(".") or not name.endswith(".json"):
+                continue
+            with open(os.path.join(self.index_dir, name)) as fh:
+                record = json.load(fh)
+            if kind is not None and record["kind"] != kind:
+                continue
+            if any(record["attrs"].get(key) != _jsonable(value) for key, value in attrs.items()):
+                continue
+            records.append(record)
+
+        records.sort(key=lambda r: (r["order"] is None, r["order"] if r["order"] is not None else 0, r["shard"]))
+        return records
+
+    #Columns of one shard; with mmap=True they are read-only memory maps (no data copied)
+    def read_shard(self, shard_id, columns=None, mmap=True):
+        folder = os.path.join(self.shard_dir, shard_id)
+        if columns is None:
+            columns = [name[:-4] for name in sorted(os.listdir(folder)) if name.endswith(".npy")]
+        mode = "r" if mmap else None
+        return {key: np.load(os.path.join(folder, f"{key}.npy"), mmap_mode=mode) for key in columns}
+
+    #Yields (index record, memory-mapped columns) shard by shard, for streaming over large outputs
+    def iter_shards(self, kind=None, columns=None, **attrs):
+        for record in self.index(kind, **attrs):
+            yield record, self.read_shard(record["shard"], columns)
+
+    #Concatenates matching shards into one table. This copies; use iter_shards to avoid that.
+    def load(self, kind=SWEEP, columns=None, **attrs):
+        parts = [table for _, table in self.iter_shards(kind, columns, **attrs)]
+        if not parts:
+            return {}
+        keys = columns if columns is not None else list(parts[0])
+        return {key: np.concatenate([part[key] for part in parts]) for key in keys}
+
+    def remove(self, shard_id):
+        os.remove(os.path.join(self.index_dir, f"{shard_id}.json"))
+        import shutil
+        shutil.rmtree(os.path.join(self.shard_dir, shard_id), ignore_errors=True)
+
+    def __len__(self):
+        return len(self.index())
+
+    def __repr__(self):
+        return f"ResultStore({self.root!r}, {len(self)} shards)"
+
+
+#numpy scalars / arrays -> plain Python so attrs can go into JSON
+def _jsonable(value):
+    if isinstance(value, dict):
+        return {str(key): _jsonable(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(item) for item in value]
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
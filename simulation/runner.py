@@ -0,0 +1,319 @@
+# simulation/runner.py
+
+#Headless version of main.run_simulation.
+#Nothing here touches matplotlib or module-level state: every call builds its own PlasmaState, so runs
+#can be repeated, run side by side in threads, or shipped to worker processes.
+
+import numpy as np
+
+from plasma.flux_surface import FluxSurface, MagneticIsland
+from plasma.plasma_state import PlasmaState, VectorPlasmaState
+from physics.mre_solver import compute_dw_dt, compute_dw_dt_jacobian
+from physics.integrators import make_integrator
+from physics.confinement import ConfinementDiagnostics, tau_E_from_width
+from physics.fusion_output import compute_lawson_product, compute_fusion_power
+from simulation.sweep import DEFAULT_PARAMS, DEFAULT_CONSTANTS
+from simulation.recorder import TimeSeriesRecorder, DEFAULT_COLUMNS
+from simulation.instrumentation import instrumentation
+from simulation.events import EventMonitor
+from simulation.checkpoint import as_snapshot, capture
+
+
+#Builds the 10-surface plasma of the interactive experiment and returns (plasma_state, target_island).
+#With a RadialProfile (plasma/profile.py) the plasma is built from it instead, with every island seeded
+#from the slider values; the target is its first (2,1) island, or its first island if it has no (2,1).
+def build_initial_plasma(params=None, vectorized=True, profile=None):
+    params = {**DEFAULT_PARAMS, **(params or {})}
+    if profile is not None:
+        return _plasma_from_profile(profile, params, vectorized)
+
+    flux_surfaces = []
+    target_island = None
+
+    for r in range(1, 11):
+        radius = r
+        q = 1 + 0.1 * r
+
+        if abs(q - 2.0) < 0.05:
+            island = MagneticIsland(
+                w0=params["initial_width"],
+                m=2,
+                n=1,
+                bootstrap_drive=params["bootstrap"]
+            )
+            target_island = island
+        else:
+            island = None
+
+        flux_surfaces.append(FluxSurface(radius=radius, q=q, magnetic_island=island))
+
+    if vectorized:
+        plasma_state = VectorPlasmaState.from_surfaces(flux_surfaces)
+        target_island = plasma_state.island(0)
+    else:
+        plasma_state = PlasmaState(flux_surfaces)
+
+    return plasma_state, target_island
+
+
+def _plasma_from_profile(profile, params, vectorized):
+    if profile.n_islands == 0:
+        raise ValueError(f"{profile} has no rational surfaces to put an island on")
+    plasma_state = profile.build_state(w0=params["initial_width"], bootstrap=params["bootstrap"],
+                                       vectorized=vectorized)
+    index = profile.island_index(2, 1)
+    index = 0 if index is None else index
+    if vectorized:
+        return plasma_state, plasma_state.island(index)
+    surface = plasma_state.flux_surfaces[int(profile.island_surface[index])]
+    return plasma_state, surface.magnetic_island
+
+
+#The MRE right hand side used by run_simulation, with the A/B/C constants and slider parameters bound in
+def make_mre_solver(params=None, constants=None):
+    params = {**DEFAULT_PARAMS, **(params or {})}
+    constants = {**DEFAULT_CONSTANTS, **(constants or {})}
+
+    def mre_solver(isl, fs):
+        return compute_dw_dt(isl, fs, A=constants["A"], B=constants["B"], C=constants["C"],
+                             D=params["D"], delta_scale=params["delta_scale"])
+
+    return mre_solver
+
+
+#Matching d(dw/dt)/dw for implicit integrators
+def make_mre_jacobian(params=None, constants=None):
+    params = {**DEFAULT_PARAMS, **(params or {})}
+    constants = {**DEFAULT_CONSTANTS, **(constants or {})}
+
+    def mre_jacobian(isl, fs):
+        return compute_dw_dt_jacobian(isl, fs, A=constants["A"], B=constants["B"], C=constants["C"],
+                                      D=params["D"], delta_scale=params["delta_scale"])
+
+    return mre_jacobian
+
+
+#Final metrics exactly as printed by run_simulation, read from the run's TimeSeriesRecorder.
+#dP/dt spans the last 5 recorded intervals (the last 5 steps unless the recorder decimates).
+def final_metrics(target_island, recorder, final_power):
+    final_width = target_island.w
+
+    # Estimate gradient of fusion power (last 5 steps)
+    times = recorder.tail("t", 6)
+    powers = recorder.tail("power", 6)
+    if len(powers) >= 6 and times[-1] > times[0]:
+        dP_dt = float((powers[-1] - powers[0]) / (times[-1] - times[0]))
+    else:
+        dP_dt = 0
+
+    return {
+        "final_width": final_width,
+        "cross_section_radius": final_width / 2,
+        "power": final_power,
+        "dP_dt": dP_dt,
+    }
+
+
+#Prints a run_headless result in the format of the interactive run
+def print_final_output(result):
+    print("\n--- FINAL SIMULATION OUTPUT ---")
+    print(f"Final Island Width (w): {result['final_width']:.5f}")
+    print(f"Island Cross-Section Radius: {result['cross_section_radius']:.5f}")
+    print(f"Final Fusion Power Output: {result['power']:.3e} (arb. units)")
+    print(f"Estimated dPower/dt: {result['dP_dt']:.3e} (arb. units/s)")
+    for t, name, action in result.get("events", {}).get("log", []):
+        print(f"Event at t = {t:.2f}: {name} ({action})")
+
+
+#One step of the islands with the monitor's shrink events checked on the result: a step that fires one is
+#redone from the same start as 2, 4, ... substeps. Returns the widths before the step (island order) and
+#whether the step still fired at max_substeps.
+def _evolve_with_events(plasma_state, monitor, order, radii, dt, t, mre_solver, integrator, mre_jacobian):
+    w_prev = np.array(plasma_state.island_widths())
+    plasma_state.evolve_islands(dt, mre_solver, integrator, mre_jacobian, t * dt)
+    if not monitor.shrinks:
+        return w_prev, False
+
+    substeps = 1
+    while True:
+        w = plasma_state.island_widths()[None, order]
+        tau_E = np.array([tau_E_from_width(plasma_state.max_width)])
+        if not monitor.shrink_mask(w, w_prev[None, order], dt, tau_E, monitor.sigma(w, radii))[0]:
+            if substeps > 1:
+                monitor.note_shrink(t * dt, [0], substeps, failed=False)
+            return w_prev, False
+        if substeps >= monitor.max_substeps:
+            monitor.note_shrink(t * dt, [0], substeps, failed=True)
+            return w_prev, True
+
+        substeps *= 2
+        plasma_state.set_island_widths(w_prev)
+        h = dt / substeps
+        for k in range(substeps):
+            plasma_state.evolve_islands(h, mre_solver, integrator, mre_jacobian, t * dt + k * h)
+
+
+#Runs one simulation without any GUI.
+#on_step(t, island, tau_E, lawson, power) is called after every step (main.py uses it to draw).
+#mre_solver overrides the default compute_dw_dt closure; it must be a top-level function to be used
+#from a process pool.
+#integrator is a name or instance from physics/integrators.py; None keeps the original forward Euler.
+#stop_event (e.g. a threading.Event) ends the run early once set; the result then has cancelled=True.
+#The history goes into `recorder` (a full-history TimeSeriesRecorder by default); record_islands adds an
+#"island_w" column with the width of every island at every step.
+#confinement_model picks how island widths degrade tau_E (physics/confinement.py, default: largest island)
+#and diagnostics_every=k re-evaluates it only every k-th step.
+#profile replaces the 10-surface plasma with one built from a RadialProfile (see build_initial_plasma).
+#events (simulation/events.py) can end the run early, log what happened or split steps; the result then
+#has an "events" summary and steps_taken.
+#checkpoint (a simulation.checkpoint.CheckpointWriter) is handed a snapshot every checkpoint.every steps,
+#and one of the last completed step when an event or stop_event ends the run early, and writes it in the
+#background. restart (a Snapshot or snapshot file) continues that run instead of starting a new one: steps
+#is then the total step count of the run, params / constants given here override the snapshot's (see
+#Snapshot.fork), and the snapshot's integrator state, tau_E cache, event state and history tail are picked
+#back up, so resuming with the same options gives the same result as never stopping.
+#transport (a physics.transport.TransportModel) evolves temperature and density profiles on the plasma's
+#radial grid, flattened across the islands: tau_E, the Lawson product and the fusion power then come from
+#the profiles instead of confinement_model, and the islands' bootstrap drives follow the local pressure
+#gradient. Use a fine RadialProfile (profile=) to give it a radial grid worth resolving.
+def run_headless(params=None, dt=0.1, steps=50, constants=None, mre_solver=None, on_step=None,
+                 vectorized=True, integrator=None, stop_event=None, recorder=None, record_islands=False,
+                 confinement_model="max", diagnostics_every=1, profile=None, events=None, checkpoint=None,
+                 restart=None, transport=None):
+    start = 0
+    if restart is None:
+        plasma_state, target_island = build_initial_plasma(params, vectorized=vectorized, profile=profile)
+    else:
+        restart = as_snapshot(restart)
+        if params:
+            restart = restart.fork(params=params)  #applies bootstrap / initial_width changes to the state
+        params = restart.params
+        constants = {**restart.constants, **(constants or {})}
+        plasma_state, target_island = restart.build_state(vectorized)
+        start = restart.step
+    diagnostics = ConfinementDiagnostics(plasma_state, confinement_model, diagnostics_every)
+    if restart is not None and restart.diagnostics is not None and \
+            restart.diagnostics["model"] == confinement_model:
+        diagnostics.restore(restart.diagnostics)
+    if transport is not None:
+        saved = restart.transport if restart is not None else None
+        transport.bind(plasma_state, **(saved or {}))
+    mre_jacobian = None
+    if mre_solver is None:
+        mre_solver = make_mre_solver(params, constants)
+        mre_jacobian = make_mre_jacobian(params, constants)
+    if restart is not None:
+        integrator = restart.build_integrator(integrator)
+    elif integrator is not None:
+        integrator = make_integrator(integrator)
+    #With instrumentation enabled every RHS call is timed and counted (a no-op otherwise)
+    mre_solver = instrumentation.wrap("mre_rhs", mre_solver, counter="rhs_evals")
+    phase = instrumentation.phase
+
+    owns_recorder = recorder is None
+    if owns_recorder:
+        columns = dict.fromkeys(DEFAULT_COLUMNS, ())
+        if record_islands:
+            columns["island_w"] = (len(plasma_state.get_island_data()),)
+        recorder = TimeSeriesRecorder(columns)
+    try:
+        if restart is not None:
+            restart.fill_recorder(recorder)
+        if record_islands and not vectorized:
+            islands = [fs.magnetic_island for fs in plasma_state.flux_surfaces if fs.has_island()]
+
+        monitor = None
+        if events:
+            monitor = EventMonitor(events)
+            order = np.argsort(plasma_state.island_radii(), kind="stable")
+            radii = plasma_state.island_radii()[order]
+            if restart is not None and restart.events is not None:
+                monitor.restore(restart.events)
+
+        tau_E = lawson = power = None
+        cancelled = False
+        steps_taken = start
+
+        for t in range(start, steps):
+            if stop_event is not None and stop_event.is_set():
+                cancelled = True
+                if checkpoint is not None and steps_taken > start and not checkpoint.due(steps_taken):
+                    #the last completed step was not checkpointed yet: keep it so the run can be resumed
+                    with phase("checkpoint"):
+                        checkpoint.submit(capture(plasma_state, target_island, steps_taken, dt, params, constants,
+                                                  integrator, diagnostics, monitor, recorder, transport=transport))
+                break
+
+            with phase("evolve_islands"):
+                if monitor is None:
+                    plasma_state.evolve_islands(dt, mre_solver, integrator, mre_jacobian, t * dt)
+                else:
+                    w_prev, failed = _evolve_with_events(plasma_state, monitor, order, radii, dt, t, mre_solver,
+                                                         integrator, mre_jacobian)
+            instrumentation.count("steps")
+            steps_taken += 1
+
+            if transport is None:
+                with phase("compute_tau_E"):
+                    tau_E = diagnostics.update(t)
+                with phase("fusion_output"):
+                    lawson = compute_lawson_product(tau_E)
+                    power = compute_fusion_power(tau_E)
+            else:
+                with phase("transport"):
+                    transport.advance(dt)
+                tau_E, lawson, power = transport.tau_E, transport.lawson, transport.power
+
+            with phase("record"):
+                if record_islands:
+                    island_w = plasma_state.w if vectorized else [isl.w for isl in islands]
+                    recorder.append(t * dt, target_island.w, tau_E, lawson, power, island_w)
+                else:
+                    recorder.append(t * dt, target_island.w, tau_E, lawson, power)
+
+            if on_step is not None:
+                with phase("on_step"):
+                    on_step(t * dt, target_island, tau_E, lawson, power)
+
+            stopped = False
+            if monitor is not None:
+                with phase("events"):
+                    w = plasma_state.island_widths()[None, order]
+                    stopped = failed or monitor.update(t * dt, w, w_prev[None, order], dt, np.array([tau_E]),
+                                                       monitor.sigma(w, radii))[0]
+
+            #a run stopped by an event is checkpointed at the step it stopped on, due or not
+            if checkpoint is not None and (stopped or checkpoint.due(t + 1)):
+                with phase("checkpoint"):
+                    checkpoint.submit(capture(plasma_state, target_island, t + 1, dt, params, constants, integrator,
+                                              diagnostics, monitor, recorder, transport=transport))
+            if stopped:
+                break
+    except BaseException:
+        #a recorder made here never reaches the caller: free it (and anything it spilled) now
+        if owns_recorder:
+            recorder.close()
+        raise
+
+    if power is None and restart is not None and start > 0 and not cancelled:
+        #The snapshot was already at `steps`: report its state
+        if transport is None:
+            tau_E = diagnostics.update()
+            lawson = compute_lawson_product(tau_E)
+            power = compute_fusion_power(tau_E)
+        else:
+            tau_E, lawson, power = transport.tau_E, transport.lawson, transport.power
+    if power is None:
+        return {"cancelled": cancelled, "recorder": recorder}
+
+    result = final_metrics(target_island, recorder, power)
+    result.update(tau_E=tau_E, lawson=lawson, recorder=recorder, cancelled=cancelled)
+    if confinement_model != "max" and transport is None:
+        result["diagnostics"] = diagnostics.as_dict()
+    if transport is not None:
+        result["transport"] = transport.as_dict()
+    if monitor is not None:
+        result.update(events=monitor.as_dict(), steps_taken=steps_taken)
+    if integrator is not None:
+        result["integrator_stats"] = integrator.stats.as_dict()
+    return result
@@ -0,0 +1,199 @@
+# simulation/sensitivity.py
+
+#Global sensitivity analysis of the island model.
+#   Sobol indices  - Saltelli sampling: matrices A and B plus, for every parameter i, A with column i
+#                    taken from B. That is N * (k + 2) runs, shared by all first-order (S1) and total
+#                    (ST) indices. Confidence intervals come from bootstrapping the stored outputs, so
+#                    they cost no extra simulation.
+#   Morris         - r one-at-a-time trajectories on a p-level grid; mean |elementary effect| (mu*)
+#                    ranks parameters cheaply, sigma flags non-linearity / interactions.
+
+#Every model evaluation is one point of a batched sweep (simulation.sweep.run_sweep), i.e. the same
+#compute_dw_dt / compute_fusion_power pipeline as the interactive run.
+
+#Usage (from the project folder):
+#   python -m simulation.sensitivity --samples 4096 --output power
+#   python -m simulation.sensitivity --morris --trajectories 200
+
+import numpy as np
+
+from simulation.sweep import SWEEP_KEYS, RESULT_KEYS, run_sweep
+from simulation.ensemble import DEFAULT_DISTRIBUTIONS
+
+#Parameter ranges (the slider ranges of the interactive UI)
+DEFAULT_BOUNDS = {key: spec[1:] for key, spec in DEFAULT_DISTRIBUTIONS.items()}
+
+
+def _check(bounds, output):
+    unknown = set(bounds) - set(SWEEP_KEYS)
+    if unknown:
+        raise ValueError(f"Unknown sensitivity parameter(s): {', '.join(sorted(unknown))}")
+    if output not in RESULT_KEYS:
+        raise ValueError(f"Unknown output '{output}', choose from {', '.join(RESULT_KEYS)}")
+
+
+#Scaled samples in [0, 1]^k -> parameter points for run_sweep
+def _to_points(unit, names, bounds):
+    return {key: bounds[key][0] + (bounds[key][1] - bounds[key][0]) * unit[:, i] for i, key in enumerate(names)}
+
+
+def _evaluate(unit, names, bounds, output, run_options):
+    return run_sweep(_to_points(unit, names, bounds), **run_options)[output]
+
+
+#S1 (Saltelli 2010) and ST (Jansen) from model outputs; rows of f_AB are the A_B^(i) runs.
+#Works on a leading batch axis too, which is how the bootstrap evaluates all resamples at once.
+#Outputs are centred first: fusion power is ~1e17 with a spread of a few percent, and the S1 estimator's
+#noise grows with the output mean.
+def _sobol_estimates(f_A, f_B, f_AB):
+    both = np.concatenate((f_A, f_B), axis=-1)
+    mean = both.mean(axis=-1, keepdims=True)
+    f_A, f_B, f_AB = f_A - mean, f_B - mean, f_AB - mean[..., None, :]
+    variance = np.var(both, axis=-1)[..., None]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        first = np.mean(f_B[..., None, :] * (f_AB - f_A[..., None, :]), axis=-1) / variance
+        total = 0.5 * np.mean((f_A[..., None, :] - f_AB) ** 2, axis=-1) / variance
+    return first, total
+
+
+#Sobol first-order and total indices of `output` over the uniform parameter ranges in `bounds`.
+#samples is N (a power of two is conventional); bootstrap resamples give (1 - confidence) intervals.
+#run_options go to run_sweep (dt, steps, integrator, chunk_size, ...).
+def sobol_indices(bounds=None, output="power", samples=4096, seed=0, bootstrap=200, confidence=0.95,
+                  **run_options):
+    bounds = DEFAULT_BOUNDS if bounds is None else bounds
+    _check(bounds, output)
+    names = list(bounds)
+    k = len(names)
+    rng = np.random.default_rng(seed)
+
+    A = rng.random((samples, k))
+    B = rng.random((samples, k))
+    AB = np.repeat(A[None], k, axis=0)
+    for i in range(k):
+        AB[i, :, i] = B[:, i]
+
+    #One batched sweep for all N * (k + 2) evaluations
+    unit = np.concatenate([A, B, AB.reshape(-1, k)])
+    f = _evaluate(unit, names, bounds, output, run_options)
+    f_A, f_B, f_AB = f[:samples], f[samples:2 * samples], f[2 * samples:].reshape(k, samples)
+
+    first, total = _sobol_estimates(f_A, f_B, f_AB)
+    result = {"names": names, "output": output, "samples": samples, "evaluations": len(f),
+              "S1": first, "ST": total}
+
+    if bootstrap:
+        alpha = (1 - confidence) / 2
+        boot_first, boot_total = [], []
+        for start in range(0, bootstrap, 50):  #batches of resamples keep memory at 50 * N * (k + 2)
+            rows = rng.integers(0, samples, (min(50, bootstrap - start), samples))
+            b_first, b_total = _sobol_estimates(f_A[rows], f_B[rows], np.moveaxis(f_AB[:, rows], 0, 1))
+            boot_first.append(b_first)
+            boot_total.append(b_total)
+        boot_first, boot_total = np.concatenate(boot_first), np.concatenate(boot_total)
+        result["S1_conf"] = np.quantile(boot_first, [alpha, 1 - alpha], axis=0)
+        result["ST_conf"] = np.quantile(boot_total, [alpha, 1 - alpha], axis=0)
+    return result
+
+
+#Morris trajectories in the unit cube: each starts on the p-level grid and moves every parameter once,
+#in random order, by +-delta (delta = p / (2 (p - 1))). Returns points (r, k + 1, k), the order of the
+#moved parameters (r, k) and the signed steps (r, k).
+def morris_trajectories(k, trajectories=100, levels=4, seed=0):
+    rng = np.random.default_rng(seed)
+    delta = levels / (2 * (levels - 1))
+    grid = np.arange(levels) / (levels - 1)
+
+    start = rng.choice(grid, size=(trajectories, k))
+    order = np.argsort(rng.random((trajectories, k)), axis=1)
+    steps = np.where(start + delta <= 1 + 1e-12, delta, -delta)
+
+    points = np.repeat(start[:, None, :], k + 1, axis=1)
+    rows = np.arange(trajectories)
+    for step in range(k):
+        moved = order[:, step]
+        points[:, step + 1:, :][rows, :, moved] += steps[rows, moved][:, None]
+    return points, order, steps[rows[:, None], order]
+
+
+#Morris screening: mu (mean elementary effect), mu* (mean |EE|) and sigma (std of EE) per parameter,
+#with bootstrap intervals for mu* over trajectories. Effects are per unit of the scaled [0, 1] range, so
+#parameters with different units compare directly. Costs trajectories * (k + 1) runs.
+def morris_screening(bounds=None, output="power", trajectories=100, levels=4, seed=0, bootstrap=200,
+                     confidence=0.95, **run_options):
+    bounds = DEFAULT_BOUNDS if bounds is None else bounds
+    _check(bounds, output)
+    names = list(bounds)
+    k = len(names)
+
+    points, order, steps = morris_trajectories(k, trajectories, levels, seed)
+    f = _evaluate(points.reshape(-1, k), names, bounds, output, run_options).reshape(trajectories, k + 1)
+
+    effects = np.empty((trajectories, k))
+    rows = np.arange(trajectories)[:, None]
+    effects[rows, order] = np.diff(f, axis=1) / steps
+
+    result = {"names": names, "output": output, "trajectories": trajectories, "evaluations": f.size,
+              "mu": effects.mean(axis=0), "mu_star": np.abs(effects).mean(axis=0),
+              "sigma": effects.std(axis=0, ddof=1) if trajectories > 1 else np.zeros(k)}
+
+    if bootstrap:
+        alpha = (1 - confidence) / 2
+        rng = np.random.default_rng(seed + 1)
+        picks = rng.integers(0, trajectories, (bootstrap, trajectories))
+        boot = np.abs(effects[picks]).mean(axis=1)
+        result["mu_star_conf"] = np.quantile(boot, [alpha, 1 - alpha], axis=0)
+    return result
+
+
+#Parameter names ordered from most to least influential by `key` (e.g. "ST" or "mu_star")
+def ranking(result, key="ST"):
+    return [result["names"][i] for i in np.argsort(-np.asarray(result[key]), kind="stable")]
+
+
+def print_indices(result):
+    if "ST" in result:
+        print(f"\n--- SOBOL INDICES OF {result['output']} ({result['evaluations']} runs) ---")
+        print(f"{'parameter':16s} {'S1':>8s} {'S1 interval':>20s} {'ST':>8s} {'ST interval':>20s}")
+        for i, name in enumerate(result["names"]):
+            s1_ci = st_ci = ""
+            if "S1_conf" in result:
+                s1_ci = f"[{result['S1_conf'][0][i]:.3f}, {result['S1_conf'][1][i]:.3f}]"
+                st_ci = f"[{result['ST_conf'][0][i]:.3f}, {result['ST_conf'][1][i]:.3f}]"
+            print(f"{name:16s} {result['S1'][i]:8.3f} {s1_ci:>20s} {result['ST'][i]:8.3f} {st_ci:>20s}")
+    else:
+        print(f"\n--- MORRIS SCREENING OF {result['output']} ({result['evaluations']} runs) ---")
+        print(f"{'parameter':16s} {'mu':>12s} {'mu*':>12s} {'sigma':>12s}")
+        for i, name in enumerate(result["names"]):
+            print(f"{name:16s} {result['mu'][i]:12.4g} {result['mu_star'][i]:12.4g} {result['sigma'][i]:12.4g}")
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Global sensitivity analysis of the island model")
+    parser.add_argument("--output", choices=RESULT_KEYS, default="power")
+    parser.add_argument("--samples", type=int, default=4096, help="Sobol base sample size N")
+    parser.add_argument("--morris", action="store_true", help="Morris screening instead of Sobol indices")
+    parser.add_argument("--trajectories", type=int, default=100)
+    parser.add_argument("--levels", type=int, default=4)
+    parser.add_argument("--bootstrap", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--dt", type=float, default=0.1)
+    parser.add_argument("--steps", type=int, default=50)
+    args = parser.parse_args(argv)
+
+    if args.morris:
+        result = morris_screening(output=args.output, trajectories=args.trajectories, levels=args.levels,
+                                  seed=args.seed, bootstrap=args.bootstrap, dt=args.dt, steps=args.steps)
+        key = "mu_star"
+    else:
+        result = sobol_indices(output=args.output, samples=args.samples, seed=args.seed,
+                               bootstrap=args.bootstrap, dt=args.dt, steps=args.steps)
+        key = "ST"
+    print_indices(result)
+    print("Ranking: " + " > ".join(ranking(result, key)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+# simulation/steady_state.py
+
+#Final metrics of run_simulation computed from the saturated island width instead of time stepping.
+#Takes the same parameter points as simulation.sweep.run_sweep and returns the same result columns,
+#plus the root classification from physics/equilibrium.py.
+
+import numpy as np
+
+from physics.equilibrium import solve_saturated_width, mre_drive, STATUS_NAMES
+from physics.confinement import tau_E_from_width
+from physics.fusion_output import compute_lawson_product, compute_fusion_power
+from simulation.sweep import normalise_points, ISLAND_Q, ISLAND_M, ISLAND_N
+
+
+def run_steady_state(points):
+    columns = normalise_points(points)
+
+    a0 = mre_drive(ISLAND_Q, ISLAND_M, ISLAND_N, columns["bootstrap"], columns["A"], columns["C"],
+                   columns["delta_scale"])
+    root = solve_saturated_width(columns["initial_width"], a0, columns["B"], columns["D"])
+
+    final_width = root["width"]
+    tau_E = tau_E_from_width(final_width)
+    power = compute_fusion_power(tau_E)
+
+    return {
+        **columns,
+        "final_width": final_width,
+        "cross_section_radius": final_width / 2,
+        "tau_E": tau_E,
+        "lawson": compute_lawson_product(tau_E),
+        "power": power,
+        "dP_dt": np.zeros_like(power),  #the width no longer changes once saturated
+        "status": root["status"],
+        "stable": root["stable"],
+    }
+
+
+#Readable status for one entry of run_steady_state(...)["status"]
+def status_name(status):
+    return STATUS_NAMES[int(status)]
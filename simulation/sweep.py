@@ -0,0 +1,333 @@
+# simulation/sweep.py
+
+#Headless parameter sweeps of the island model.
+#Every parameter point gets its own (2,1) island and the whole batch is stepped as one numpy
+#array update: no plotting, no sleeping, no per-point Python loop.
+
+#Usage (from the project folder):
+#   python -m simulation.sweep --bootstrap 0:1:101 --D 0.1,0.5,1,2 --out sweep.csv
+#A value is either a comma separated list or start:stop:num (numpy.linspace).
+
+import time
+
+import numpy as np
+
+from physics.mre_kernel import default_kernel, delta_prime
+from physics.integrators import make_integrator
+from physics.confinement import tau_E_from_width
+from physics.fusion_output import compute_lawson_product, compute_fusion_power
+
+
+#Defaults match the interactive run in main.py
+DEFAULT_PARAMS = {
+    "bootstrap": 0.2,
+    "delta_scale": 10,
+    "D": 1.0,
+    "initial_width": 0.01,
+}
+
+DEFAULT_CONSTANTS = {
+    "A": 0.5,
+    "B": 0.01,
+    "C": 0.5,
+}
+
+SWEEP_KEYS = tuple(DEFAULT_PARAMS) + tuple(DEFAULT_CONSTANTS)
+
+#q of the island-bearing surface in build_initial_plasma (r = 10, q = 1 + 0.1 * r) and its mode numbers
+ISLAND_Q = 2.0
+ISLAND_M = 2
+ISLAND_N = 1
+
+RESULT_KEYS = ("final_width", "cross_section_radius", "tau_E", "lawson", "power", "dP_dt")
+
+#Extra result columns of sweeps run with events: steps each point actually ran, the index (into the
+#events list) of the event that stopped it or -1, and the time it stopped (nan if it ran to the end)
+EVENT_RESULT_KEYS = ("steps_taken", "stop_event", "stop_time")
+
+
+#Cartesian product of the given values; anything not given is held at its default
+def build_grid(**values):
+    unknown = set(values) - set(SWEEP_KEYS)
+    if unknown:
+        raise ValueError(f"Unknown sweep parameter(s): {', '.join(sorted(unknown))}")
+
+    axes = []
+    for key in SWEEP_KEYS:
+        default = DEFAULT_PARAMS.get(key, DEFAULT_CONSTANTS.get(key))
+        axes.append(np.atleast_1d(np.asarray(values.get(key, default), dtype=float)))
+
+    mesh = np.meshgrid(*axes, indexing="ij")
+    return {key: grid.ravel() for key, grid in zip(SWEEP_KEYS, mesh)}
+
+
+#Varies one parameter through `values` with everything else at the defaults (the old hand-run experiments)
+def one_at_a_time(key, values):
+    return build_grid(**{key: values})
+
+
+#Fills in defaults for missing keys and broadcasts every column to the same length
+def normalise_points(points):
+    columns = {}
+    for key in SWEEP_KEYS:
+        default = DEFAULT_PARAMS.get(key, DEFAULT_CONSTANTS.get(key))
+        columns[key] = np.asarray(points.get(key, default), dtype=float)
+    columns = dict(zip(columns, np.broadcast_arrays(*columns.values())))
+    return {key: np.ascontiguousarray(np.atleast_1d(col)) for key, col in columns.items()}
+
+
+#Evolves one chunk of parameter points together and returns the final metrics printed by run_simulation.
+#The right hand side is an MREKernel (physics/mre_kernel.py) evaluated straight on the chunk's arrays;
+#term_inputs supplies the inputs of any extra terms it has (e.g. K_cd / w_cd for "eccd").
+#on_step(t, w) sees the chunk's widths after every step (e.g. for streaming ensemble statistics).
+#events (simulation/events.py) switch to _run_chunk_events.
+def _run_chunk(chunk, dt, steps, integrator=None, kernel=None, term_inputs=None, on_step=None, events=None):
+    kernel = default_kernel if kernel is None else kernel
+    inputs = _kernel_inputs(chunk, term_inputs)
+    if events:
+        if on_step is not None:
+            raise ValueError("on_step is not available together with events (stopped points leave the batch)")
+        return _run_chunk_events(chunk, dt, steps, integrator, kernel, inputs, events)
+    rhs, jac = kernel.bind(**inputs)
+    w = chunk["initial_width"].copy()
+
+    #run_simulation estimates dP/dt from the last 5 steps, so keep the width 5 steps before the end
+    w_lag = None
+    for t in range(steps):
+        if integrator is None:
+            w += rhs(t * dt, w) * dt
+        else:
+            w = integrator.advance(rhs, t * dt, w, dt, jac)
+        if t == steps - 6:
+            w_lag = w.copy()
+        if on_step is not None:
+            on_step(t * dt, w)
+
+    return _chunk_results(w, w_lag, dt)
+
+
+def _kernel_inputs(chunk, term_inputs=None):
+    return {
+        "A": chunk["A"], "B": chunk["B"], "C": chunk["C"], "D": chunk["D"],
+        "delta_prime": delta_prime(ISLAND_Q, ISLAND_M, ISLAND_N, chunk["delta_scale"]),
+        "bootstrap": chunk["bootstrap"],
+        **(term_inputs or {}),
+    }
+
+
+#The printed metrics from the final widths and the widths 5 steps earlier (None: no dP/dt estimate)
+def _chunk_results(final_width, w_lag, dt):
+    tau_E = tau_E_from_width(final_width)
+    power = compute_fusion_power(tau_E)
+
+    if w_lag is not None:
+        dP_dt = (power - compute_fusion_power(tau_E_from_width(w_lag))) / (dt * 5)
+        dP_dt = np.where(np.isnan(dP_dt), 0.0, dP_dt)
+    else:
+        dP_dt = np.zeros_like(power)
+
+    return {
+        "final_width": final_width,
+        "cross_section_radius": final_width / 2,
+        "tau_E": tau_E,
+        "lawson": compute_lawson_product(tau_E),
+        "power": power,
+        "dP_dt": dP_dt,
+    }
+
+
+#_run_chunk with events. Points that stop leave the batch: once a quarter of the batch has stopped, the
+#arrays being stepped (and the kernel inputs) are compacted to the still-running points, so the cost of
+#each step follows how many are left. Until then stopped points ride along but are no longer checked.
+#A stopped point keeps its widths from the step it stopped on, and its dP/dt spans the 5 steps before that.
+def _run_chunk_events(chunk, dt, steps, integrator, kernel, inputs, events):
+    from simulation.events import EventMonitor
+
+    count = len(chunk["initial_width"])
+    monitor = EventMonitor(events, count)
+
+    def bind(idx):
+        return kernel.bind(**{key: value[idx] if np.ndim(value) else value for key, value in inputs.items()})
+
+    def advance(rhs, jac, t, w, h):
+        if integrator is None:
+            return w + rhs(t, w) * h
+        return integrator.advance(rhs, t, w, h, jac)
+
+    idx = np.arange(count)              #points in the batch
+    running = np.ones(count, dtype=bool)  #per batch entry: not stopped yet
+    n_running = count
+    w = chunk["initial_width"].copy()
+    rhs, jac = bind(idx)
+    final_width = w.copy()
+    w_lag = np.full(count, np.nan)
+    steps_taken = np.full(count, float(steps))
+    history = np.empty((6, count))  #batch widths after the last 6 steps, for the dP/dt lag
+
+    for t in range(steps):
+        w_prev = w
+        w = advance(rhs, jac, t * dt, w, dt)
+
+        #Points whose step fired a shrink event redo it in substeps, only those points
+        failed = None
+        if monitor.shrinks:
+            substeps = 1
+            pos = np.flatnonzero(running & monitor.shrink_mask(w[:, None], w_prev[:, None], dt))
+            while pos.size:
+                if substeps >= monitor.max_substeps:
+                    monitor.note_shrink(t * dt, pos, substeps, failed=True)
+                    failed = pos
+                    break
+                substeps *= 2
+                h = dt / substeps
+                sub_rhs, sub_jac = bind(idx[pos])
+                w_sub = w_prev[pos]
+                for k in range(substeps):
+                    w_sub = advance(sub_rhs, sub_jac, t * dt + k * h, w_sub, h)
+                w[pos] = w_sub
+                still = monitor.shrink_mask(w_sub[:, None], w_prev[pos][:, None], dt)
+                if (~still).any():
+                    monitor.note_shrink(t * dt, pos[~still], substeps, failed=False)
+                pos = pos[still]
+
+        history[t % 6] = w
+        live = running
+        if failed is not None:
+            live = running.copy()
+            live[failed] = False
+        stopping = monitor.update(t * dt, w[:, None], w_prev[:, None], dt,
+                                  live=None if failed is None and n_running == len(idx) else live)
+        if failed is not None:
+            stopping[failed] = True
+        if not stopping.any():
+            continue
+
+        gone = idx[stopping]
+        final_width[gone] = w[stopping]
+        steps_taken[gone] = t + 1
+        if t >= 5:
+            w_lag[gone] = history[(t - 5) % 6, stopping]
+        running &= ~stopping
+        n_running = int(running.sum())
+        if n_running <= 0.75 * len(idx):
+            monitor.compact(running)
+            idx, w, history, running = idx[running], w[running], history[:, running], running[running]
+            if not idx.size:
+                break
+            rhs, jac = bind(idx)
+
+    #Points that ran to the end
+    final_width[idx[running]] = w[running]
+    if steps >= 6:
+        w_lag[idx[running]] = history[(steps - 6) % 6, running]
+
+    results = _chunk_results(final_width, w_lag if steps >= 6 else None, dt)
+    results.update(steps_taken=steps_taken, stop_event=monitor.stop_event.astype(float),
+                   stop_time=monitor.stop_time)
+    return results
+
+
+#Runs every parameter point in `points` (dict of equal-length arrays, e.g. from build_grid).
+#Points are processed in chunks of chunk_size so 10^6-point sweeps stay within a modest memory budget.
+#integrator names one of physics/integrators.py (None = forward Euler); each chunk gets a fresh one.
+#kernel / term_inputs switch on extra MRE terms (see physics/mre_kernel.py).
+#events (simulation/events.py) stop points early, e.g. once saturated; the results then also have the
+#EVENT_RESULT_KEYS columns.
+def run_sweep(points, dt=0.1, steps=50, chunk_size=1 << 18, integrator=None, kernel=None, term_inputs=None,
+              events=None):
+    columns = normalise_points(points)
+    total = len(columns["initial_width"])
+
+    results = {key: np.empty(total) for key in RESULT_KEYS + (EVENT_RESULT_KEYS if events else ())}
+    for start in range(0, total, chunk_size):
+        stop = min(start + chunk_size, total)
+        chunk = {key: col[start:stop] for key, col in columns.items()}
+        chunk_integrator = None if integrator is None else make_integrator(integrator)
+        for key, value in _run_chunk(chunk, dt, steps, chunk_integrator, kernel, term_inputs,
+                                     events=events).items():
+            results[key][start:stop] = value
+
+    return {**columns, **results}
+
+
+#Writes a results table: .npz keeps full precision, anything else is written as CSV
+def write_results(results, path):
+    if str(path).endswith(".npz"):
+        np.savez(path, **results)
+        return
+
+    keys = list(results)
+    table = np.column_stack([np.asarray(results[key], dtype=float) for key in keys])
+    np.savetxt(path, table, delimiter=",", header=",".join(keys), comments="", fmt="%.10g")
+
+
+def _parse_values(text):
+    if ":" in text:
+        start, stop, num = text.split(":")
+        return np.linspace(float(start), float(stop), int(num))
+    return np.array([float(v) for v in text.split(",") if v.strip()])
+
+
+def _store_attrs(args):
+    attrs = {"dt": args.dt, "steps": args.steps, "integrator": args.integrator,
+             "steady_state": args.steady_state, "events": args.events}
+    if args.tag is not None:
+        attrs["tag"] = args.tag
+    return attrs
+
+
+def main(argv=None):
+    import argparse  #only the command line needs it; keeps `import simulation.sweep` light for workers
+
+    parser = argparse.ArgumentParser(description="Headless magnetic island parameter sweep")
+    for key in SWEEP_KEYS:
+        parser.add_argument(f"--{key}", type=_parse_values, default=None,
+                            help="comma separated values or start:stop:num")
+    parser.add_argument("--dt", type=float, default=0.1)
+    parser.add_argument("--steps", type=int, default=50)
+    parser.add_argument("--chunk-size", type=int, default=1 << 18)
+    parser.add_argument("--integrator", default=None, help="euler, rk4, rk45 or rosenbrock")
+    parser.add_argument("--steady-state", action="store_true",
+                        help="solve directly for the saturated width instead of time stepping")
+    parser.add_argument("--workers", type=int, default=1, help="spread chunks over a process pool")
+    parser.add_argument("--events", action="store_true",
+                        help="stop points once saturated and split steps that leave the width bounds")
+    parser.add_argument("--out", default="sweep_results.csv", help=".csv or .npz results table")
+    parser.add_argument("--store", default=None, help="also append the results to this ResultStore folder")
+    parser.add_argument("--tag", default=None, help="attrs tag recorded with the stored results")
+    args = parser.parse_args(argv)
+
+    values = {key: getattr(args, key) for key in SWEEP_KEYS if getattr(args, key) is not None}
+    points = build_grid(**values)
+    events = None
+    if args.events:
+        from simulation.events import standard_events
+        events = standard_events()
+
+    start = time.perf_counter()
+    if args.steady_state:
+        from simulation.steady_state import run_steady_state
+        results = run_steady_state(points)
+    elif args.workers > 1:
+        from simulation.parallel import run_parallel, ProgressPrinter
+        results = run_parallel(points, dt=args.dt, steps=args.steps, chunk_size=args.chunk_size,
+                               max_workers=args.workers, integrator=args.integrator,
+                               progress=ProgressPrinter(), store_root=args.store,
+                               store_attrs=_store_attrs(args), events=events)
+    else:
+        results = run_sweep(points, dt=args.dt, steps=args.steps, chunk_size=args.chunk_size,
+                            integrator=args.integrator, events=events)
+    elapsed = time.perf_counter() - start
+
+    #Parallel workers already appended their own chunks
+    if args.store is not None and not (args.workers > 1 and not args.steady_state):
+        from simulation.result_store import ResultStore
+        ResultStore(args.store).append(results, attrs=_store_attrs(args))
+
+    write_results(results, args.out)
+    n_points = len(results["final_width"])
+    print(f"Ran {n_points} parameter points in {elapsed:.3f} s -> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+# simulation/worker.py
+
+#Runs a simulation on a background thread so the GUI thread only draws.
+#Each step is pushed into a bounded queue as a StepRecord; the UI drains the queue on a timer.
+#The bound gives back-pressure: if the UI falls far behind, the solver waits instead of filling memory.
+
+import queue
+import threading
+from collections import namedtuple
+
+from simulation.runner import run_headless
+from simulation.recorder import TimeSeriesRecorder
+
+StepRecord = namedtuple("StepRecord", ["t", "w", "tau_E", "lawson", "power"])
+
+
+class SimulationWorker:
+    def __init__(self, params, dt=0.1, steps=50, maxsize=10_000, **run_options):
+        self.params = dict(params)  #copied so slider moves don't leak into a running simulation
+        self.dt = dt
+        self.steps = steps
+        #The step records already carry the history to the UI, so the run itself only keeps the short
+        #tail needed for the final dP/dt estimate unless a recorder is passed in
+        run_options.setdefault("recorder", TimeSeriesRecorder(mode="ring", capacity=16))
+        self.run_options = run_options
+
+        self.records = queue.Queue(maxsize=maxsize)
+        self.result = None
+        self.error = None
+        self._stop = threading.Event()
+        self._done = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    #Asks the simulation to stop after its current step
+    def cancel(self):
+        self._stop.set()
+
+    def cancelled(self):
+        return self._stop.is_set()
+
+    #True once the run has finished (or failed, or been cancelled) and every record has been drained
+    def finished(self):
+        return self._done.is_set() and self.records.empty()
+
+    def running(self):
+        return self._thread.is_alive()
+
+    def join(self, timeout=None):
+        self._thread.join(timeout)
+
+    #Returns up to max_items queued records without blocking
+    def drain(self, max_items=None):
+        items = []
+        while max_items is None or len(items) < max_items:
+            try:
+                items.append(self.records.get_nowait())
+            except queue.Empty:
+                break
+        return items
+
+    def _push(self, t, island, tau_E, lawson, power):
+        record = StepRecord(t, island.w, tau_E, lawson, power)
+        #Block while the queue is full, but keep checking for a cancel request
+        while not self._stop.is_set():
+            try:
+                self.records.put(record, timeout=0.05)
+                return
+            except queue.Full:
+                continue
+
+    def _run(self):
+        try:
+            self.result = run_headless(self.params, dt=self.dt, steps=self.steps, on_step=self._push,
+                                       stop_event=self._stop, **self.run_options)
+        except Exception as exc:  #reported to the UI thread instead of dying silently
+            self.error = exc
+        finally:
+            self._done.set()
@@ -0,0 +1,32 @@
+# tests/conftest.py
+
+#The project is a set of namespace packages run from the project folder (no install step), so the tests
+#import them the same way
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("MPLBACKEND", "Agg")  #plots are drawn offscreen, no display needed
+
+from simulation.runner import run_headless  # noqa: E402 (needs the path above)
+
+
+#Checkpoint target that keeps every submitted snapshot in memory (a CheckpointWriter may replace one
+#that is still waiting for the disk)
+class Collector:
+    def __init__(self, every):
+        self.every = every
+        self.snapshots = []
+
+    def due(self, step):
+        return step % self.every == 0
+
+    def submit(self, snapshot):
+        self.snapshots.append(snapshot)
+
+
+#Snapshot of a default run after `step` steps
+def snapshot_at(step, **run_options):
+    collector = Collector(step)
+    run_headless(steps=step, checkpoint=collector, **run_options)
+    return collector.snapshots[-1]
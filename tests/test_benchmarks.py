@@ -0,0 +1,41 @@
+# tests/test_benchmarks.py
+
+import json
+
+import numpy as np
+
+from benchmarks import run_benchmarks as bench
+
+
+def test_time_call_loops_until_min_time():
+    calls = []
+    timing = bench.time_call(lambda: calls.append(1), repeats=3, min_time=0.001)
+    assert timing["number"] >= 1 and timing["repeats"] == 3
+    assert 0 < timing["min"] <= timing["median"]
+    assert len(calls) >= 1 + 3 * timing["number"]  #warm-up, then `number` calls per repeat
+
+
+def test_benchmark_states_are_equal_in_both_layouts():
+    vector = bench.build_state(200)
+    objects = bench.build_state(200, vectorized=False)
+    assert vector.n_islands == 20
+    assert vector.get_island_data() == objects.get_island_data()
+
+
+def test_run_group_and_compare_against_baseline(tmp_path):
+    report = bench.run_benchmarks(["diagnostics"], quick=True, repeats=1, min_time=0, verbose=False)
+    assert "compute_tau_E[surfaces=1000]" in report["results"]
+    assert report["meta"]["numpy"] == np.__version__
+
+    faster = {"results": {key: {**entry, "median": entry["median"] / 10} for key, entry in report["results"].items()}}
+    rows = bench.compare(report, faster, threshold=1.25)
+    assert len(rows) == len(report["results"]) and all(row[4] for row in rows)
+    assert not any(row[4] for row in bench.compare(report, report))
+
+    baseline = tmp_path / "baseline.json"
+    baseline.write_text(json.dumps({"results": {"compute_tau_E[surfaces=10]": {"median": 1e-12}}}))
+    argv = ["--groups", "diagnostics", "--quick", "--repeats", "1", "--min-time", "0"]
+    assert bench.main(argv + ["--baseline", str(baseline)]) == 1
+    baseline.write_text(json.dumps({"results": {"compute_tau_E[surfaces=10]": {"median": 1e3}}}))
+    assert bench.main(argv + ["--baseline", str(baseline), "--out", str(tmp_path / "now.json")]) == 0
+    assert "results" in json.loads((tmp_path / "now.json").read_text())
@@ -0,0 +1,70 @@
+# tests/test_cache.py
+
+import os
+
+import numpy as np
+
+import simulation.cache as cache_module
+from conftest import snapshot_at
+from simulation.cache import SimulationCache, cached_run, make_key
+from simulation.recorder import TimeSeriesRecorder
+
+
+def write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as fh:
+        fh.write(text)
+
+
+def test_versions_follow_their_sources(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache_module, "PROJECT_ROOT", str(tmp_path))
+    write(tmp_path / "physics" / "mre.py", "A = 1\n")
+    write(tmp_path / "simulation" / "sweep.py", "B = 1\n")
+    write(tmp_path / "simulation" / "optimize.py", "C = 1\n")
+    solver, analysis = cache_module.solver_version(), cache_module.analysis_version()
+    assert solver != analysis
+
+    write(tmp_path / "simulation" / "optimize.py", "C = 22\n")
+    assert cache_module.solver_version() == solver
+    assert cache_module.analysis_version() != analysis
+
+    write(tmp_path / "simulation" / "sweep.py", "B = 22\n")  #DEFAULT_PARAMS live here
+    assert cache_module.solver_version() != solver
+
+
+def test_hit_returns_the_stored_run():
+    cache = SimulationCache()
+    first = cached_run({"D": 1}, steps=30, cache=cache)
+    second = cached_run({"D": 1.0}, steps=30, cache=cache)
+    assert not first["cache_hit"] and second["cache_hit"]
+    assert second["final_width"] == first["final_width"]
+    np.testing.assert_array_equal(second["recorder"].column("w"), first["recorder"].column("w"))
+    assert not cached_run({"D": 1.1}, steps=30, cache=cache)["cache_hit"]
+
+
+def test_disk_tier_survives_a_new_cache(tmp_path):
+    first = cached_run(steps=20, cache=SimulationCache(disk_dir=str(tmp_path)))
+    fresh = SimulationCache(disk_dir=str(tmp_path))
+    second = cached_run(steps=20, cache=fresh)
+    assert second["cache_hit"] and fresh.stats()["disk_hits"] == 1
+    assert second["power"] == first["power"]
+
+
+def test_recorders_and_record_islands_do_not_share_entries():
+    cache = SimulationCache()
+    cached_run(steps=30, cache=cache, recorder=TimeSeriesRecorder(mode="ring", capacity=5))
+    plain = cached_run(steps=30, cache=cache)
+    assert not plain["cache_hit"] and len(plain["recorder"].column("t")) == 30
+
+    islands = cached_run(steps=30, cache=cache, record_islands=True)
+    assert not islands["cache_hit"] and "island_w" in islands["recorder"].as_dict()
+    assert make_key(steps=30) != make_key(steps=30, record_islands=True)
+
+
+def test_restarts_are_not_cached():
+    cache = SimulationCache()
+    cached_run(steps=60, cache=cache)
+    snapshot = snapshot_at(25).fork(params={"bootstrap": 0.9})
+    resumed = cached_run(steps=60, cache=cache, restart=snapshot)
+    assert not resumed["cache_hit"]
+    assert resumed["final_width"] != cached_run(steps=60, cache=cache)["final_width"]
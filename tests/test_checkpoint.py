@@ -0,0 +1,59 @@
+# tests/test_checkpoint.py
+
+import numpy as np
+import pytest
+
+from simulation.runner import run_headless
+from simulation.events import standard_events
+from conftest import Collector, snapshot_at
+from simulation.checkpoint import CheckpointWriter, fork_runs, fork_sweep, load_snapshot, save_snapshot
+
+
+@pytest.mark.parametrize("integrator", [None, "rk4", "rk45", "rosenbrock"])
+def test_restart_continues_bit_exactly(integrator):
+    full = run_headless(steps=60, integrator=integrator, events=standard_events(tol=0))
+    snapshot = snapshot_at(25, integrator=integrator, events=standard_events(tol=0))
+    resumed = run_headless(steps=60, restart=snapshot, integrator=integrator, events=standard_events(tol=0))
+    for key in ("final_width", "power", "dP_dt", "tau_E"):
+        assert resumed[key] == full[key]
+
+
+def test_snapshot_file_round_trip(tmp_path):
+    snapshot = snapshot_at(20, integrator="rk45")
+    path = save_snapshot(snapshot, tmp_path / "s.snap")
+    loaded = load_snapshot(path)
+    assert loaded.step == 20 and loaded.integrator == snapshot.integrator
+    for key, array in snapshot.arrays.items():
+        np.testing.assert_array_equal(loaded.arrays[key], array)
+    assert run_headless(steps=40, restart=path, integrator="rk45")["final_width"] == \
+        run_headless(steps=40, integrator="rk45")["final_width"]
+
+
+def test_event_stop_checkpoints_the_last_step():
+    collector = Collector(10)
+    result = run_headless(steps=500, events=standard_events(), checkpoint=collector)
+    assert result["steps_taken"] < 500
+    assert collector.snapshots[-1].step == result["steps_taken"]
+
+
+def test_writer_keeps_the_step_an_event_stopped_on(tmp_path):
+    with CheckpointWriter(str(tmp_path / "s_{step:03d}.snap"), every=10) as writer:
+        result = run_headless(steps=500, events=standard_events(), checkpoint=writer)
+    assert load_snapshot(writer.latest).step == result["steps_taken"]
+
+
+def test_fork_runs_apply_state_overrides_like_fork_sweep():
+    snapshot = snapshot_at(25)
+    variations = [{}, {"bootstrap": 0.9}, {"bootstrap": 0.0}, {"initial_width": 0.3}]
+    runs = [result["final_width"] for result in fork_runs(snapshot, variations, steps=50)]
+    sweep = fork_sweep(snapshot, {"bootstrap": [0.2, 0.9, 0.0, 0.2],
+                                  "initial_width": [snapshot.w, snapshot.w, snapshot.w, 0.3]}, steps=50)
+    np.testing.assert_allclose(runs, sweep["final_width"], rtol=1e-12)
+    assert len(set(np.round(runs, 6))) == 4
+
+
+def test_fork_shares_unchanged_arrays():
+    snapshot = snapshot_at(10)
+    child = snapshot.fork(params={"D": 2.0})
+    assert np.shares_memory(child.arrays["radius"], snapshot.arrays["radius"])
+    assert not child.arrays["w"].flags.writeable
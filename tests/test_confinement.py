@@ -0,0 +1,35 @@
+# tests/test_confinement.py
+
+import numpy as np
+
+from physics.confinement import ConfinementDiagnostics, tau_E_from_width
+from simulation.runner import build_initial_plasma
+from plasma.profile import RadialProfile, PowerLawQ
+
+
+def test_setting_width_through_view_refreshes_max_width_diagnostics():
+    state, island = build_initial_plasma({"initial_width": 0.1})
+    diagnostics = ConfinementDiagnostics(state, "max")
+    assert diagnostics.update() == tau_E_from_width(0.1)
+
+    island.w = 0.4
+    assert diagnostics.update() == tau_E_from_width(0.4)
+    island.w = 0.05  #shrinking the largest island must lower max_width again
+    assert diagnostics.update() == tau_E_from_width(0.05)
+
+
+def test_models_and_every_k_caching_on_a_profile():
+    profile = RadialProfile(PowerLawQ(), n_points=200, modes=((2, 1), (3, 2), (3, 1)))
+    state = profile.build_state(w0=0.3)
+    widths = np.array(state.island_widths())
+    assert len(widths) > 1
+
+    assert ConfinementDiagnostics(state, "max").update() == tau_E_from_width(widths.max())
+    assert ConfinementDiagnostics(state, "sum").update() == tau_E_from_width(widths.sum())
+
+    diagnostics = ConfinementDiagnostics(state, "max", every=3)
+    first = diagnostics.update(0)
+    state.set_island_widths(widths * 2)
+    assert diagnostics.update(1) == first  #cached between evaluations
+    assert diagnostics.update(3) == tau_E_from_width(2 * widths.max())
+    assert diagnostics.evaluations == 2
@@ -0,0 +1,83 @@
+# tests/test_ensemble.py
+
+import numpy as np
+import pytest
+
+from simulation.ensemble import (ENSEMBLE_METRICS, StreamingStats, normal_ppf, run_ensemble,
+                                 sample_parameters)
+from simulation.sweep import run_sweep
+
+
+def test_streaming_stats_match_the_whole_array():
+    values = np.random.default_rng(3).lognormal(size=10_001)
+    stats = StreamingStats(reservoir_size=20_000, seed=0)
+    for chunk in np.array_split(values, [1, 7, 500, 4096, 9000]):
+        stats.update(chunk)
+
+    assert stats.count == len(values)
+    assert stats.mean == pytest.approx(values.mean(), rel=1e-12)
+    assert stats.variance == pytest.approx(values.var(ddof=1), rel=1e-10)
+    assert (stats.min, stats.max) == (values.min(), values.max())
+    #the reservoir still holds everything, so quantiles and exceedances are exact
+    assert stats.quantiles([0.1, 0.9]) == pytest.approx(np.quantile(values, [0.1, 0.9]))
+    assert stats.exceedance(2.0) == np.mean(values > 2.0)
+
+
+def test_reservoir_is_a_uniform_sample_once_full():
+    values = np.arange(200_000, dtype=float)
+    stats = StreamingStats(reservoir_size=5_000, seed=1)
+    for chunk in np.array_split(values, 37):
+        stats.update(chunk)
+    sample = stats.sample
+    assert len(sample) == 5_000 and len(np.unique(sample)) == 5_000
+    #each decile of the stream holds about a tenth of the sample
+    counts = np.bincount((sample // 20_000).astype(int), minlength=10)
+    assert np.all(np.abs(counts - 500) < 5 * np.sqrt(500))
+
+
+def test_normal_ppf():
+    assert normal_ppf([0.5])[0] == pytest.approx(0.0, abs=1e-12)
+    assert normal_ppf([0.975])[0] == pytest.approx(1.959963984540054, rel=1e-8)
+    assert normal_ppf([1e-5])[0] == pytest.approx(-4.264890793922825, rel=1e-8)
+    u = np.linspace(0.001, 0.999, 99)
+    np.testing.assert_allclose(normal_ppf(u), -normal_ppf(1 - u), atol=1e-8)
+
+
+def test_latin_hypercube_fills_every_stratum():
+    points = sample_parameters(64, {"bootstrap": ("uniform", 0, 1), "D": ("normal", 1.0, 0.2, 0.5, 1.5),
+                                    "delta_scale": 5}, method="lhs", seed=0)
+    assert np.array_equal(np.sort((points["bootstrap"] * 64).astype(int)), np.arange(64))
+    assert points["D"].min() >= 0.5 and points["D"].max() <= 1.5
+    assert np.all(points["delta_scale"] == 5)
+    with pytest.raises(ValueError, match="Unknown ensemble parameter"):
+        sample_parameters(4, {"bootstrapp": ("uniform", 0, 1)})
+
+
+def test_ensemble_statistics_match_a_sweep_of_the_same_members():
+    result = run_ensemble(300, seed=7, steps=30, chunk_size=128)
+
+    #rebuild the members the way run_ensemble samples them: one generator per chunk, spawned after the
+    #reservoir generators
+    seeds = np.random.SeedSequence(7)
+    seeds.spawn(len(ENSEMBLE_METRICS))
+    chunks = [sample_parameters(size, rng=np.random.default_rng(seed))
+              for size, seed in zip((128, 128, 44), seeds.spawn(3))]
+    members = {key: np.concatenate([chunk[key] for chunk in chunks]) for key in chunks[0]}
+    swept = run_sweep(members, steps=30)
+
+    for key in ("final_width", "power"):
+        stats = result["stats"][key]
+        assert stats.count == 300
+        assert stats.mean == pytest.approx(swept[key].mean(), rel=1e-12)
+        assert stats.std == pytest.approx(swept[key].std(ddof=1), rel=1e-9)
+        assert result["summary"][key]["quantiles"][0.5] == pytest.approx(np.median(swept[key]))
+
+    again = run_ensemble(300, seed=7, steps=30, chunk_size=128)
+    assert again["summary"] == result["summary"]
+
+
+def test_tau_floor_probability():
+    growing = {"bootstrap": 1.0, "D": 0.001, "initial_width": ("uniform", 0.01, 0.02)}
+    assert run_ensemble(50, growing, steps=300, chunk_size=16)["tau_floor_probability"] == 1.0
+    saturating = {"bootstrap": 0.2, "D": 1.0, "initial_width": ("uniform", 0.01, 0.02)}
+    assert run_ensemble(50, saturating, steps=300)["tau_floor_probability"] == 0.0
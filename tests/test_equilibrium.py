@@ -0,0 +1,38 @@
+# tests/test_equilibrium.py
+
+import numpy as np
+
+from physics.equilibrium import (DECAY, RUNAWAY, STABLE, W_FLOOR, mre_rhs, mre_slope,
+                                 solve_saturated_width)
+from physics.mre_kernel import default_kernel
+from simulation.steady_state import run_steady_state
+from simulation.sweep import run_sweep
+
+
+def test_residual_and_slope_are_the_kernel_including_below_the_clamp():
+    w = np.array([W_FLOOR / 10, W_FLOOR, 0.01, 0.3, 2.0])
+    inputs = {"A": 1.0, "delta_prime": 0.6, "B": 0.01, "C": 0.0, "bootstrap": 0.0, "D": 1.0}
+    np.testing.assert_array_equal(mre_rhs(w, 0.6, 0.01, 1.0), default_kernel.rhs(w, **inputs))
+    np.testing.assert_array_equal(mre_slope(w, 0.01, 1.0), default_kernel.jacobian(w, **inputs))
+    assert mre_slope(w, 0.01, 1.0)[0] == 0.0  #flat below the clamp, saturation term included
+    assert mre_rhs(w, 0.6, 0.01, 1.0)[0] == mre_rhs(W_FLOOR, 0.6, 0.01, 1.0)
+
+
+def test_saturated_width_is_a_stable_root():
+    result = solve_saturated_width([0.01, 0.5, 3.0], 0.6, 0.01, 1.0)
+    assert np.all(result["status"] == STABLE)
+    np.testing.assert_allclose(mre_rhs(result["width"], 0.6, 0.01, 1.0), 0, atol=1e-12)
+    assert np.all(result["slope"] < 0)
+
+
+def test_decay_and_runaway():
+    result = solve_saturated_width([0.1, 0.1], [-1.0, 1.0], [0.0, 0.0], [1.0, 0.0], w_max=1e3)
+    assert result["status"].tolist() == [DECAY, RUNAWAY]
+    assert result["width"][0] == 0 and np.isinf(result["width"][1])
+
+
+def test_steady_state_matches_long_time_stepping():
+    points = {"bootstrap": np.array([0.1, 0.4, 0.8]), "D": np.array([0.5, 1.0, 2.0])}
+    direct = run_steady_state(points)
+    stepped = run_sweep(points, dt=0.01, steps=20_000)
+    np.testing.assert_allclose(direct["final_width"], stepped["final_width"], rtol=1e-6)
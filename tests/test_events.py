@@ -0,0 +1,75 @@
+# tests/test_events.py
+
+import numpy as np
+import pytest
+
+from simulation.events import Event, EventMonitor, standard_events
+from simulation.runner import run_headless
+from simulation.sweep import build_grid, run_sweep
+
+GROWING = {"bootstrap": 1.0, "D": 0.001}  #island runs away past the minor radius
+
+
+def test_saturation_stops_the_run_after_holding():
+    plain = run_headless(steps=2000)
+    run = run_headless(steps=2000, events=[Event("saturation", tol=1e-3)])
+    events = run["events"]
+    assert events["stopped"] and events["stop_event"] == "saturation"
+    assert run["steps_taken"] < 2000
+    assert len(run["recorder"]) == run["steps_taken"]
+    assert events["stop_time"] == pytest.approx(0.1 * (run["steps_taken"] - 1))
+    #|dw/dt| < tol with a relaxation rate of about 2 D w ~ 0.7 puts it within ~tol / 0.7 of saturation
+    assert run["final_width"] == pytest.approx(plain["final_width"], abs=2e-3)
+
+    #the width change stayed below tol * dt on the last 3 steps (hold=3), not on the 4th from last
+    steps = np.abs(np.diff(run["recorder"].column("w")))
+    assert np.all(steps[-3:] < 1e-3 * 0.1) and steps[-4] >= 1e-3 * 0.1
+
+
+def test_record_events_log_once_and_let_the_run_finish():
+    run = run_headless(GROWING, steps=400, events=[Event("tau_floor", "record")])
+    assert run["steps_taken"] == 400 and not run["events"]["stopped"]
+    log = run["events"]["log"]
+    assert len(log) == 1 and log[0][1:] == ["tau_floor", "record"]
+    tau_E = run["recorder"].column("tau_E")
+    first = int(np.argmax(tau_E <= 0.01))
+    assert log[0][0] == pytest.approx(0.1 * first)
+
+
+def test_shrink_splits_an_overshooting_step():
+    #at w = 6 one Euler step of -D w^2 dt overshoots below zero; halving it does not
+    params = {"initial_width": 6.0, "D": 2.0, "bootstrap": 0.0}
+    plain = run_headless(params, steps=5)
+    assert plain["recorder"].column("w")[0] < 0
+
+    run = run_headless(params, steps=5, events=[Event("width_bounds", "shrink")])
+    assert np.all(run["recorder"].column("w") > 0)
+    assert run["events"]["log"][0][1:] == ["width_bounds", "shrink x2"]
+
+    stuck = run_headless(params, steps=5, events=[Event("width_bounds", "shrink", max_substeps=1)])
+    assert stuck["events"]["stop_event"] == "width_bounds" and stuck["steps_taken"] == 1
+
+
+def test_sweep_events_match_single_runs():
+    points = build_grid(bootstrap=[0.0, 0.3, 1.0], D=[0.001, 1.0])
+    swept = run_sweep(points, steps=600, events=standard_events())
+    for i in range(len(points["D"])):
+        params = {"bootstrap": points["bootstrap"][i], "D": points["D"][i]}
+        single = run_headless(params, steps=600, events=standard_events())
+        assert swept["steps_taken"][i] == single["steps_taken"]
+        assert swept["final_width"][i] == pytest.approx(single["final_width"], rel=1e-12)
+        stopped = single["events"]["stop_event"]
+        assert (swept["stop_event"][i] >= 0) == (stopped is not None)
+
+
+def test_monitor_batches_and_bad_events():
+    monitor = EventMonitor([Event("width_bounds", w_max=1.0)], members=3)
+    w_prev = np.array([[0.5], [0.5], [0.5]])
+    stopping = monitor.update(0.1, np.array([[0.6], [1.5], [0.7]]), w_prev, 0.1)
+    assert stopping.tolist() == [False, True, False]
+    assert monitor.stop_event.tolist() == [-1, 0, -1] and monitor.stop_time[1] == 0.1
+
+    with pytest.raises(ValueError, match="Unknown event"):
+        Event("blowup")
+    with pytest.raises(ValueError, match="Unknown event action"):
+        Event("saturation", "pause")
@@ -0,0 +1,79 @@
+# tests/test_export.py
+
+import shutil
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from UI.export import FrameRenderer, export_trajectory, frame_indices, latest_trajectory, load_trajectory, output_kind
+from simulation.result_store import ResultStore
+from simulation.runner import run_headless
+
+SMALL = {"figsize": (4, 3), "dpi": 40}
+
+
+@pytest.fixture(scope="module")
+def run():
+    return run_headless(steps=120)
+
+
+def test_frame_indices():
+    assert frame_indices(0).size == 0
+    assert frame_indices(10, every=4).tolist() == [0, 4, 8, 9]
+    assert frame_indices(101, frames=5).tolist() == [0, 25, 50, 75, 100]
+    assert frame_indices(3, frames=10).tolist() == [0, 1, 2]
+
+
+def test_output_kind(tmp_path):
+    assert output_kind("run.mp4") == ("video", None)
+    assert output_kind("run.GIF") == ("gif", None)
+    assert output_kind("frames/f_%03d.png") == ("images", "frames/f_%03d.png")
+    assert output_kind("shot.png") == ("images", "shot_%05d.png")
+    assert output_kind(tmp_path) == ("images", str(tmp_path / "frame_%05d.png"))
+    with pytest.raises(ValueError, match="Unknown export format"):
+        output_kind("run.txt")
+
+
+def test_trajectory_sources(run, tmp_path):
+    store = ResultStore(tmp_path)
+    store.append_run({}, run)
+    shard = latest_trajectory(tmp_path)
+    stored = load_trajectory(str(tmp_path), shard)
+    for key, col in load_trajectory(run).items():
+        assert np.array_equal(stored[key], col)
+    with pytest.raises(ValueError, match="missing column"):
+        load_trajectory({"t": [0.0], "w": [0.1]})
+
+
+def test_frames_follow_the_run(run):
+    renderer = FrameRenderer(load_trajectory(run), **SMALL)
+    first, last = renderer.render(0), renderer.render(119)
+    assert first.shape == (120, 160, 3) and first.dtype == np.uint8
+    assert not np.array_equal(first, last)
+    assert np.array_equal(renderer.render(0), first)  #frames do not depend on what was drawn before
+
+
+def test_image_sequence_is_the_same_from_worker_processes(run, tmp_path):
+    serial = export_trajectory(run, tmp_path / "serial", frames=9, workers=1, chunk_frames=4, **SMALL)
+    parallel = export_trajectory(run, tmp_path / "parallel", frames=9, workers=2, chunk_frames=4, **SMALL)
+    assert serial["frames"] == parallel["frames"] == 9
+    assert parallel["workers"] == 2
+    for i in range(9):
+        name = f"frame_{i:05d}.png"
+        assert np.array_equal(np.asarray(Image.open(tmp_path / "serial" / name)),
+                              np.asarray(Image.open(tmp_path / "parallel" / name)))
+
+
+def test_gif_export(run, tmp_path):
+    summary = export_trajectory(run, tmp_path / "run.gif", every=20, fps=10, workers=1, **SMALL)
+    assert summary["frames"] == 7  #rows 0, 20, ..., 100 and the last row
+    with Image.open(tmp_path / "run.gif") as gif:
+        assert gif.n_frames == 7
+        assert gif.info["duration"] == 100
+
+
+@pytest.mark.skipif(shutil.which("ffmpeg") is not None, reason="ffmpeg is installed")
+def test_video_without_ffmpeg_says_what_to_use_instead(run, tmp_path):
+    with pytest.raises(RuntimeError, match="ffmpeg was not found"):
+        export_trajectory(run, tmp_path / "run.mp4", frames=2, workers=1, **SMALL)
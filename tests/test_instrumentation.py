@@ -0,0 +1,61 @@
+# tests/test_instrumentation.py
+
+import time
+
+import pytest
+
+from simulation.instrumentation import Instrumentation, instrumentation
+from simulation.runner import run_headless
+
+
+@pytest.fixture
+def enabled():
+    instrumentation.enable()
+    yield instrumentation
+    instrumentation.disable()
+    instrumentation.reset()
+
+
+def test_disabled_hooks_do_nothing():
+    instr = Instrumentation()
+    assert instr.phase("a") is instr.phase("b")  #the shared no-op
+
+    def func():
+        return 1
+    assert instr.wrap("f", func) is func
+    with instr.phase("a"):
+        instr.count("n")
+    assert instr.timers == {} and instr.counters == {}
+
+
+def test_nested_phases_split_self_time():
+    instr = Instrumentation()
+    instr.enable()
+    with instr.phase("outer"):
+        with instr.phase("inner"):
+            time.sleep(0.02)
+        with instr.phase("inner"):
+            pass
+    assert instr.timers["inner"][0] == 2
+    assert instr.timers["outer"][1] >= instr.timers["inner"][1] >= 0.02
+    assert instr.stacks["outer;inner"] >= 0.02
+    assert instr.stacks["outer"] < 0.02  #only the time outside the inner phases
+
+
+def test_run_counts_steps_and_rhs_calls(enabled, tmp_path):
+    run_headless(steps=30)
+    assert enabled.counters["steps"] == 30
+    assert enabled.counters["rhs_evals"] == 30  #forward Euler: one batched RHS call per step
+    for phase in ("evolve_islands", "compute_tau_E", "fusion_output", "record"):
+        assert enabled.timers[phase][0] == 30
+    assert "evolve_islands;mre_rhs" in enabled.stacks
+    assert "rhs_evals" in enabled.summary()
+
+    folded, = enabled.dump(str(tmp_path / "run"))
+    lines = open(folded).read().splitlines()
+    assert any(line.startswith("evolve_islands;mre_rhs ") for line in lines)
+
+
+def test_rk4_run_counts_every_stage(enabled):
+    run_headless(steps=10, integrator="rk4")
+    assert enabled.counters["rhs_evals"] == 40
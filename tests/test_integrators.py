@@ -0,0 +1,86 @@
+# tests/test_integrators.py
+
+import numpy as np
+import pytest
+
+from physics.integrators import make_integrator
+from physics.mre_solver import compute_dw_dt, compute_dw_dt_jacobian
+from plasma.flux_surface import FluxSurface, MagneticIsland
+
+
+def decay(t, w):
+    return -w
+
+
+def _integrate(integrator, f, w0, dt, steps, jac=None):
+    w = w0
+    for t in range(steps):
+        w = integrator.advance(f, t * dt, w, dt, jac)
+    return w
+
+
+#Halving dt cuts the error by 2**order for the fixed-step methods
+@pytest.mark.parametrize("name, order", [("euler", 1), ("rk4", 4)])
+def test_fixed_step_order(name, order):
+    errors = [abs(_integrate(make_integrator(name), decay, 1.0, dt, round(1 / dt)) - np.exp(-1))
+              for dt in (0.1, 0.05)]
+    assert np.log2(errors[0] / errors[1]) == pytest.approx(order, abs=0.15)
+
+
+@pytest.mark.parametrize("name, rtol", [("rk45", 1e-8), ("rosenbrock", 1e-6)])
+def test_adaptive_methods_meet_their_tolerance(name, rtol):
+    integrator = make_integrator(name, rtol=rtol, atol=1e-12)
+    w = _integrate(integrator, decay, np.array([1.0, 2.0]), 0.5, 4)
+    np.testing.assert_allclose(w, [np.exp(-2), 2 * np.exp(-2)], rtol=100 * rtol)
+    assert integrator.stats.steps > 4  #it had to sub-step
+
+
+#Stiff relaxation w' = -1000 (w - 1): forward Euler blows up at dt = 0.1, Rosenbrock settles on w = 1
+def test_rosenbrock_is_stable_on_stiff_problems():
+    def stiff(t, w):
+        return -1000 * (w - 1)
+
+    def stiff_jac(t, w):
+        return np.full_like(w, -1000.0)
+
+    w = _integrate(make_integrator("rosenbrock"), stiff, np.array([0.0]), 0.1, 10, stiff_jac)
+    assert w[0] == pytest.approx(1.0, rel=1e-6)
+    assert abs(_integrate(make_integrator("euler"), stiff, np.array([0.0]), 0.1, 10)[0]) > 1e10
+
+
+#The MRE of the default island, against a tiny-step RK4 reference
+@pytest.mark.parametrize("name", ["rk4", "rk45", "rosenbrock"])
+def test_mre_against_reference(name):
+    surface = FluxSurface(radius=10, q=2.0)
+    constants = {"A": 0.5, "B": 0.01, "C": 0.5, "D": 1.0}
+    island = MagneticIsland(np.array([0.01, 0.3]), 2, 1, 0.2)
+
+    def rhs(t, w):
+        return compute_dw_dt(MagneticIsland(w, 2, 1, 0.2), surface, **constants)
+
+    def jac(t, w):
+        return compute_dw_dt_jacobian(MagneticIsland(w, 2, 1, 0.2), surface, **constants)
+
+    reference = _integrate(make_integrator("rk4"), rhs, island.w, 0.001, 5000)
+    w = _integrate(make_integrator(name), rhs, island.w, 0.1, 50, jac)
+    np.testing.assert_allclose(w, reference, rtol=1e-3)
+
+
+def test_jacobian_matches_finite_differences_and_is_zero_below_the_clamp():
+    surface = FluxSurface(radius=10, q=2.0)
+    constants = {"A": 0.5, "B": 0.01, "C": 0.5, "D": 1.0}
+    w = np.array([1e-6, 1e-3, 0.1, 2.0])
+    h = 1e-7 * w
+
+    def rhs(w):
+        return compute_dw_dt(MagneticIsland(w, 2, 1, 0.2), surface, **constants)
+
+    jacobian = compute_dw_dt_jacobian(MagneticIsland(w, 2, 1, 0.2), surface, **constants)
+    assert jacobian[0] == 0.0
+    np.testing.assert_allclose(jacobian[1:], ((rhs(w + h) - rhs(w - h)) / (2 * h))[1:], rtol=1e-6)
+    assert isinstance(compute_dw_dt_jacobian(MagneticIsland(0.1, 2, 1, 0.2), surface, **constants), float)
+
+
+def test_unknown_integrator():
+    with pytest.raises(ValueError, match="Unknown integrator"):
+        make_integrator("leapfrog")
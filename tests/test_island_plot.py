@@ -0,0 +1,60 @@
+# tests/test_island_plot.py
+
+import matplotlib.pyplot as plt
+
+import UI.island_plot as island_plot
+from simulation.recorder import TimeSeriesRecorder
+from simulation.runner import build_initial_plasma
+
+
+def test_original_call_form_still_plots_into_a_shared_history():
+    _, island = build_initial_plasma()
+    island_plot.reset_default_history()
+    island_plot.plot_island_growth(island, 0.0, 0.99, 9.9e20, 9.9e16)
+    island_plot.plot_island_growth(island, 0.1, 0.98, 9.8e20, 9.8e16)
+    assert island_plot._default_history.column("t").tolist() == [0.0, 0.1]
+    plt.close("all")
+
+
+def test_caller_owned_history_is_separate():
+    _, island = build_initial_plasma()
+    history = TimeSeriesRecorder()
+    island_plot.reset_default_history()
+    island_plot.plot_island_growth(island, 0.0, 0.99, 9.9e20, 9.9e16, history)
+    assert len(history.column("t")) == 1
+    assert len(island_plot._default_history.column("t")) == 0
+    plt.close("all")
+
+
+def _push_run(renderer, steps):
+    for step in range(steps):
+        t = 0.1 * step
+        renderer.push(t, 0.01 + 0.001 * step, 1 - 0.001 * step, 1e20, 1e16 * (1 - 0.001 * step))
+
+
+def test_renderer_blits_and_only_redraws_fully_when_rescaling():
+    renderer = island_plot.IslandGrowthRenderer(plt.figure(), target_fps=0)
+    full_draws = []
+    full_draw = renderer._full_draw
+    renderer._full_draw = lambda: (full_draws.append(1), full_draw())
+    _push_run(renderer, 300)
+
+    assert renderer.redraws == 300
+    assert len(full_draws) < 40  #axis limits grow with headroom, the other frames are blits
+    t, w = renderer.line_width.get_data()
+    assert len(t) == 300 and w[-1] == 0.01 + 0.001 * 299
+    plt.close("all")
+
+
+def test_renderer_throttles_and_decimates():
+    renderer = island_plot.IslandGrowthRenderer(plt.figure(), target_fps=1e-3, max_points=64)
+    _push_run(renderer, 1000)
+    assert renderer.redraws == 1  #the first frame only; the next is due in 1000 s
+    assert renderer.size == 1000
+
+    renderer.finish()
+    t, w = renderer.line_width.get_data()
+    assert len(t) <= 65
+    assert t[0] == 0.0 and t[-1] == 0.1 * 999  #whole run, latest point included
+    assert renderer.circle.get_radius() == (0.01 + 0.001 * 999) / 2
+    plt.close("all")
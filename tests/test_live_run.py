@@ -0,0 +1,65 @@
+# tests/test_live_run.py
+
+import time
+
+import matplotlib.pyplot as plt
+
+from UI.live_run import LiveRunController
+from simulation.cache import SimulationCache
+
+
+class FakeTimer:
+    def __init__(self):
+        self.callbacks = []
+        self.running = False
+
+    def add_callback(self, callback):
+        self.callbacks.append(callback)
+
+    def start(self):
+        self.running = True
+
+    def stop(self):
+        self.running = False
+
+
+class FakeCanvas:
+    def __init__(self):
+        self.timer = FakeTimer()
+
+    def new_timer(self, interval):
+        return self.timer
+
+
+def failing_solver(island, flux_surface):
+    raise RuntimeError("solver blew up")
+
+
+def run_to_end(controller, canvas, params):
+    controller.start(params)
+    deadline = time.time() + 10
+    while controller.worker is not None and time.time() < deadline:
+        controller.poll()
+        time.sleep(0.01)
+
+
+def test_worker_error_stops_the_timer_and_reaches_on_error():
+    canvas, errors, finished = FakeCanvas(), [], []
+    controller = LiveRunController(canvas, steps=5, on_error=errors.append, on_finished=finished.append,
+                                   mre_solver=failing_solver)
+    run_to_end(controller, canvas, {})
+    assert [str(error) for error in errors] == ["solver blew up"]
+    assert isinstance(controller.error, RuntimeError)
+    assert not canvas.timer.running and not controller.running() and finished == []
+    plt.close("all")
+
+
+def test_finished_run_is_cached_and_replayed():
+    canvas, finished = FakeCanvas(), []
+    controller = LiveRunController(canvas, steps=20, on_finished=finished.append, cache=SimulationCache())
+    run_to_end(controller, canvas, {"D": 1.5})
+    controller.start({"D": 1.5})  #second start is a cache hit, replayed without a worker
+    assert controller.worker is None and controller.error is None
+    assert len(finished) == 2 and finished[1]["cache_hit"]
+    assert finished[1]["final_width"] == finished[0]["final_width"]
+    plt.close("all")
@@ -0,0 +1,98 @@
+# tests/test_mre_kernel.py
+
+import pickle
+
+import numpy as np
+import pytest
+
+from physics import mre_kernel
+from physics.mre_kernel import DEFAULT_TERMS, MREKernel, compare_backends, default_kernel, numba, register_term
+from physics.mre_solver import compute_dw_dt, compute_dw_dt_jacobian
+from plasma.flux_surface import FluxSurface, MagneticIsland
+
+CONSTANTS = {"A": 0.5, "B": 0.01, "C": 0.5, "D": 1.0}
+
+
+@pytest.fixture
+def widths():
+    rng = np.random.default_rng(0)
+    return np.concatenate(([0.0, 1e-6, 1e-5], rng.uniform(1e-4, 2.0, 200)))
+
+
+@pytest.fixture
+def custom_term():
+    register_term("test_drag", lambda w, K_drag: -K_drag * w ** 3)
+    yield "test_drag"
+    del mre_kernel.TERMS["test_drag"]
+    mre_kernel._compiled.clear()
+
+
+def _island_inputs(w):
+    island = MagneticIsland(w, 2, 1, np.linspace(0, 1, len(w)))
+    surface = FluxSurface(10, 1.9)
+    inputs = {**CONSTANTS, "delta_prime": mre_kernel.delta_prime(1.9, 2, 1), "bootstrap": island.bootstrap_drive}
+    return island, surface, inputs
+
+
+def test_default_kernel_reproduces_compute_dw_dt(widths):
+    island, surface, inputs = _island_inputs(widths)
+    assert np.array_equal(default_kernel.rhs(widths, **inputs), compute_dw_dt(island, surface, **CONSTANTS))
+    np.testing.assert_allclose(default_kernel.jacobian(widths, **inputs),
+                               compute_dw_dt_jacobian(island, surface, **CONSTANTS), rtol=1e-14)
+
+    solver = default_kernel.mre_solver(**CONSTANTS)
+    assert np.array_equal(solver(island, surface), compute_dw_dt(island, surface, **CONSTANTS))
+
+
+def test_scalar_width_with_array_inputs_and_out(widths):
+    _, _, inputs = _island_inputs(widths)
+    expected = default_kernel.rhs(np.full_like(widths, 0.1), **inputs)
+    assert np.array_equal(default_kernel.rhs(0.1, **inputs), expected)
+
+    out = np.empty_like(widths)
+    assert default_kernel.rhs(widths, out=out, **inputs) is out
+    assert np.array_equal(out, default_kernel.rhs(widths, **inputs))
+    assert np.ndim(default_kernel.rhs(0.1, **{**inputs, "bootstrap": 0.2})) == 0
+
+
+def test_custom_term_and_its_numeric_jacobian(widths, custom_term):
+    kernel = MREKernel(DEFAULT_TERMS + (custom_term,))
+    assert kernel.inputs[-1] == "K_drag"
+    _, _, inputs = _island_inputs(widths)
+
+    extra = kernel.rhs(widths, K_drag=0.3, **inputs) - default_kernel.rhs(widths, **inputs)
+    w = np.maximum(widths, mre_kernel.W_FLOOR)
+    np.testing.assert_allclose(extra, -0.3 * w ** 3, rtol=1e-12, atol=1e-15)
+
+    #terms registered without a jacobian are differentiated numerically
+    extra_jac = kernel.jacobian(widths, K_drag=0.3, **inputs) - default_kernel.jacobian(widths, **inputs)
+    np.testing.assert_allclose(extra_jac[3:], -0.9 * widths[3:] ** 2, rtol=1e-6, atol=1e-10)
+    assert np.all(extra_jac[:2] == 0)  #below the clamp
+
+    assert pickle.loads(pickle.dumps(kernel)).terms == kernel.terms
+
+
+def test_analytic_jacobians_match_finite_differences():
+    kernel = MREKernel(DEFAULT_TERMS + ("eccd", "ggj"))
+    w = np.linspace(0.01, 1.0, 50)
+    inputs = {**CONSTANTS, "delta_prime": 1.0, "bootstrap": 0.2, "K_cd": 0.1, "w_cd": 0.05,
+              "K_ggj": 0.02, "w_d": 0.03}
+    h = 1e-6 * w
+    numeric = (kernel.rhs(w + h, **inputs) - kernel.rhs(w - h, **inputs)) / (2 * h)
+    np.testing.assert_allclose(kernel.jacobian(w, **inputs), numeric, rtol=1e-6)
+
+
+def test_bad_terms_and_inputs(custom_term):
+    with pytest.raises(ValueError, match="already registered"):
+        register_term(custom_term, lambda w: w)
+    with pytest.raises(ValueError, match="first argument"):
+        register_term("test_bad", lambda x: x)
+    with pytest.raises(ValueError, match="Unknown MRE term"):
+        MREKernel(("delta_prime", "missing"))
+    with pytest.raises(TypeError, match="inputs missing: D"):
+        default_kernel.rhs(0.1, A=0.5, delta_prime=1.0, B=0.01, C=0.5, bootstrap=0.2)
+
+
+@pytest.mark.skipif(numba is None, reason="numba is not installed")
+def test_numba_kernel_matches_numpy():
+    assert compare_backends() <= 1e-12
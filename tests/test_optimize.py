@@ -0,0 +1,71 @@
+# tests/test_optimize.py
+
+import numpy as np
+import pytest
+
+from simulation.optimize import Objective, optimize, steady_state_sensitivities, width_sensitivities
+from simulation.steady_state import run_steady_state
+from simulation.sweep import run_sweep
+
+NAMES = ["bootstrap", "delta_scale", "D", "initial_width"]
+POINTS = {"bootstrap": np.array([0.1, 0.5, 0.9]), "delta_scale": np.array([2.0, 10.0, 18.0]),
+          "D": np.array([0.3, 1.0, 1.8]), "initial_width": np.array([0.002, 0.02, 0.04])}
+
+
+def _central_difference(func, points, name, rel=1e-6):
+    h = rel * np.maximum(np.abs(points[name]), 1.0)
+    up = func({**points, name: points[name] + h})
+    down = func({**points, name: points[name] - h})
+    return (up - down) / (2 * h)
+
+
+def test_stepped_sensitivities_match_finite_differences():
+    width, S = width_sensitivities(POINTS, NAMES, dt=0.1, steps=60)
+    assert np.array_equal(width, run_sweep(POINTS, steps=60)["final_width"])
+    for j, name in enumerate(NAMES):
+        numeric = _central_difference(lambda p: run_sweep(p, steps=60)["final_width"], POINTS, name)
+        np.testing.assert_allclose(S[:, j], numeric, rtol=1e-5, atol=1e-9)
+
+
+def test_steady_state_sensitivities_match_finite_differences():
+    width, S = steady_state_sensitivities(POINTS, NAMES)
+    for j, name in enumerate(NAMES):
+        numeric = _central_difference(lambda p: run_steady_state(p)["final_width"], POINTS, name)
+        np.testing.assert_allclose(S[:, j], numeric, rtol=1e-5, atol=1e-9)
+
+
+@pytest.mark.parametrize("objective", ["power", "final_width"])
+def test_objective_gradient_matches_finite_differences(objective):
+    problem = Objective(objective=objective, steps=40)
+    x = np.random.default_rng(4).uniform(0.1, 0.9, (5, len(problem.names)))
+    values, grads = problem.value_and_gradient(x)
+    assert np.array_equal(values, problem(x))
+
+    h = 1e-6
+    for j in range(len(problem.names)):
+        step = np.zeros(len(problem.names))
+        step[j] = h
+        numeric = (problem(x + step) - problem(x - step)) / (2 * h)
+        np.testing.assert_allclose(grads[:, j], numeric, rtol=1e-4, atol=1e-6 * np.abs(values).max())
+
+
+def test_repeated_points_are_not_rerun():
+    problem = Objective(steps=10)
+    x = np.full((4, len(problem.names)), 0.5)
+    problem.metric(x)
+    problem.metric(x[:2])
+    assert problem.evaluations == 1
+    assert problem.cache_hits == 3 + 2
+    with pytest.raises(ValueError, match="forward Euler"):
+        Objective(integrator="rk4").value_and_gradient(x)
+
+
+#The smallest saturated island has no bootstrap drive and the strongest saturation term
+@pytest.mark.parametrize("method", ["gradient", "cmaes", "bayes"])
+def test_methods_find_the_bound_optimum(method):
+    result = optimize(method, objective="final_width", max_evals=200, seed=0)
+    assert result["params"]["bootstrap"] == pytest.approx(0.0, abs=1e-3)
+    assert result["params"]["D"] == pytest.approx(2.0, abs=1e-3)
+    best = run_sweep({"bootstrap": 0.0, "D": 2.0, "initial_width": 0.035})["final_width"][0]
+    assert result["value"] == pytest.approx(best, rel=1e-3)
+    assert result["evaluations"] <= 260
@@ -0,0 +1,46 @@
+# tests/test_parallel.py
+
+import types
+
+import numpy as np
+import pytest
+
+from simulation.parallel import chunk_points, count_points, run_parallel
+from simulation.sweep import RESULT_KEYS, build_grid, run_sweep
+
+
+def test_chunks_cover_the_points_lazily():
+    points = {"bootstrap": np.linspace(0, 1, 7), "D": 2.0}
+    assert count_points(points) == 7
+
+    chunks = chunk_points(points, 3)
+    assert isinstance(chunks, types.GeneratorType)
+    chunks = list(chunks)
+    assert [len(chunk["bootstrap"]) for chunk in chunks] == [3, 3, 1]
+    assert np.array_equal(np.concatenate([chunk["bootstrap"] for chunk in chunks]), points["bootstrap"])
+    assert all(np.all(chunk["D"] == 2.0) for chunk in chunks)
+
+
+def test_parallel_sweep_matches_serial_sweep():
+    points = build_grid(bootstrap=np.linspace(0, 1, 9), D=[0.5, 1.5])
+    progress = []
+    parallel = run_parallel(points, steps=40, chunk_size=5, max_workers=2,
+                            progress=lambda index, *rest: progress.append(index))
+    serial = run_sweep(points, steps=40)
+
+    assert progress == [0, 1, 2, 3]  #chunks come back in order
+    for key in RESULT_KEYS:
+        assert np.array_equal(parallel[key], serial[key]), key
+
+
+def test_per_run_mode_matches_vectorized():
+    points = build_grid(bootstrap=[0.1, 0.5, 0.9])
+    per_run = run_parallel(points, steps=30, chunk_size=2, max_workers=2, mode="per-run")
+    vectorized = run_parallel(points, steps=30, chunk_size=2, max_workers=2)
+    for key in RESULT_KEYS:
+        np.testing.assert_allclose(per_run[key], vectorized[key], rtol=1e-9, atol=1e-12)
+
+
+def test_unpicklable_solver_is_rejected_up_front():
+    with pytest.raises(ValueError, match="picklable"):
+        run_parallel(build_grid(), mode="per-run", mre_solver=lambda isl, fs: 0.0)
@@ -0,0 +1,63 @@
+# tests/test_profile.py
+
+import numpy as np
+import pytest
+
+from plasma.profile import PowerLawQ, RadialProfile, clear_profile_cache, get_profile
+from simulation.runner import run_headless
+
+
+#q = 1 + 2 (r / 10)**2, so q = m/n sits at r = 10 sqrt((m/n - 1) / 2)
+def _exact_radius(m, n):
+    return 10 * np.sqrt((m / n - 1) / 2)
+
+
+def test_rational_surfaces_of_a_power_law():
+    profile = RadialProfile(PowerLawQ(q0=1.0, qa=3.0, a=10), n_points=1001,
+                            modes=((3, 2), (2, 1), (5, 2), (4, 2)))
+    assert profile.n_islands == 3  #(4, 2) is the (2, 1) surface again
+    assert [tuple(mode) for mode in zip(profile.m, profile.n)] == [(3, 2), (2, 1), (5, 2)]
+    for m, n in ((3, 2), (2, 1), (5, 2)):
+        assert profile.surfaces_of(m, n) == pytest.approx([_exact_radius(m, n)], abs=1e-12)
+
+    assert np.all(np.diff(profile.radius) > 0)
+    assert profile.n_surfaces == 1001 + 2  #r = 5 for 3/2 lies on the grid already
+    assert np.array_equal(profile.q[profile.island_surface], [1.5, 2.0, 2.5])
+    assert profile.island_index(2, 1) == 1 and profile.island_index(3, 1) is None
+
+
+def test_reversed_shear_table_has_two_surfaces_per_mode():
+    r = np.linspace(0, 10, 11)
+    q = 3 - 2 * np.sin(np.pi * r / 10)  #q drops to 1 mid-radius and rises again
+    profile = RadialProfile((r, q), n_points=2001, modes=((2, 1),))
+    radii = profile.surfaces_of(2, 1)
+    assert len(radii) == 2
+    assert radii[0] < 5 < radii[1]
+    np.testing.assert_allclose(np.interp(radii, r, q), 2.0, atol=1e-12)
+
+
+def test_states_and_runs_from_a_profile():
+    profile = RadialProfile(PowerLawQ(q0=1.0, qa=3.0, a=10), n_points=500, modes=((3, 2), (2, 1)))
+    state = profile.build_state(w0=lambda r, m, n: 0.001 * r, bootstrap=0.3)
+    np.testing.assert_allclose(state.island_widths(), 0.001 * profile.radius[profile.island_surface])
+    objects = profile.build_state(w0=lambda r, m, n: 0.001 * r, bootstrap=0.3, vectorized=False)
+    assert objects.get_island_data() == state.get_island_data()
+
+    run = run_headless(steps=20, profile=profile, record_islands=True)
+    #the target is the (2, 1) island, the second one
+    assert np.array_equal(run["recorder"].column("w"), run["recorder"].column("island_w")[:, 1])
+
+    with pytest.raises(ValueError, match="no rational surfaces"):
+        run_headless(steps=1, profile=RadialProfile(PowerLawQ(), modes=((7, 1),)))
+
+
+def test_equal_profiles_are_built_once():
+    clear_profile_cache()
+    first = get_profile(PowerLawQ(q0=1.0, qa=3.0), n_points=300)
+    assert get_profile(PowerLawQ(q0=1.0, qa=3.0), n_points=300) is first
+    assert get_profile(PowerLawQ(q0=1.0, qa=3.5), n_points=300) is not first
+    table = (np.linspace(0, 10, 5), np.linspace(1, 3, 5))
+    assert get_profile(table) is get_profile((table[0].copy(), table[1].copy()))
+    with pytest.raises(ValueError):
+        first.radius[0] = 1.0  #shared through the cache, so read-only
+    clear_profile_cache()
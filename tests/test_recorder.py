@@ -0,0 +1,137 @@
+# tests/test_recorder.py
+
+import gc
+import os
+
+import numpy as np
+import pytest
+
+import simulation.runner as runner
+from simulation.recorder import TimeSeriesRecorder
+
+
+def _filled(n, **options):
+    recorder = TimeSeriesRecorder(("t", "w"), **options)
+    for i in range(n):
+        recorder.append(i, 2.0 * i)
+    return recorder
+
+
+def test_full_mode_keeps_every_row_across_chunks():
+    recorder = _filled(10, chunk_size=4)
+    assert len(recorder) == 10
+    assert np.array_equal(recorder.column("t"), np.arange(10))
+    assert np.array_equal(recorder.tail("w", 6), 2.0 * np.arange(4, 10))
+    assert recorder.last("t") == 9
+
+    single = _filled(3, chunk_size=4)
+    assert np.shares_memory(single.column("t"), single._chunks[0]["t"])  #no copy
+
+
+def test_spilled_rows_read_back_from_disk(tmp_path):
+    recorder = _filled(50, chunk_size=4, spill_threshold=8, spill_dir=str(tmp_path))
+    assert recorder._spilled > 0
+    assert os.path.exists(tmp_path / "meta.json")
+    assert np.array_equal(recorder.column("t"), np.arange(50))
+    for n in (1, 3, 20, 50):
+        assert np.array_equal(recorder.tail("w", n), 2.0 * np.arange(50 - n, 50))
+
+
+def test_ring_mode_keeps_the_latest_rows():
+    recorder = _filled(12, mode="ring", capacity=5)
+    assert len(recorder) == 5
+    assert recorder.total == 12
+    assert np.array_equal(recorder.column("t"), np.arange(7, 12))
+    assert np.array_equal(recorder.tail("t", 3), [9, 10, 11])
+    assert recorder.last("w") == 22.0
+
+
+def test_decimate_mode_spreads_rows_over_the_run():
+    recorder = _filled(1000, mode="decimate", capacity=64)
+    t = recorder.column("t")
+    assert len(t) <= 64
+    assert t[0] == 0
+    assert np.all(np.diff(t) == recorder.stride)
+    assert t[-1] > 1000 - 2 * recorder.stride
+    assert np.array_equal(recorder.column("w"), 2.0 * t)
+
+
+def test_vector_columns_and_from_columns():
+    recorder = TimeSeriesRecorder({"t": (), "island_w": (3,)}, chunk_size=2)
+    for i in range(5):
+        recorder.append(i, [i, i + 1, i + 2])
+    assert recorder.column("island_w").shape == (5, 3)
+    assert np.array_equal(recorder.column("island_w")[:, 2], np.arange(2, 7))
+
+    copy = TimeSeriesRecorder.from_columns(recorder.as_dict())
+    assert copy.column("island_w").shape == (5, 3)
+    assert np.array_equal(copy.column("t"), recorder.column("t"))
+
+    recorder.clear()
+    assert len(recorder) == 0
+
+
+def test_bad_modes():
+    with pytest.raises(ValueError, match="Unknown recorder mode"):
+        TimeSeriesRecorder(mode="sparse")
+    with pytest.raises(ValueError, match="needs a capacity"):
+        TimeSeriesRecorder(mode="ring")
+
+
+def _spilling_recorder():
+    return _filled(20, chunk_size=4, spill_threshold=4)
+
+
+def test_with_block_removes_temporary_spill_dir():
+    with _spilling_recorder() as recorder:
+        spill_dir = recorder.spill_dir
+        assert os.path.isdir(spill_dir)
+        assert np.array_equal(recorder.column("t"), np.arange(20))
+    assert not os.path.exists(spill_dir)
+    assert recorder.spill_dir is None
+
+
+def test_dropped_recorder_removes_temporary_spill_dir():
+    recorder = _spilling_recorder()
+    spill_dir = recorder.spill_dir
+    del recorder
+    gc.collect()
+    assert not os.path.exists(spill_dir)
+
+
+def test_caller_spill_dir_is_kept(tmp_path):
+    with TimeSeriesRecorder(("t",), chunk_size=2, spill_threshold=2, spill_dir=str(tmp_path)) as recorder:
+        for i in range(10):
+            recorder.append(i)
+        assert os.path.exists(tmp_path / "t.bin")
+    assert tmp_path.is_dir()
+    assert not os.path.exists(tmp_path / "t.bin")
+
+
+def test_failed_run_closes_its_own_recorder(monkeypatch):
+    made = []
+
+    class TrackedRecorder(TimeSeriesRecorder):
+        closed = False
+
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            made.append(self)
+
+        def close(self):
+            self.closed = True
+            super().close()
+
+    def failing_on_step(*step):
+        raise RuntimeError("draw failed")
+
+    monkeypatch.setattr(runner, "TimeSeriesRecorder", TrackedRecorder)
+    with pytest.raises(RuntimeError, match="draw failed"):
+        runner.run_headless(steps=5, on_step=failing_on_step)
+    assert made[0].closed
+
+    #a recorder the caller passed in is the caller's to close
+    own = TimeSeriesRecorder()
+    with pytest.raises(RuntimeError):
+        runner.run_headless(steps=5, on_step=failing_on_step, recorder=own)
+    assert len(own) == 1
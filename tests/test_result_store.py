@@ -0,0 +1,66 @@
+# tests/test_result_store.py
+
+import numpy as np
+import pytest
+
+from simulation.parallel import run_parallel
+from simulation.result_store import SWEEP, TRAJECTORY, ResultStore
+from simulation.runner import run_headless
+from simulation.sweep import build_grid, run_sweep
+
+
+def test_sweep_table_round_trip(tmp_path):
+    store = ResultStore(tmp_path)
+    results = run_sweep(build_grid(bootstrap=np.linspace(0, 1, 5)), steps=20)
+    shard = store.append(results, attrs={"steps": np.int64(20), "dt": 0.1})
+
+    record, = store.index(SWEEP)
+    assert record["shard"] == shard and record["rows"] == 5
+    assert record["attrs"] == {"steps": 20, "dt": 0.1}
+
+    table = store.read_shard(shard)
+    assert isinstance(table["power"], np.memmap)
+    for key, col in results.items():
+        assert np.array_equal(table[key], col)
+    assert store.read_shard(shard, ["power"], mmap=False).keys() == {"power"}
+
+
+def test_run_round_trip(tmp_path):
+    store = ResultStore(tmp_path)
+    run = run_headless({"bootstrap": 0.3}, steps=25, record_islands=True)
+    store.append_run({"bootstrap": 0.3}, run)
+
+    (record, table), = store.iter_shards(TRAJECTORY)
+    assert record["attrs"]["params"] == {"bootstrap": 0.3}
+    assert record["attrs"]["metrics"]["final_width"] == run["final_width"]
+    assert np.array_equal(table["w"], run["recorder"].column("w"))
+    assert table["island_w"].shape == (25, 1)
+
+
+def test_filters_ordering_and_removal(tmp_path):
+    store = ResultStore(tmp_path)
+    later = store.append({"x": [2.0]}, attrs={"tag": "a"}, order=1)
+    store.append({"x": [1.0]}, attrs={"tag": "a"}, order=0)
+    store.append({"x": [9.0]}, attrs={"tag": "b"})
+
+    assert store.load(tag="a")["x"].tolist() == [1.0, 2.0]
+    assert store.load(tag="missing") == {}
+    assert len(store) == 3
+
+    store.remove(later)
+    assert store.load(tag="a")["x"].tolist() == [1.0]
+    assert len(ResultStore(tmp_path)) == 2  #a second handle sees the same store
+
+
+def test_ragged_table_is_rejected(tmp_path):
+    with pytest.raises(ValueError, match="same length"):
+        ResultStore(tmp_path).append({"a": [1, 2], "b": [1]})
+
+
+def test_parallel_workers_write_their_chunks_in_order(tmp_path):
+    points = build_grid(bootstrap=np.linspace(0, 1, 7))
+    returned = run_parallel(points, steps=20, chunk_size=3, max_workers=2, store_root=str(tmp_path),
+                            store_attrs={"run": "test"})
+    stored = ResultStore(tmp_path).load(run="test")
+    for key, col in returned.items():
+        assert np.array_equal(stored[key], col)
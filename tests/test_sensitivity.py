@@ -0,0 +1,71 @@
+# tests/test_sensitivity.py
+
+import numpy as np
+import pytest
+
+import simulation.sensitivity as sensitivity
+from simulation.sensitivity import morris_screening, morris_trajectories, ranking, sobol_indices
+
+PI_BOUNDS = {"bootstrap": (-np.pi, np.pi), "D": (-np.pi, np.pi), "delta_scale": (-np.pi, np.pi)}
+
+
+#Swaps the batched model for an analytic function of the sampled points
+@pytest.fixture
+def model(monkeypatch):
+    def use(func):
+        monkeypatch.setattr(sensitivity, "run_sweep", lambda points, **options: {"power": func(**points)})
+    return use
+
+
+#Ishigami function (a = 7, b = 0.1), whose Sobol indices are known in closed form
+def ishigami(bootstrap, D, delta_scale):
+    return np.sin(bootstrap) + 7 * np.sin(D) ** 2 + 0.1 * delta_scale ** 4 * np.sin(bootstrap)
+
+
+def test_sobol_indices_of_the_ishigami_function(model):
+    model(ishigami)
+    result = sobol_indices(PI_BOUNDS, samples=1 << 14, seed=1, bootstrap=100)
+    assert result["evaluations"] == (1 << 14) * 5
+    np.testing.assert_allclose(result["S1"], [0.3139, 0.4424, 0.0], atol=0.03)
+    np.testing.assert_allclose(result["ST"], [0.5576, 0.4424, 0.2437], atol=0.03)
+    for key in ("S1", "ST"):
+        low, high = result[f"{key}_conf"]
+        assert np.all(low <= high)
+        assert np.all((low - 0.02 <= result[key]) & (result[key] <= high + 0.02))
+    assert ranking(result) == ["bootstrap", "D", "delta_scale"]
+
+
+def test_morris_effects_of_a_linear_function(model):
+    bounds = {"bootstrap": (0, 1), "D": (0, 2), "delta_scale": (0, 20)}
+    model(lambda bootstrap, D, delta_scale: 3 * bootstrap - D + 0 * delta_scale)
+    result = morris_screening(bounds, trajectories=20, seed=2)
+    #effects are per unit of the scaled range: 3 * 1, -1 * 2 and 0
+    np.testing.assert_allclose(result["mu"], [3, -2, 0], atol=1e-12)
+    np.testing.assert_allclose(result["mu_star"], [3, 2, 0], atol=1e-12)
+    np.testing.assert_allclose(result["sigma"], 0, atol=1e-12)
+    assert ranking(result, "mu_star") == ["bootstrap", "D", "delta_scale"]
+
+
+def test_morris_trajectories_move_each_parameter_once():
+    points, order, steps = morris_trajectories(4, trajectories=30, levels=4, seed=0)
+    assert points.shape == (30, 5, 4)
+    moves = np.diff(points, axis=1)
+    assert np.all(np.count_nonzero(moves, axis=2) == 1)
+    assert np.all(np.sort(order, axis=1) == np.arange(4))
+    np.testing.assert_allclose(np.abs(steps), 2 / 3)
+    assert points.min() >= 0 and points.max() <= 1 + 1e-12
+
+
+def test_delta_scale_has_no_effect_on_the_q2_island():
+    #Δ' = (m/n - q) * delta_scale vanishes on the q = 2 surface of the (2, 1) island
+    result = sobol_indices(samples=256, steps=20, bootstrap=0)
+    i = result["names"].index("delta_scale")
+    assert result["S1"][i] == 0 and result["ST"][i] == 0
+    assert result["ST"][result["names"].index("D")] > 0.01
+
+
+def test_unknown_parameters_and_outputs():
+    with pytest.raises(ValueError, match="Unknown sensitivity parameter"):
+        sobol_indices({"Q": (0, 1)}, samples=8)
+    with pytest.raises(ValueError, match="Unknown output"):
+        morris_screening(output="temperature", trajectories=2)
@@ -0,0 +1,44 @@
+# tests/test_startup.py
+
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEADLESS_MODULES = (
+    "main", "simulation.runner", "simulation.sweep", "simulation.parallel", "simulation.worker",
+    "simulation.ensemble", "simulation.sensitivity", "simulation.optimize", "simulation.result_store",
+    "simulation.cache", "simulation.checkpoint", "physics.transport", "plasma.profile",
+    "UI.island_plot", "UI.live_run", "UI.export",
+)
+
+HEAVY_MODULES = ("matplotlib", "tkinter", "argparse", "concurrent.futures", "cProfile")
+
+
+#Imports in a fresh interpreter, since this test session has loaded everything already
+def _loaded_after_import(modules):
+    code = ("import sys\n"
+            f"for name in {modules!r}:\n"
+            "    __import__(name)\n"
+            f"print(','.join(name for name in {HEAVY_MODULES!r} if name in sys.modules))\n")
+    env = {key: value for key, value in os.environ.items() if key != "ISLAND_PROFILE"}
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env, capture_output=True, text=True,
+                         check=True).stdout
+    return [name for name in out.strip().split(",") if name]
+
+
+def test_headless_imports_skip_heavy_modules():
+    assert _loaded_after_import(HEADLESS_MODULES) == []
+
+
+def test_plots_still_load_matplotlib_when_drawing():
+    code = ("import sys\n"
+            "from UI.island_plot import plot_island_growth\n"
+            "from simulation.runner import build_initial_plasma\n"
+            "plot_island_growth(build_initial_plasma()[1], 0.0, 0.99, 9.9e20, 9.9e16)\n"
+            "print('matplotlib' in sys.modules)\n")
+    env = {**os.environ, "MPLBACKEND": "Agg"}
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env, capture_output=True, text=True,
+                         check=True).stdout
+    assert out.strip() == "True"
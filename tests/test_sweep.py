@@ -0,0 +1,47 @@
+# tests/test_sweep.py
+
+import numpy as np
+import pytest
+
+from simulation.runner import run_headless
+from simulation.sweep import RESULT_KEYS, build_grid, one_at_a_time, run_sweep, write_results
+
+
+def test_grid_is_the_cartesian_product():
+    grid = build_grid(bootstrap=[0.1, 0.2, 0.3], D=[0.5, 1.0])
+    assert len(grid["bootstrap"]) == 6
+    assert set(zip(grid["bootstrap"], grid["D"])) == {(b, d) for b in (0.1, 0.2, 0.3) for d in (0.5, 1.0)}
+    assert np.all(grid["delta_scale"] == 10)
+
+    with pytest.raises(ValueError, match="Unknown sweep parameter"):
+        build_grid(bootstrp=[0.1])
+
+
+@pytest.mark.parametrize("key, values", [("bootstrap", [0.0, 0.4, 1.0]), ("D", [0.1, 2.0]),
+                                         ("initial_width", [0.001, 0.05])])
+def test_sweep_matches_single_runs(key, values):
+    swept = run_sweep(one_at_a_time(key, values), steps=60, chunk_size=2)
+    for i, value in enumerate(values):
+        single = run_headless({key: value}, steps=60)
+        for name in RESULT_KEYS:
+            assert swept[name][i] == pytest.approx(single[name], rel=1e-9, abs=1e-12), name
+
+
+def test_integrator_sweep_matches_single_runs():
+    swept = run_sweep(one_at_a_time("bootstrap", [0.1, 0.6]), steps=40, integrator="rk4")
+    for i, value in enumerate([0.1, 0.6]):
+        single = run_headless({"bootstrap": value}, steps=40, integrator="rk4")
+        assert swept["final_width"][i] == pytest.approx(single["final_width"], rel=1e-9)
+
+
+def test_results_round_trip(tmp_path):
+    results = run_sweep(one_at_a_time("bootstrap", [0.1, 0.2]), steps=10)
+
+    write_results(results, tmp_path / "sweep.npz")
+    with np.load(tmp_path / "sweep.npz") as saved:
+        for key, col in results.items():
+            assert np.array_equal(saved[key], col)
+
+    write_results(results, tmp_path / "sweep.csv")
+    table = np.genfromtxt(tmp_path / "sweep.csv", delimiter=",", names=True)
+    np.testing.assert_allclose(table["final_width"], results["final_width"], rtol=1e-9)
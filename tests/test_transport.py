@@ -0,0 +1,63 @@
+# tests/test_transport.py
+
+import numpy as np
+import pytest
+
+from physics.transport import TransportModel, cyclic_reduction, solve_tridiagonal, thomas
+from plasma.profile import RadialProfile, PowerLawQ
+from simulation.cache import SimulationCache, cached_run
+from simulation.runner import run_headless
+
+
+def random_systems(size, seed=0):
+    rng = np.random.default_rng(seed)
+    lower, upper = -rng.random((2, size)), -rng.random((2, size))
+    diag, rhs = 2.5 + rng.random((2, size)), rng.random((2, size))
+    return lower, diag, upper, rhs
+
+
+def dense_solve(lower, diag, upper, rhs):
+    matrix = np.diag(diag) + np.diag(lower[1:], -1) + np.diag(upper[:-1], 1)
+    return np.linalg.solve(matrix, rhs)
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 8, 9, 257])
+def test_tridiagonal_solvers_match_a_dense_solve(size):
+    lower, diag, upper, rhs = random_systems(size)
+    for solver in (thomas, cyclic_reduction):
+        x = solver(lower, diag, upper, rhs)
+        for k in range(2):
+            np.testing.assert_allclose(x[k], dense_solve(lower[k], diag[k], upper[k], rhs[k]), rtol=1e-10)
+    with pytest.raises(ValueError):
+        solve_tridiagonal(lower, diag, upper, rhs, method="lu")
+
+
+def test_equilibrium_is_steady_without_islands():
+    state = RadialProfile(PowerLawQ(), n_points=500).build_state(w0=0.0)
+    model = TransportModel().bind(state)
+    start = model.fields.copy()
+    for _ in range(20):
+        model.advance(0.1)
+    np.testing.assert_allclose(model.fields, start, rtol=1e-9)
+    assert model.tau_E == pytest.approx(1.0)
+
+
+def test_islands_flatten_the_profiles_and_lower_tau_E():
+    state = RadialProfile(PowerLawQ(), n_points=500).build_state(w0=1.0)
+    model = TransportModel().bind(state)
+    for _ in range(20):
+        model.advance(0.1)
+    assert model.tau_E < 1.0
+    inside = np.abs(model.radius - state.island_radii()[0]) < 0.4
+    drop = np.ptp(model.T[inside])
+    assert drop < 0.1 * np.ptp(model.equilibrium[0][inside])  #flat across the island
+    assert model.drive_scale[0] != 1.0  #the drive follows the changed gradient next to the island
+
+
+def test_transport_runs_are_not_answered_from_the_plain_cache_entry():
+    cache = SimulationCache()
+    plain = cached_run(cache=cache)
+    coupled = cached_run(cache=cache, transport=TransportModel())
+    assert not coupled["cache_hit"]
+    assert coupled["power"] == run_headless(transport=TransportModel())["power"]
+    assert coupled["power"] != plain["power"]
@@ -0,0 +1,59 @@
+# tests/test_worker.py
+
+import time
+
+import numpy as np
+import pytest
+
+from simulation.runner import run_headless
+from simulation.worker import SimulationWorker
+
+
+def _drain_until_finished(worker, timeout=10):
+    records = []
+    deadline = time.time() + timeout
+    while not worker.finished():
+        assert time.time() < deadline, "worker did not finish"
+        records += worker.drain()
+        time.sleep(0.001)
+    return records + worker.drain()
+
+
+def test_worker_streams_every_step_of_the_run():
+    params = {"bootstrap": 0.4}
+    worker = SimulationWorker(params, steps=120).start()
+    params["bootstrap"] = 0.9  #a slider moving mid-run does not reach the worker
+    records = _drain_until_finished(worker)
+    worker.join()
+
+    reference = run_headless({"bootstrap": 0.4}, steps=120)
+    assert worker.error is None
+    assert [r.t for r in records] == pytest.approx(0.1 * np.arange(120))
+    assert np.array_equal([r.w for r in records], reference["recorder"].column("w"))
+    assert worker.result["final_width"] == reference["final_width"]
+    assert worker.result["dP_dt"] == reference["dP_dt"]
+
+
+def test_full_queue_holds_the_solver_back_until_cancelled():
+    worker = SimulationWorker({}, steps=100_000, maxsize=5).start()
+    time.sleep(0.2)
+    assert worker.records.qsize() == 5
+    assert worker.running()
+
+    worker.cancel()
+    worker.join(5)
+    assert not worker.running()
+    assert len(worker.drain()) == 5
+    assert worker.finished()
+    assert worker.result["cancelled"]
+
+
+def test_worker_keeps_the_error():
+    def failing_solver(island, flux_surface):
+        raise RuntimeError("solver blew up")
+
+    worker = SimulationWorker({}, steps=10, mre_solver=failing_solver).start()
+    worker.join(5)
+    assert worker.finished()
+    assert isinstance(worker.error, RuntimeError)
+    assert worker.result is None